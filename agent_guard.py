@@ -0,0 +1,244 @@
+"""
+Loop detection and local error correction for the SQL agent's queries.
+
+The ReAct prompt asks the agent not to repeat itself, but only the executor's
+iteration and time limits enforce it, and every wasted iteration is an LLM
+call. A `QueryGuard` is made current for one question's agent run, and
+`GuardedQuerySQLDatabaseTool` passes it every query:
+
+- A query that was already run (compared after normalization) is answered
+  from the earlier observation, with a nudge to move on, without touching
+  SQLite.
+- "no such column" and "no such table" errors are corrected locally when the
+  data dictionary has a close match. The fixed query runs at once, so the
+  agent gets a result instead of spending an iteration on the error.
+- Repeating a query again, hitting the same error three times, or four errors
+  in a row stops the agent with `AgentLoopDetected`. The exception carries the
+  best observation so far.
+"""
+
+import re
+import difflib
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import CallbackManagerForToolRun
+
+from schema_index import SchemaIndex
+from sql_cache import CachedQuerySQLDatabaseTool, normalize_sql
+from telemetry import current_trace
+
+logger = logging.getLogger(__name__)
+
+# Times a query may be repeated (answered from memory) before the agent stops
+MAX_QUERY_REPEATS = 1
+# Times the same error may occur; one more stops the agent
+MAX_IDENTICAL_ERRORS = 2
+# Errors in a row that stop the agent, whatever they are
+MAX_CONSECUTIVE_ERRORS = 4
+# difflib similarity a dictionary name needs to replace an unknown one
+CORRECTION_CUTOFF = 0.75
+
+REPEATED_QUERY_NOTICE = (
+    "[You already ran this query; its result is repeated below. Running it "
+    "again will not change it: use it for your Final Answer or try a "
+    "different query.]\n"
+)
+
+MISSING_NAME_PATTERN = re.compile(
+    r"no such (?P<kind>column|table): (?:(?P<qualifier>\w+)\.)?(?P<name>\w+)",
+    re.IGNORECASE,
+)
+# FROM/JOIN <table> [[AS] alias]
+TABLE_REFERENCE_PATTERN = re.compile(
+    r"\b(?:from|join)\s+(?P<table>[A-Za-z_]\w*)"
+    r"(?:\s+(?:as\s+)?(?P<alias>[A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+STRING_LITERAL = r"'(?:[^']|'')*'"
+
+
+class AgentLoopDetected(Exception):
+    """The agent is going in circles; stop it and use what it found."""
+
+    def __init__(self, reason: str, best_observation: Optional[str] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.best_observation = best_observation
+
+
+def is_error(observation: str) -> bool:
+    return observation.startswith("Error:")
+
+
+def error_signature(observation: str) -> str:
+    """The error's first line without the driver prefix, e.g. 'no such column: x'."""
+    first_line = observation[len("Error:") :].strip().splitlines()[0]
+    return re.sub(r"^\([\w.]+\)\s*", "", first_line).strip().lower()
+
+
+def _replace_identifier(query: str, old: str, new: str) -> str:
+    """Replace an identifier (optionally `qualifier.name`) outside string literals."""
+    pattern = re.compile(
+        rf"{STRING_LITERAL}|(?P<name>(?<![\w.]){old}(?!\w))", re.IGNORECASE
+    )
+    return pattern.sub(
+        lambda match: new if match.group("name") else match.group(0), query
+    )
+
+
+class QueryGuard:
+    """Per-question record of the agent's queries, their results, and errors."""
+
+    def __init__(self, schema_index: SchemaIndex):
+        self.schema_index = schema_index
+        self._observations: Dict[str, str] = {}
+        self._repeats: Counter = Counter()
+        self._errors: Counter = Counter()
+        self._consecutive_errors = 0
+        self.best_observation: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def run(self, query: str, execute: Callable[[str], str]) -> str:
+        """Run `query` through `execute` unless it is a repeat; may stop the agent."""
+        fingerprint = normalize_sql(query)
+        with self._lock:
+            previous = self._observations.get(fingerprint)
+            if previous is not None:
+                self._repeats[fingerprint] += 1
+                if self._repeats[fingerprint] > MAX_QUERY_REPEATS:
+                    self._stop("the agent kept re-running the same query")
+                _count("agent_repeated_queries")
+                logger.info(f"Repeated query answered from memory: {fingerprint}")
+                return REPEATED_QUERY_NOTICE + previous
+
+        observation = result = execute(query)
+        if is_error(observation):
+            corrected = self.correct(query, observation)
+            if corrected is not None:
+                fixed_query, note = corrected
+                fixed_observation = execute(fixed_query)
+                if not is_error(fixed_observation):
+                    _count("agent_autocorrections")
+                    logger.info(f"Auto-corrected query: {note}")
+                    result = fixed_observation
+                    observation = f"[{note}]\n{fixed_observation}"
+
+        with self._lock:
+            self._observations[fingerprint] = observation
+            if not is_error(observation):
+                self._consecutive_errors = 0
+                if result.strip():
+                    self.best_observation = result
+                return observation
+
+            signature = error_signature(observation)
+            self._errors[signature] += 1
+            self._consecutive_errors += 1
+            if self._errors[signature] > MAX_IDENTICAL_ERRORS:
+                self._stop(f"the same error kept recurring ({signature})")
+            if self._consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                self._stop(f"{self._consecutive_errors} queries in a row failed")
+        return observation
+
+    def correct(self, query: str, observation: str) -> Optional[Tuple[str, str]]:
+        """
+        The query with an unknown column or table replaced by its closest
+        dictionary name, and a note saying so; None if there is no clear match.
+        """
+        match = MISSING_NAME_PATTERN.search(observation)
+        if not match:
+            return None
+        name, qualifier = match.group("name"), match.group("qualifier")
+        if match.group("kind").lower() == "table":
+            candidates = list(self.schema_index.columns)
+        else:
+            candidates = self._columns_in_scope(query, qualifier)
+
+        by_lower = {candidate.lower(): candidate for candidate in candidates}
+        closest = difflib.get_close_matches(
+            name.lower(), list(by_lower), n=1, cutoff=CORRECTION_CUTOFF
+        )
+        if not closest or closest[0] == name.lower():
+            return None
+        replacement = by_lower[closest[0]]
+
+        old = re.escape(name)
+        if qualifier:
+            old = rf"{re.escape(qualifier)}\s*\.\s*{old}"
+            replacement = f"{qualifier}.{replacement}"
+        fixed_query = _replace_identifier(query, old, replacement)
+        if fixed_query == query:
+            return None
+        shown = f"{qualifier}.{name}" if qualifier else name
+        return fixed_query, f"Auto-corrected {shown} to {replacement}"
+
+    def _columns_in_scope(self, query: str, qualifier: Optional[str]) -> List[str]:
+        """Columns of the tables the query reads (or of the qualifier's table)."""
+        tables_by_lower = {table.lower(): table for table in self.schema_index.columns}
+        in_scope = []
+        for reference in TABLE_REFERENCE_PATTERN.finditer(query):
+            table = tables_by_lower.get(reference.group("table").lower())
+            if table is None:
+                continue
+            alias = reference.group("alias") or ""
+            if qualifier and qualifier.lower() not in (
+                table.lower(),
+                alias.lower(),
+            ):
+                continue
+            in_scope.append(table)
+        if not in_scope:
+            in_scope = list(self.schema_index.columns)
+        columns = self.schema_index.columns
+        return sorted({column for table in in_scope for column in columns[table]})
+
+    def _stop(self, reason: str) -> None:
+        _count("agent_loop_stops")
+        logger.warning(f"Stopping agent early: {reason}")
+        raise AgentLoopDetected(reason, self.best_observation)
+
+
+def _count(name: str) -> None:
+    trace = current_trace()
+    if trace:
+        trace.increment(name)
+
+
+_current_guard: ContextVar[Optional[QueryGuard]] = ContextVar(
+    "current_guard", default=None
+)
+
+
+def current_guard() -> Optional[QueryGuard]:
+    """The guard of the agent run on this thread/task, if any."""
+    return _current_guard.get()
+
+
+@contextmanager
+def guard_queries(schema_index: SchemaIndex) -> Iterator[QueryGuard]:
+    """Route the SQL tool's queries through a new guard for the block."""
+    guard = QueryGuard(schema_index)
+    token = _current_guard.set(guard)
+    try:
+        yield guard
+    finally:
+        _current_guard.reset(token)
+
+
+class GuardedQuerySQLDatabaseTool(CachedQuerySQLDatabaseTool):
+    """The cached SQL tool, with queries checked by the current QueryGuard."""
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        execute = super()._run
+        guard = current_guard()
+        if guard is None:
+            return execute(query, run_manager)
+        return guard.run(query, lambda sql: execute(sql, run_manager))
@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Set
+
+from config import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "answer_cache.db"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+# Words that make a question depend on earlier turns (or on who is asking),
+# so the same text can legitimately need a different answer.
+CONTEXT_DEPENDENT_WORDS: Set[str] = {
+    "he",
+    "she",
+    "him",
+    "his",
+    "her",
+    "hers",
+    "they",
+    "them",
+    "their",
+    "it",
+    "its",
+    "that",
+    "those",
+    "these",
+    "this",
+    "same",
+    "again",
+    "else",
+    "i",
+    "me",
+    "my",
+    "mine",
+    "we",
+    "us",
+    "our",
+}
+FOLLOW_UP_PREFIXES = ("and ", "what about ", "how about ", "also ")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip punctuation, and collapse whitespace."""
+    cleaned = re.sub(r"[^a-z0-9]+", " ", question.lower())
+    return " ".join(cleaned.split())
+
+
+def is_context_independent(question: str) -> bool:
+    """True if the question can be answered without the conversation history."""
+    normalized = normalize_question(question)
+    if not normalized:
+        return False
+    if normalized.startswith(FOLLOW_UP_PREFIXES):
+        return False
+    return not CONTEXT_DEPENDENT_WORDS.intersection(normalized.split())
+
+
+def file_fingerprint(path: str) -> str:
+    """Cheap change detector for a file: mtime + size (or 'missing')."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+@dataclass
+class CachedAnswer:
+    """An answer previously produced by the agent."""
+
+    question: str
+    answer: str
+    tables: List[str]
+    reasoning: str
+    created_at: float
+    hits: int
+
+
+class AnswerCache:
+    """
+    SQLite-backed answer cache shared by every session of the app.
+
+    Entries are keyed on the normalized question, expire after `ttl_seconds`
+    (or the lifetime given to `put`), are evicted least-recently-used once
+    `max_entries` is exceeded, and are all dropped whenever the league
+    database file changes.
+    """
+
+    def __init__(
+        self,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        db_path: str = DB_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_path = cache_path
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                tables TEXT NOT NULL,
+                reasoning TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_answers_last_access
+                ON answers (last_access);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if "expires_at" not in columns:
+            # Cache files written before per-entry expiry
+            self._conn.execute("ALTER TABLE answers ADD COLUMN expires_at REAL")
+            self._conn.execute(
+                "UPDATE answers SET expires_at = created_at + ?", (self.ttl_seconds,)
+            )
+        self._conn.commit()
+
+    def _check_db_fingerprint(self) -> None:
+        """Drop every entry if the league database changed since they were stored."""
+        current = file_fingerprint(self.db_path)
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'db_fingerprint'"
+        ).fetchone()
+        if row is not None and row[0] == current:
+            return
+        if row is not None:
+            logger.info(
+                f"Database {self.db_path} changed, invalidating answer cache"
+            )
+        self._conn.execute("DELETE FROM answers")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('db_fingerprint', ?)",
+            (current,),
+        )
+        self._conn.commit()
+
+    def get(self, question: str) -> Optional[CachedAnswer]:
+        """Return the cached answer for `question`, or None on a miss."""
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._check_db_fingerprint()
+            row = self._conn.execute(
+                "SELECT question, answer, tables, reasoning, created_at, hits, "
+                "expires_at FROM answers WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            if now > row[6]:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE answers SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        logger.info(f"Answer cache HIT for: {key}")
+        return CachedAnswer(
+            question=row[0],
+            answer=row[1],
+            tables=json.loads(row[2]),
+            reasoning=row[3],
+            created_at=row[4],
+            hits=row[5] + 1,
+        )
+
+    def put(
+        self,
+        question: str,
+        answer: str,
+        tables: List[str],
+        reasoning: str,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Store an answer and evict the least recently used entries if needed.
+        `ttl_seconds` overrides the cache's default lifetime for this entry.
+        """
+        key = normalize_question(question)
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._check_db_fingerprint()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, question, answer, tables, reasoning, created_at, last_access, "
+                "hits, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                (
+                    key,
+                    question,
+                    answer,
+                    json.dumps(tables),
+                    reasoning,
+                    now,
+                    now,
+                    expires_at,
+                ),
+            )
+            self._conn.execute("DELETE FROM answers WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+        logger.info(f"Answer cache STORE for: {key}")
+
+    def invalidate_if_stale(self) -> None:
+        """
+        Drop the cached answers only if they were stored under an older database
+        fingerprint. Answers another process (e.g. the almanac) stored after a
+        refresh already carry the new fingerprint and are kept.
+        """
+        with self._lock:
+            self._check_db_fingerprint()
+
+    def clear(self) -> None:
+        """Remove every cached answer and reset the hit/miss counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -1,20 +1,33 @@
+"""
+Streamlit chat UI for the Oracle.
+
+The page is a thin client: every question goes through `OracleEngine`'s async
+pipeline. Set ORACLE_API_URL (e.g. http://127.0.0.1:8000) to send questions to
+a running `server.py` instead of answering them in this process.
+
+The engine, and LangChain with it, is not imported until the first question
+that needs it; once the page has rendered, a background thread warms it up.
+
+One engine, and every cache derived from the database, is shared by all
+sessions. Each session keeps its own conversation memory and transcript in
+`st.session_state`, and nothing from it is shared.
+"""
+
 import os
-import csv
+import json
+import asyncio
 import logging
+import threading
+import urllib.request
 import streamlit as st
-from dotenv import load_dotenv
-from typing import Any, List, Optional, Set, Dict
-from pydantic import BaseModel, Field
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.prompts import PromptTemplate
-from langchain_community.utilities import SQLDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.schema import AgentAction, AgentFinish
-from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
-
-## Import ConversationBufferMemory for stateful chat history.
-from langchain.memory import ConversationBufferMemory
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+from startup import STARTUP, LazyEngine
+from simple_router import route_query
+from conversation_memory import ConversationMemory
+
+if TYPE_CHECKING:
+    from engine import OracleEngine
 
 # --- Page Configuration (MUST BE FIRST!) ---
 st.set_page_config(page_title="Fantasy Football Oracle", page_icon="🏈")
@@ -28,363 +41,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
-# --- Pydantic Model for Structured Output ---
-class TableSelection(BaseModel):
-    """Structured output format for table selection."""
-
-    tables: List[str] = Field(
-        description="List of table names needed to answer the query. Include ALL relevant tables."
-    )
-    reasoning: str = Field(
-        description="Brief explanation of why these tables were selected"
-    )
-
-
-class LoggingCallbackHandler(BaseCallbackHandler):
-    def on_chain_start(
-        self, serialized: Dict[str, Any], inputs: Dict[str, Any], **kwargs: Any
-    ) -> Any:
-        """Log the inputs when a chain starts, with checks for None."""
-        if serialized is None:
-            return
-
-        logger.info("=" * 80)
-        chain_name = serialized.get("name", serialized.get("id", ["UnknownChain"])[-1])
-        logger.info(f"CHAIN START: {chain_name}")
-        logger.info("INPUTS:")
-
-        for key, value in inputs.items():
-            if key == "agent_scratchpad":
-                logger.info(f"  - {key}: [present]")
-                continue
-            if key == "history" and len(str(value)) > 400:
-                logger.info(f"  - {key}: [present, truncated]")
-                continue
-            logger.info(f"  - {key}:\n{value}")
-        logger.info("=" * 80)
-
-    def on_agent_action(self, action: AgentAction, **kwargs: Any) -> Any:
-        logger.info(
-            f"Agent Action: {action.tool} called with input:\n{action.tool_input}"
-        )
-
-    def on_tool_end(self, output: str, **kwargs: Any) -> Any:
-        logger.info(f"Tool End: Tool produced output:\n{output}")
-
-    def on_agent_finish(self, finish: AgentFinish, **kwargs: Any) -> Any:
-        logger.info(f"Agent Finished: Final Answer:\n{finish.return_values['output']}")
-        logger.info("=" * 80 + "\n")
-
-
-load_dotenv()
-if not os.getenv("GOOGLE_API_KEY"):
-    raise ValueError("GOOGLE_API_KEY not found.")
+API_URL = os.getenv("ORACLE_API_URL", "").rstrip("/")
+API_TIMEOUT = 120
+# Messages kept on screen per session; the memory summarizes what the agent needs
+MAX_TRANSCRIPT_MESSAGES = 200
+# Shown when the event stream ends without an answer (same text as the engine's)
+NO_ANSWER_MESSAGE = "Sorry, I couldn't answer that question."
 
 
 @st.cache_resource
-def get_llm():
-    """Initializes and returns the LLM instance."""
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash-lite-preview-06-17",
-        temperature=0,
-    )
+def get_lazy_engine() -> LazyEngine:
+    """One engine per process, built on first use."""
+    return LazyEngine()
 
 
-@st.cache_resource
-def get_structured_llm():
-    """Returns an LLM configured for structured output."""
-    base_llm = get_llm()
-    return base_llm.with_structured_output(TableSelection)
+def get_engine() -> "OracleEngine":
+    """The LLM, database, caches and agent; builds them on the first call."""
+    return get_lazy_engine().get()
 
 
 @st.cache_resource
-def get_db():
-    """Initializes and returns the database connection."""
-    return SQLDatabase.from_uri(
-        f"sqlite:///{'llm_fantasy_data.db'}",
-        sample_rows_in_table_info=0,
-        lazy_table_reflection=True,
-        view_support=True,
-    )
-
-
-llm = get_llm()
-structured_llm = get_structured_llm()
-db = get_db()
-
-
-@st.cache_data
-def load_table_descriptions(filepath: str) -> str:
-    """Load table descriptions from CSV file."""
-    try:
-        with open(filepath, mode="r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            return "\n".join(
-                [
-                    f"Table: {row['table_name']}, Description: {row['table_description']}"
-                    for row in reader
-                ]
-            )
-    except Exception as e:
-        st.error(f"Failed to load table dictionary: {e}")
-        logger.error(f"Failed to load table dictionary: {e}")
-        return ""
-
-
-@st.cache_data
-def get_detailed_schema_info(
-    table_names: List[str], filepath: str = "data_dictionary.csv"
-) -> str:
-    """
-    Parses the data dictionary to get rich, human-readable column descriptions.
-    Returns a well-formatted schema string for the agent.
-    """
-    logger.info(f"Loading schema for tables: {table_names}")
-
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop shared by every session's questions."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="oracle-loop", daemon=True).start()
+    return loop
+
+
+def stream_events(
+    question: str, history: str, memory: ConversationMemory
+) -> Iterator[Dict[str, Any]]:
+    """The pipeline's events for one question (see `OracleEngine.astream_answer`)."""
+    simple_response = route_query(question)
+    if simple_response:
+        # Greetings never load the engine, or LangChain
+        yield {"type": "answer", "answer": simple_response, "source": "simple"}
+        return
+
+    if API_URL:
+        body = {
+            "question": question,
+            "history": history,
+            "router_context": router_context(memory),
+        }
+        request = urllib.request.Request(
+            f"{API_URL}/ask/stream",
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=API_TIMEOUT) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    loop = get_event_loop()
+    events = get_engine().astream_answer(question, history, router_context(memory))
     try:
-        with open(filepath, mode="r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            all_rows = list(reader)
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(
+                    events.__anext__(), loop
+                ).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(events.aclose(), loop).result()
+
+
+def new_conversation() -> ConversationMemory:
+    """Token-bounded memory; summarized by the local engine's LLM when there is one."""
+    if API_URL:
+        return ConversationMemory()
+    lazy_engine = get_lazy_engine()
+    # Summaries only start once turns overflow, long after the engine is needed
+    return ConversationMemory(
+        summarize=lambda summary, transcript: (
+            lazy_engine.get().summarize_conversation(summary, transcript)
+        )
+    )
 
-            normalized_target_tables = {name.strip().lower() for name in table_names}
 
-            relevant_rows = [
-                row
-                for row in all_rows
-                if row["table_name"].strip().lower() in normalized_target_tables
-            ]
+def router_context(memory: ConversationMemory) -> str:
+    if API_URL:
+        return memory.router_context()
+    return get_engine().router_context(memory)
 
-            if not relevant_rows:
-                logger.warning(
-                    f"No schema found in {filepath} for {table_names}, using basic schema"
-                )
-                return db.get_table_info(table_names=table_names)
-
-            logger.info(f"Found {len(relevant_rows)} column descriptions in {filepath}")
-
-            # Group by table
-            table_schemas = {}
-            for row in relevant_rows:
-                table_name = row["table_name"]
-                if table_name not in table_schemas:
-                    table_schemas[table_name] = []
-
-                col_info = f"  • {row['column_name']}: {row['column_description']}"
-                table_schemas[table_name].append(col_info)
-
-            # Build clear, well-formatted schema string
-            schema_parts = [
-                "=" * 70,
-                "DATABASE SCHEMA - AVAILABLE TABLES AND COLUMNS",
-                "=" * 70,
-                "",
-                "These are the ONLY tables and columns you can use:",
-                "",
-            ]
-
-            for table, columns in table_schemas.items():
-                schema_parts.append(f"📊 Table: {table}")
-                schema_parts.extend(columns)
-                schema_parts.append("")
-
-            schema_parts.append("=" * 70)
-            schema_parts.append(
-                "IMPORTANT: Do not reference any tables or columns not listed above."
-            )
-            schema_parts.append("=" * 70)
-
-            full_schema = "\n".join(schema_parts)
-            logger.info("Schema built successfully")
-            return full_schema
-
-    except FileNotFoundError:
-        logger.error(f"Data dictionary file not found at {filepath}")
-        return db.get_table_info(table_names=table_names)
-    except Exception as e:
-        logger.error(f"Error reading {filepath}: {e}", exc_info=True)
-        return db.get_table_info(table_names=table_names)
-
-
-def route_query(query: str) -> Optional[str]:
-    """Handle simple queries that don't need database access."""
-    query_words: Set[str] = set(query.lower().split())
-    greetings: Set[str] = {"hello", "hi", "hey"}
-    thanks: Set[str] = {"thanks", "thank"}
-
-    if greetings.intersection(query_words):
-        return "Hello! How can I help you with your fantasy league data?"
-    if thanks.intersection(query_words):
-        return "You're welcome!"
-    return None
-
-
-def get_relevant_tables_with_pydantic(
-    user_query: str, history: str, table_descriptions: str
-) -> tuple[List[str], str]:
-    """
-    Use LLM with structured output (Pydantic) to identify which tables are needed.
-    Returns: (list of table names, reasoning)
-
-    BENEFIT: Guaranteed correct format, no parsing errors!
-    """
-    prompt = f"""You are an expert database routing assistant. Identify ALL database tables required to answer the user's question.
-
-**CRITICAL: If the question asks about PEOPLE or NAMES, you MUST include FantasyOwners_LLM**
-
-**Mandatory Table Selection Rules (DO NOT VIOLATE THESE):**
-
-1. **Questions about PEOPLE/WINNERS/NAMES (WHO questions):**
-   - Keywords: "who", "winner", "champion", "owner", "name", "player"
-   - **ALWAYS include:** FantasyOwners_LLM + FantasySeasons_LLM
-   - Example: "Who won in 2017?" → [FantasySeasons_LLM, FantasyOwners_LLM]
-   
-2. **Questions about TEAMS:**
-   - Keywords: "team", "team name"
-   - **ALWAYS include:** FantasyTeams_LLM + related tables
-   
-3. **Questions about MATCHUPS/GAMES/SCORES:**
-   - Keywords: "game", "matchup", "score", "versus", "against"
-   - **ALWAYS include:** FantasyMatchups_LLM + related tables
-   
-4. **Questions about SEASONS/YEARS/CHAMPIONSHIPS:**
-   - Keywords: "season", "year", "championship", numeric years (2017, 2020, etc.)
-   - **ALWAYS include:** FantasySeasons_LLM
-   - **IF asking WHO won:** Also include FantasyOwners_LLM
-
-5. **When in doubt:**
-   - Include MORE tables rather than fewer
-   - Joining tables is cheap, missing data is expensive
-   - If the question could POSSIBLY need owner names, include FantasyOwners_LLM
-
-**Your Task:**
-Analyze the user's question carefully:
-- Look for keywords that indicate what information they want
-- Think about what data you need to JOIN to get a complete answer
-- Return ALL relevant table names (be generous, not conservative)
-
---- CONTEXT ---
-Conversation History:
-{history}
-
-Available Tables:
-{table_descriptions}
-
-User Question: {user_query}
---- END CONTEXT ---
-
-Remember: If the answer requires showing a PERSON'S NAME, you MUST include FantasyOwners_LLM!"""
 
-    try:
-        # This returns a TableSelection object with guaranteed structure
-        result: TableSelection = structured_llm.invoke(prompt)
+def fetch_stats() -> Optional[Dict[str, Any]]:
+    """Answer cache and latency statistics shared by every client; None until loaded."""
+    if API_URL:
+        with urllib.request.urlopen(f"{API_URL}/stats", timeout=API_TIMEOUT) as response:
+            return json.load(response)
+    if not get_lazy_engine().loaded:
+        return None
+    return get_engine().stats()
 
-        # Post-processing safety check: If "who" or "winner" is in the query and FantasyOwners not selected, add it
-        query_lower = user_query.lower()
-        who_keywords = ["who", "winner", "champion", "owner"]
 
-        if any(keyword in query_lower for keyword in who_keywords):
-            if not any("fantasyowners" in table.lower() for table in result.tables):
-                logger.warning(
-                    f"Safety catch: Adding FantasyOwners_LLM for WHO question: {user_query}"
-                )
-                result.tables.append("FantasyOwners_LLM")
-                result.reasoning += (
-                    " [Safety: Added FantasyOwners_LLM for WHO question]"
-                )
-
-        logger.info(f"Table Selector (Pydantic) identified: {result.tables}")
-        logger.info(f"Reasoning: {result.reasoning}")
-
-        return result.tables, result.reasoning
-
-    except Exception as e:
-        logger.error(f"Structured table selector failed: {e}", exc_info=True)
-        return [], "Error during table selection"
-
-
-def create_specialized_agent(forced_schema: str):
-    """Creates a custom SQL agent with improved prompts and error handling."""
-    tools = [QuerySQLDatabaseTool(db=db)]
-
-    prompt_template = """You are an expert SQLite data analyst. Your job is to answer questions by writing and executing SQL queries against a fantasy football database.
-
-**CRITICAL RULES:**
-1. This is SQLite - use ONLY SQLite syntax (no MySQL/PostgreSQL features)
-2. Work step-by-step - run ONE query at a time
-3. After EVERY query, WAIT for the actual Observation before proceeding
-4. NEVER predict query results - always execute and observe
-5. If a query fails, carefully read the error message and fix the query
-6. Use proper JOIN syntax with explicit ON clauses
-7. Always use table aliases (T1, T2, etc.) for readability
-8. Only use tables and columns explicitly listed in the schema below
-9. **IMPORTANT: If a query returns no results or empty, try a different approach - don't repeat the same query**
-
-**AVAILABLE TOOLS:**
-{tools}
-
-Tool Names: {tool_names}
-
-{schema}
-
-**COMMON PATTERNS:**
-- To find data for a specific YEAR (e.g., 2017): Use `WHERE season_id = 2017` 
-  (season_id corresponds to the year)
-- To get a person's NAME from their ID: JOIN with FantasyOwners_LLM on owner_id
-- To get a team NAME from team ID: JOIN with FantasyTeams_LLM on team_id
-- ALWAYS check the Observation result before proceeding to the next step
-
-**PROBLEM-SOLVING APPROACH:**
-1. Understand what information is being requested
-2. Identify which table(s) contain that information
-3. Write a simple query to get the data
-4. If joining tables, ensure the JOIN condition is correct
-5. Execute the query and observe the result
-6. If the result is empty or wrong, try a different query (don't repeat the same one)
-7. Convert the result to a natural language answer
-
-**REQUIRED FORMAT:**
-Question: [the input question]
-Thought: [analyze the question and plan your query]
-Action: the action to take, should be one of [{tool_names}]
-Action Input: [your SQLite query]
-Observation: [database will return results here]
-Thought: [analyze the results and decide next step]
-... (repeat Thought/Action/Observation as needed)
-Thought: [confirm you have enough information]
-Final Answer: [clear, natural language answer to the question]
-
-**ERROR HANDLING:**
-- If you get "no such column", check the schema and use the correct column name
-- If you get "no such table", verify the table name from the schema
-- If you get "ambiguous column", use table aliases to clarify
-- If a query returns empty results, think about WHY and try a different approach
-- **NEVER run the exact same query more than twice - if it fails twice, try something different**
-
-**REMEMBER:**
-- Never assume data or columns that aren't in the schema
-- Never skip the Observation step
-- Always provide a clear final answer in natural language
-- If stuck in a loop, STOP and try a completely different query approach
-
-Conversation History:
-{history}
-
-Question: {input}
-Thought:{agent_scratchpad}"""
-
-    prompt = PromptTemplate.from_template(prompt_template).partial(schema=forced_schema)
-
-    agent = create_react_agent(llm=llm, tools=tools, prompt=prompt)
-
-    return AgentExecutor(
-        agent=agent,
-        tools=tools,
-        verbose=True,
-        handle_parsing_errors=True,
-        max_iterations=8,
-        max_execution_time=30,
-    )
+def render_context(event: Dict[str, Any]) -> Any:
+    """Shows the selected tables, reasoning, schema and names; returns the expander."""
+    context_expander = st.expander("🕵️ Agent's Internal Context")
+    with context_expander:
+        st.markdown("**Tables Selected:**")
+        st.write(event["tables"])
+        st.markdown("**Selection Reasoning:**")
+        st.info(event["reasoning"])  # shows WHY tables were selected
+        st.markdown("---")
+        st.markdown("**Schema Provided to Agent:**")
+        st.code(event["schema"], language="text")
+        if event.get("entities"):
+            st.markdown("**Names Resolved Before the Agent Ran:**")
+            st.code(event["entities"], language="text")
+    return context_expander
 
 
 # --- Main Streamlit App ---
@@ -395,19 +163,58 @@ st.write("Ask me anything about your league's history!")
 with st.sidebar:
     st.header("⚙️ Controls")
 
-    # Show conversation stats
+    # Show how much of the history budget the next question will carry
     if "memory" in st.session_state:
-        num_messages = len(st.session_state.memory.chat_memory.messages)
-        st.metric("Messages in Context", num_messages)
+        memory = st.session_state.memory
+        used_tokens = memory.token_count()
+        st.progress(
+            used_tokens / memory.token_budget,
+            text=f"Context: {used_tokens:,} / {memory.token_budget:,} tokens",
+        )
+        if memory.summary:
+            st.caption("🧾 Older turns are summarized")
+
+    # Show answer cache stats (shared across all sessions)
+    stats = fetch_stats()
+    if stats is None:
+        st.caption("⏳ The Oracle is warming up...")
+    else:
+        cache_stats = stats["answer_cache"]
+        col1, col2 = st.columns(2)
+        col1.metric("Cache Hits", cache_stats["hits"])
+        col2.metric("Cache Misses", cache_stats["misses"])
+        st.caption(
+            f"Hit rate: {cache_stats['hit_rate']:.0%} · "
+            f"{cache_stats['entries']} cached answers"
+        )
+
+        # Per-stage latency over recent requests (all sessions)
+        with st.expander("📈 Performance"):
+            st.dataframe(stats["stages"], hide_index=True)
+            averages = stats["counters"]
+            if averages:
+                st.caption(
+                    " · ".join(
+                        f"{name.replace('_', ' ')}: {value:.1f}/req"
+                        for name, value in sorted(averages.items())
+                    )
+                )
+            startup = stats.get("startup")
+            if startup:
+                st.markdown("**Startup (ms):**")
+                st.json(startup, expanded=False)
+            caches = stats.get("caches")
+            if caches:
+                st.markdown("**Shared caches:**")
+                st.json(caches, expanded=False)
+
+    # Stream agent steps and the final answer as they are generated
+    st.toggle("⚡ Stream Responses", value=True, key="stream_responses")
 
     # Clear conversation button
     if st.button("🔄 Clear Conversation", use_container_width=True, type="primary"):
-        st.session_state.memory = ConversationBufferMemory(
-            memory_key="history",
-            input_key="input",
-            return_messages=True,
-            max_token_limit=2000,
-        )
+        st.session_state.memory = new_conversation()
+        st.session_state.messages = []
         st.rerun()
 
     st.markdown("---")
@@ -415,23 +222,16 @@ with st.sidebar:
         "💡 **Tip:** Clear the conversation if the Oracle seems confused or has too much context."
     )
 
-# Load static resources
-table_descriptions = load_table_descriptions("table_dictionary.csv")
-
-# Initialize conversation memory
+# Initialize conversation memory (what the Oracle sees) and the transcript
+# (what the user sees; it keeps turns the memory has summarized away)
 if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(
-        memory_key="history",
-        input_key="input",
-        return_messages=True,
-        max_token_limit=2000,
-    )
+    st.session_state.memory = new_conversation()
+    st.session_state.messages = []
 
 # Display chat history
-for message in st.session_state.memory.chat_memory.messages:
-    role = "user" if message.type == "human" else "assistant"
+for role, content in st.session_state.messages:
     with st.chat_message(role):
-        st.markdown(message.content)
+        st.markdown(content)
 
 # Main interaction loop
 if prompt := st.chat_input("Ask a question about your league..."):
@@ -440,100 +240,71 @@ if prompt := st.chat_input("Ask a question about your league..."):
 
     with st.chat_message("assistant"):
         with st.spinner("The Oracle is thinking..."):
-            assistant_response_content = ""
-
-            # 1. Check for simple queries
-            simple_response = route_query(prompt)
-
-            if simple_response:
-                assistant_response_content = simple_response
-                st.markdown(assistant_response_content)
+            streaming = st.session_state.get("stream_responses", True)
+            history_str = st.session_state.memory.history_text()
+            answer_placeholder = st.empty()
+            steps_container = None
+            result: Dict[str, Any] = {
+                "answer": NO_ANSWER_MESSAGE,
+                "source": "error",
+                "error": "The Oracle stopped before answering. Please try again.",
+            }
+
+            try:
+                events = stream_events(prompt, history_str, st.session_state.memory)
+                for event in events:
+                    if event["type"] == "context":
+                        context_expander = render_context(event)
+                        if streaming:
+                            with context_expander:
+                                st.markdown("---")
+                                st.markdown("**Agent Steps:**")
+                                steps_container = st.container()
+                    elif event["type"] == "action" and steps_container is not None:
+                        steps_container.code(event["log"], language="text")
+                    elif (
+                        event["type"] == "observation" and steps_container is not None
+                    ):
+                        steps_container.markdown("**Observation:**")
+                        steps_container.code(event["text"], language="text")
+                    elif event["type"] == "partial_answer" and streaming:
+                        answer_placeholder.markdown(event["text"] + "▌")
+                    elif event["type"] == "answer":
+                        result = event
+            except Exception as e:
+                logger.error(f"Answer stream failed: {e}", exc_info=True)
+
+            assistant_response_content = result["answer"]
+            if result["source"] == "clarify":
+                answer_placeholder.warning(assistant_response_content)
+            elif result["source"] == "error":
+                answer_placeholder.empty()
+                st.error(result["error"])
             else:
-                # 2. Complex query - use agentic workflow with Pydantic
-                history_str = st.session_state.memory.load_memory_variables({})[
-                    "history"
-                ]
-
-                # Get relevant tables with structured output (NO PARSING NEEDED!)
-                relevant_tables, reasoning = get_relevant_tables_with_pydantic(
-                    prompt, history_str, table_descriptions
+                answer_placeholder.markdown(assistant_response_content)
+
+            if result["source"] == "template":
+                st.caption("⚡ Answered directly from the database (no LLM calls)")
+            elif result["source"] == "partial":
+                st.caption(f"⚠️ {result['error']}")
+            elif result["source"] == "cache":
+                st.caption(
+                    f"⚡ Served from answer cache (asked {result['times_asked']} times)"
                 )
-
-                # Validation: Retry once if no tables selected
-                if not relevant_tables:
-                    logger.warning("No tables selected, retrying...")
-                    retry_query = f"Which database tables are needed for: '{prompt}'?"
-                    relevant_tables, reasoning = get_relevant_tables_with_pydantic(
-                        retry_query, "", table_descriptions
-                    )
-
-                if not relevant_tables:
-                    assistant_response_content = (
-                        "I'm having trouble understanding which data you need. "
-                        "Could you rephrase your question? For example:\n"
-                        "- 'Who won the championship in 2020?'\n"
-                        "- 'What was my record against Jake?'\n"
-                        "- 'Show me the top scorers from last season'"
-                    )
-                    st.warning(assistant_response_content)
-                else:
-                    # Generate schema for selected tables
-                    forced_schema = get_detailed_schema_info(
-                        table_names=relevant_tables, filepath="data_dictionary.csv"
-                    )
-
-                    # Show debugging info (INCLUDING REASONING!)
-                    with st.expander("🕵️ Agent's Internal Context"):
-                        st.markdown("**Tables Selected:**")
-                        st.write(relevant_tables)
-                        st.markdown("**Selection Reasoning:**")
-                        st.info(
-                            reasoning
-                        )  # THIS IS NEW - shows WHY tables were selected
-                        st.markdown("---")
-                        st.markdown("**Schema Provided to Agent:**")
-                        st.code(forced_schema, language="text")
-
-                    # Create and execute agent
-                    agent_executor = create_specialized_agent(forced_schema)
-                    logger.info(f"Invoking agent with tables: {relevant_tables}")
-
-                    try:
-                        logging_callback = LoggingCallbackHandler()
-                        response = agent_executor.invoke(
-                            {"input": prompt, "history": history_str},
-                            config={"callbacks": [logging_callback]},
-                        )
-                        assistant_response_content = response["output"]
-                        st.markdown(assistant_response_content)
-
-                    except Exception as e:
-                        error_str = str(e).lower()
-
-                        if "no such column" in error_str:
-                            error_message = (
-                                "⚠️ I tried to query a column that doesn't exist."
-                            )
-                        elif "no such table" in error_str:
-                            error_message = (
-                                "⚠️ I tried to access a table that doesn't exist."
-                            )
-                        elif (
-                            "timeout" in error_str or "max_execution_time" in error_str
-                        ):
-                            error_message = (
-                                "⏱️ The query took too long. Try a simpler question."
-                            )
-                        else:
-                            error_message = f"❌ Error: {e}"
-
-                        st.error(error_message)
-                        logger.error(f"Agent execution failed: {e}", exc_info=True)
-                        assistant_response_content = (
-                            "Sorry, I couldn't answer that question."
-                        )
+                with st.expander("🕵️ Agent's Internal Context"):
+                    st.markdown("**Tables Selected (cached):**")
+                    st.write(result["tables"])
+                    st.markdown("**Selection Reasoning (cached):**")
+                    st.info(result["reasoning"])
 
     # Save to memory
-    st.session_state.memory.save_context(
-        {"input": prompt}, {"output": assistant_response_content}
-    )
+    st.session_state.memory.save_turn(prompt, assistant_response_content)
+    st.session_state.messages.append(("user", prompt))
+    st.session_state.messages.append(("assistant", assistant_response_content))
+    # Long sessions would otherwise hold every message for as long as they live
+    del st.session_state.messages[:-MAX_TRANSCRIPT_MESSAGES]
+
+# The page is visible: record it, then load the engine while the user types
+STARTUP.mark("first_render")
+if not API_URL:
+    get_lazy_engine().warm_up_in_background()
@@ -0,0 +1,307 @@
+"""
+Batch answering and the precomputed league almanac.
+
+Usage:
+    python batch.py ask questions.txt                     # writes answers.jsonl
+    python batch.py ask questions.txt --concurrency 8 --output out.jsonl
+    python batch.py almanac                               # every season
+    python batch.py almanac --seasons 2023 2024 --output almanac.jsonl
+
+`ask` runs a file of questions (one per line, or JSON lines with a "question"
+field) through the full pipeline and writes each answer, its source, and the
+SQL behind it as a JSON line. `almanac` does the same for a standard list of
+questions about every season and seeds the shared answer cache with the
+results, so the questions users ask most are served without an LLM call.
+Run it after each data refresh, e.g. from cron after `materialize.py refresh`:
+the refresh changes the database file, which clears the answer cache.
+
+Questions run with bounded concurrency. When the LLM provider rate-limits a
+call, every worker pauses with exponential backoff before the question is
+retried.
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from engine import OracleEngine
+from config import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_OUTPUT = "answers.jsonl"
+# Attempts per question while the provider keeps rate-limiting it
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+# Almanac answers live until the next weekly refresh, plus a day of slack
+ALMANAC_TTL_SECONDS = 8 * 24 * 60 * 60
+
+# Phrased the way users ask, since the answer cache matches normalized text
+ALMANAC_ALL_TIME_QUESTIONS = [
+    "Which owner has won the most championships?",
+    "Who has the best career win percentage?",
+    "Who has scored the most all-time points?",
+    "What is the highest single-week score ever?",
+    "Which owner has made the playoffs the most times?",
+    "What was the biggest blowout ever?",
+]
+ALMANAC_SEASON_QUESTIONS = [
+    "Who won the championship in {season}?",
+    "Show the {season} regular season standings",
+    "Who finished last in {season}?",
+    "Who scored the most points in {season}?",
+    "What was the highest single-week score in {season}?",
+    "What was the biggest blowout in {season}?",
+    "Who was the number one draft pick in {season}?",
+    "Top 5 quarterbacks in {season}",
+    "Top 5 running backs in {season}",
+    "Top 5 wide receivers in {season}",
+]
+
+
+class RateLimitBackoff:
+    """
+    One pause shared by every worker: a rate-limited call holds back the whole
+    batch, for exponentially longer while the limits keep coming.
+    """
+
+    def __init__(
+        self,
+        base_seconds: float = BACKOFF_BASE_SECONDS,
+        max_seconds: float = BACKOFF_MAX_SECONDS,
+    ):
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self._resume_at = 0.0
+        self._strikes = 0
+
+    async def wait(self) -> None:
+        """Sleep until the current pause, if any, is over."""
+        while (delay := self._resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def limited(self) -> float:
+        """Record a rate-limited call; returns the pause it started."""
+        self._strikes += 1
+        delay = min(self.max_seconds, self.base_seconds * 2 ** (self._strikes - 1))
+        # Jitter, so workers don't all retry on the same tick
+        delay *= random.uniform(1.0, 1.25)
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def succeeded(self) -> None:
+        self._strikes = 0
+
+
+def read_questions(path: str) -> List[str]:
+    """Questions from a text file (one per line, # comments) or JSON lines."""
+    questions = []
+    with open(path, mode="r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            questions.append(json.loads(line)["question"] if line[0] == "{" else line)
+    return questions
+
+
+async def answer_one(
+    engine: OracleEngine,
+    index: int,
+    question: str,
+    slots: asyncio.Semaphore,
+    backoff: RateLimitBackoff,
+) -> Dict[str, Any]:
+    """Answer one question, retrying while the provider rate-limits it."""
+    start = time.perf_counter()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        async with slots:
+            await backoff.wait()
+            result = await engine.aanswer(question)
+        if not result.rate_limited:
+            backoff.succeeded()
+            break
+        if attempt == MAX_ATTEMPTS:
+            logger.warning(
+                f"Giving up on {question!r} after {MAX_ATTEMPTS} rate-limited attempts"
+            )
+            break
+        delay = backoff.limited()
+        logger.warning(
+            f"Rate limited on {question!r} (attempt {attempt}/{MAX_ATTEMPTS}), "
+            f"pausing {delay:.1f}s"
+        )
+
+    return {
+        "index": index,
+        "question": question,
+        "answer": result.answer,
+        "source": result.source,
+        "sql": result.sql,
+        "tables": result.tables,
+        "reasoning": result.reasoning,
+        "error": result.error,
+        "rate_limited": result.rate_limited,
+        "attempts": attempt,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        "request_id": result.request_id,
+    }
+
+
+async def run_batch(
+    engine: OracleEngine,
+    questions: List[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    output_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Answer every question, at most `concurrency` at a time. Records are written
+    to `output_path` as they finish, so an interrupted run keeps its progress;
+    the returned list is in input order.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    backoff = RateLimitBackoff()
+    tasks = [
+        asyncio.create_task(answer_one(engine, index, question, slots, backoff))
+        for index, question in enumerate(questions)
+    ]
+    records = []
+    output = open(output_path, mode="w", encoding="utf-8") if output_path else None
+    try:
+        for finished in asyncio.as_completed(tasks):
+            record = await finished
+            records.append(record)
+            if output:
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+            logger.info(
+                f"[{len(records)}/{len(questions)}] {record['source']}: "
+                f"{record['question']}"
+            )
+    finally:
+        if output:
+            output.close()
+    return sorted(records, key=lambda record: record["index"])
+
+
+def league_seasons(engine: OracleEngine) -> List[int]:
+    rows = engine.db.query(
+        "SELECT season_id FROM FantasySeasons_LLM ORDER BY season_id", {}
+    )
+    return [int(row["season_id"]) for row in rows]
+
+
+def almanac_questions(seasons: Iterable[int]) -> List[str]:
+    """The all-time questions, then every per-season question for each season."""
+    questions = list(ALMANAC_ALL_TIME_QUESTIONS)
+    for season in seasons:
+        questions.extend(q.format(season=season) for q in ALMANAC_SEASON_QUESTIONS)
+    return questions
+
+
+def seed_answer_cache(engine: OracleEngine, records: List[Dict[str, Any]]) -> int:
+    """
+    Store the almanac's agent answers until the next refresh. Template answers
+    are already instant, so they are left out.
+    """
+    seeded = 0
+    for record in records:
+        if record["source"] not in ("agent", "cache"):
+            continue
+        # The pipeline doesn't cache iteration/time-limit stops either
+        if record["answer"].startswith("Agent stopped"):
+            continue
+        engine.answer_cache.put(
+            record["question"],
+            record["answer"],
+            record["tables"],
+            record["reasoning"],
+            ttl_seconds=ALMANAC_TTL_SECONDS,
+        )
+        seeded += 1
+    return seeded
+
+
+def print_summary(records: List[Dict[str, Any]], wall_seconds: float) -> None:
+    sources = Counter(record["source"] for record in records)
+    retried = sum(1 for record in records if record["attempts"] > 1)
+    print(
+        f"\n{len(records)} questions in {wall_seconds:.1f}s: "
+        + ", ".join(f"{count} {source}" for source, count in sources.most_common())
+        + (f" ({retried} retried after rate limits)" if retried else "")
+    )
+    for record in records:
+        if record["error"]:
+            print(f"  ✗ {record['question']}: {record['error']}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """The CLI; shared options are accepted after either subcommand."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    common.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Questions answered at once",
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    ask = commands.add_parser(
+        "ask", parents=[common], help="Answer a file of questions"
+    )
+    ask.add_argument("questions", help="Text file, one question per line")
+    ask.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON lines output")
+    almanac = commands.add_parser(
+        "almanac",
+        parents=[common],
+        help="Precompute standard questions and seed the answer cache",
+    )
+    almanac.add_argument(
+        "--seasons", type=int, nargs="+", help="Defaults to every season"
+    )
+    almanac.add_argument("--output", help="Also write the answers as JSON lines")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    engine = OracleEngine(db_path=args.db, verbose=False)
+    try:
+        if args.command == "ask":
+            questions = read_questions(args.questions)
+        else:
+            questions = almanac_questions(args.seasons or league_seasons(engine))
+            if len(questions) > engine.answer_cache.max_entries:
+                logger.warning(
+                    f"{len(questions)} almanac questions exceed the answer cache's "
+                    f"{engine.answer_cache.max_entries} entries; older ones will "
+                    "be evicted"
+                )
+
+        start = time.perf_counter()
+        records = asyncio.run(
+            run_batch(engine, questions, args.concurrency, args.output)
+        )
+        print_summary(records, time.perf_counter() - start)
+        if args.command == "almanac":
+            print(f"Seeded {seed_answer_cache(engine, records)} answers into the cache")
+    finally:
+        engine.sqlite_executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+A deterministic chat model that replays recorded responses.
+
+Recordings are keyed on the normalized question. The model recognizes the two
+prompts the pipeline sends: the table selector prompt (answered with the
+recorded `TableSelection` as JSON) and the ReAct agent prompt, where the number
+of Observations already in the scratchpad picks the recorded turn to return.
+"""
+
+import re
+import json
+import time
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from answer_cache import normalize_question
+
+TABLE_SELECTION_QUESTION = re.compile(r"^User Question: (.*)$", re.MULTILINE)
+AGENT_QUESTION = re.compile(r"^Question: (.*)\nThought:", re.MULTILINE)
+OBSERVATION_MARKER = "\nObservation:"
+UNRECORDED_ANSWER = " No recorded response.\nFinal Answer: I don't know."
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for usage metadata."""
+    return len(text) // 4 + 1
+
+
+class ReplayChatModel(BaseChatModel):
+    """Replays `recordings` (normalized question -> recorded responses)."""
+
+    recordings: Dict[str, Dict[str, Any]]
+    latency_ms: float = 0.0
+
+    @classmethod
+    def from_corpus(cls, path: str, latency_ms: float = 0.0) -> "ReplayChatModel":
+        with open(path, mode="r", encoding="utf-8") as f:
+            corpus = json.load(f)
+        recordings = {
+            normalize_question(entry["question"]): entry
+            for entry in corpus["questions"]
+        }
+        return cls(recordings=recordings, latency_ms=latency_ms)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = self._respond(prompt)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _respond(self, prompt: str) -> str:
+        selection = TABLE_SELECTION_QUESTION.findall(prompt)
+        if selection:
+            recording = self.recordings.get(normalize_question(selection[-1]), {})
+            return json.dumps(
+                recording.get(
+                    "table_selection",
+                    {"tables": [], "reasoning": "No recorded table selection."},
+                )
+            )
+
+        questions = list(AGENT_QUESTION.finditer(prompt))
+        if not questions:
+            return UNRECORDED_ANSWER
+        recording = self.recordings.get(normalize_question(questions[-1].group(1)))
+        if not recording:
+            return UNRECORDED_ANSWER
+
+        scratchpad = prompt[questions[-1].end() :]
+        turns = recording["agent"]
+        return turns[min(scratchpad.count(OBSERVATION_MARKER), len(turns) - 1)]
+
+    def with_structured_output(
+        self, schema: Type[BaseModel], **kwargs: Any
+    ) -> Runnable:
+        return self | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
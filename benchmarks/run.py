@@ -0,0 +1,301 @@
+"""
+Offline benchmark of the Oracle pipeline.
+
+Runs the canonical question corpus through simple-query routing, question
+templates, table selection, schema assembly and the SQL agent against a
+synthetic league database, with a replaying stand-in LLM, so no GOOGLE_API_KEY
+or network is needed. Reports throughput, per-stage latency percentiles, LLM tokens, and SQL
+cost per stage.
+
+Usage:
+    python -m benchmarks.run                          # 3 passes, 1 worker
+    python -m benchmarks.run --concurrency 4 --llm-latency-ms 300
+    python -m benchmarks.run --no-templates           # agent path for every question
+    python -m benchmarks.run --output bench/latest.json
+    python -m benchmarks.run --baseline bench/baseline.json   # exit 1 on regression
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from agent_guard import AgentLoopDetected, guard_queries
+from engine import OracleEngine
+from telemetry import percentile, trace_request
+from benchmarks.replay_llm import ReplayChatModel
+from benchmarks.synthetic_db import generate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.json")
+DEFAULT_WORKDIR = "bench"
+# Ignore p95 changes smaller than this when comparing against a baseline
+MIN_REGRESSION_MS = 1.0
+
+
+def answer_question(
+    engine: OracleEngine, question: str, selector: str, templates: bool = True
+) -> Dict[str, Any]:
+    """Run one question through the pipeline stages the app uses."""
+    with trace_request(question, engine.telemetry_store) as trace:
+        with trace.span("route_query"):
+            simple_response = engine.route_query(question)
+        if simple_response:
+            return {**trace.to_dict(), "output": simple_response}
+
+        if templates:
+            with trace.span("template") as span:
+                templated = engine.templates.answer(question)
+                span["hit"] = templated is not None
+            if templated:
+                return {**trace.to_dict(), "output": templated.answer}
+
+        with trace.span("table_selection") as span:
+            if selector == "llm":
+                tables, _ = engine.get_relevant_tables_with_pydantic(
+                    question, "", engine.selector_descriptions(question)
+                )
+            else:
+                tables, _ = engine.select_tables(question, "")
+            span["tables"] = len(tables)
+        if not tables:
+            with trace.span("table_selection_retry"):
+                tables, _ = engine.retry_table_selection(question)
+        if not tables:
+            return {**trace.to_dict(), "error": "no tables selected"}
+
+        with trace.span("schema"):
+            schema = engine.get_detailed_schema_info(tables, question)
+        with trace.span("entities"):
+            entities = engine.resolve_entities(question)
+        with trace.span("agent_setup"):
+            agent_executor = engine.get_agent_executor()
+        try:
+            with trace.span("agent"), guard_queries(engine.schema_index):
+                response = agent_executor.invoke(
+                    {
+                        "input": question,
+                        "history": "",
+                        "schema": schema,
+                        "entities": entities,
+                    },
+                    config={"callbacks": engine.agent_callbacks()},
+                )
+        except AgentLoopDetected as e:
+            output = e.best_observation or ""
+            return {**trace.to_dict(), "output": output, "stopped": e.reason}
+        except Exception as e:
+            logger.error(f"Agent failed for {question!r}: {e}")
+            return {**trace.to_dict(), "error": str(e)}
+
+    return {**trace.to_dict(), "output": response["output"]}
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Throughput, per-stage latency/tokens, and SQL cost grouped by stage."""
+    totals = [r["duration_ms"] for r in results]
+    stages: Dict[str, Dict[str, Any]] = {}
+    sql: Dict[str, Dict[str, Any]] = {}
+
+    for result in results:
+        for span in result["spans"]:
+            if span["name"] == "sql":
+                stage = sql.setdefault(
+                    span.get("stage", "unattributed"),
+                    {"queries": 0, "cache_hits": 0, "errors": 0, "rows": 0, "ms": []},
+                )
+                stage["queries"] += 1
+                stage["cache_hits"] += int(span.get("cache_hit", False))
+                stage["errors"] += int("error" in span)
+                stage["rows"] += span.get("rows", 0)
+                stage["ms"].append(span["duration_ms"])
+                continue
+            stage = stages.setdefault(span["name"], {"ms": [], "tokens": 0})
+            stage["ms"].append(span["duration_ms"])
+            stage["tokens"] += span.get("input_tokens", 0) + span.get(
+                "output_tokens", 0
+            )
+
+    def latency(values: List[float]) -> Dict[str, float]:
+        return {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+        }
+
+    return {
+        "questions": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_qps": round(len(results) / wall_seconds, 3) if wall_seconds else 0,
+        "total": latency(totals),
+        "stages": {
+            name: {**latency(stage["ms"]), "tokens": stage["tokens"]}
+            for name, stage in stages.items()
+        },
+        "sql": {
+            name: {
+                "queries": stage["queries"],
+                "cache_hits": stage["cache_hits"],
+                "errors": stage["errors"],
+                "rows": stage["rows"],
+                "total_ms": round(sum(stage["ms"]), 3),
+                "p95_ms": round(percentile(stage["ms"], 95), 3),
+            }
+            for name, stage in sql.items()
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"\n{report['questions']} questions in {report['wall_seconds']:.2f}s "
+        f"({report['throughput_qps']:.2f} q/s, {report['errors']} errors)\n"
+    )
+    print(
+        f"{'stage':<24}{'count':>7}{'mean ms':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'tokens':>9}"
+    )
+    rows = {**report["stages"], "total": {**report["total"], "tokens": 0}}
+    for name, s in rows.items():
+        print(
+            f"{name:<24}{s['count']:>7}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}"
+            f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['tokens']:>9}"
+        )
+
+    print(
+        f"\n{'SQL by stage':<24}{'queries':>8}{'hits':>6}{'errors':>8}"
+        f"{'rows':>8}{'total ms':>10}{'p95 ms':>10}"
+    )
+    for name, s in report["sql"].items():
+        print(
+            f"{name:<24}{s['queries']:>8}{s['cache_hits']:>6}{s['errors']:>8}"
+            f"{s['rows']:>8}{s['total_ms']:>10.2f}{s['p95_ms']:>10.2f}"
+        )
+
+
+def find_regressions(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Stages whose p95 grew by more than `tolerance` relative to the baseline."""
+    current = {**report["stages"], "total": report["total"]}
+    previous = {**baseline["stages"], "total": baseline["total"]}
+    regressions = []
+    for name, before in previous.items():
+        after = current.get(name)
+        if after is None:
+            continue
+        limit = before["p95_ms"] * (1 + tolerance)
+        if after["p95_ms"] > limit and after["p95_ms"] - before["p95_ms"] > (
+            MIN_REGRESSION_MS
+        ):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.2f}ms -> {after['p95_ms']:.2f}ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument(
+        "--workdir", default=DEFAULT_WORKDIR, help="Synthetic DB and cache files"
+    )
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument(
+        "--regenerate", action="store_true", help="Rebuild the synthetic database"
+    )
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency per LLM call",
+    )
+    parser.add_argument(
+        "--selector",
+        choices=["auto", "llm"],
+        default="auto",
+        help="auto: local router with LLM fallback (as in the app); llm: always LLM",
+    )
+    parser.add_argument(
+        "--no-templates",
+        action="store_true",
+        help="Send template-shaped questions to the agent too",
+    )
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Compare p95s against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format="%(message)s")
+
+    db_path = os.path.join(args.workdir, "llm_fantasy_data.db")
+    if args.regenerate or not os.path.exists(db_path):
+        print(f"Generating synthetic database at {db_path} (scale {args.scale})")
+        generate(db_path, scale=args.scale)
+
+    # Start every run with cold caches
+    for name in ("answer_cache.db", "sql_cache.db", "telemetry.jsonl"):
+        path = os.path.join(args.workdir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    engine = OracleEngine(
+        llm=ReplayChatModel.from_corpus(args.corpus, args.llm_latency_ms),
+        db_path=db_path,
+        answer_cache_path=os.path.join(args.workdir, "answer_cache.db"),
+        sql_cache_path=os.path.join(args.workdir, "sql_cache.db"),
+        telemetry_path=os.path.join(args.workdir, "telemetry.jsonl"),
+        verbose=False,
+    )
+    with open(args.corpus, mode="r", encoding="utf-8") as f:
+        questions = [entry["question"] for entry in json.load(f)["questions"]]
+    questions = questions * args.iterations
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda q: answer_question(
+                    engine, q, args.selector, templates=not args.no_templates
+                ),
+                questions,
+            )
+        )
+    report = summarize(results, time.perf_counter() - start)
+    report["config"] = {
+        "scale": args.scale,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms,
+        "selector": args.selector,
+        "templates": not args.no_templates,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, mode="r", encoding="utf-8") as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+"""
+Generate a synthetic `llm_fantasy_data.db` for offline benchmarks.
+
+Every table and column documented in data_dictionary.csv is created and filled
+with deterministic, referentially consistent data: owners field one team per
+season, matchups pair those teams, draft picks and stat lines point at real
+players and NFL teams. Values are random but plausible, so the queries the
+agent writes return realistically sized results. The denormalized `*_LLM`
+views are real views over those tables, as in production, so benchmarks pay
+their cost and `materialize.py` can build against the generated file.
+
+Usage:
+    python -m benchmarks.synthetic_db --out bench/llm_fantasy_data.db --scale 2
+"""
+
+import os
+import csv
+import random
+import sqlite3
+import logging
+import argparse
+from typing import Any, Dict, Iterator, List
+
+from config import DATA_DICTIONARY_PATH
+
+logger = logging.getLogger(__name__)
+
+FIRST_SEASON = 2012
+SEASON_COUNT = 13
+OWNER_NAMES = [
+    "Jake",
+    "Mike",
+    "Chris",
+    "Dan",
+    "Ryan",
+    "Matt",
+    "Kevin",
+    "Steve",
+    "Tony",
+    "Brian",
+    "Sam",
+    "Nick",
+]
+TEAM_MASCOTS = ["Gladiators", "Sharks", "Bandits", "Wolves", "Titans", "Outlaws"]
+PLAYER_FIRST = ["Tom", "Aaron", "Josh", "Derrick", "Davante", "Travis", "Justin"]
+PLAYER_LAST = ["Brady", "Rodgers", "Allen", "Henry", "Adams", "Kelce", "Tucker"]
+NFL_TEAMS = {
+    "ARI": "Arizona Cardinals",
+    "ATL": "Atlanta Falcons",
+    "BAL": "Baltimore Ravens",
+    "BUF": "Buffalo Bills",
+    "CAR": "Carolina Panthers",
+    "CHI": "Chicago Bears",
+    "CIN": "Cincinnati Bengals",
+    "CLE": "Cleveland Browns",
+    "DAL": "Dallas Cowboys",
+    "DEN": "Denver Broncos",
+    "DET": "Detroit Lions",
+    "GB": "Green Bay Packers",
+    "HOU": "Houston Texans",
+    "IND": "Indianapolis Colts",
+    "JAX": "Jacksonville Jaguars",
+    "KC": "Kansas City Chiefs",
+    "LAC": "Los Angeles Chargers",
+    "LAR": "Los Angeles Rams",
+    "LV": "Las Vegas Raiders",
+    "MIA": "Miami Dolphins",
+    "MIN": "Minnesota Vikings",
+    "NE": "New England Patriots",
+    "NO": "New Orleans Saints",
+    "NYG": "New York Giants",
+    "NYJ": "New York Jets",
+    "PHI": "Philadelphia Eagles",
+    "PIT": "Pittsburgh Steelers",
+    "SEA": "Seattle Seahawks",
+    "SF": "San Francisco 49ers",
+    "TB": "Tampa Bay Buccaneers",
+    "TEN": "Tennessee Titans",
+    "WAS": "Washington Commanders",
+}
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DST"]
+DRAFT_ROUNDS = 15
+REGULAR_SEASON_WEEKS = 14
+PLAYOFF_WEEKS = 3
+# Players with a stat line per position and season, before scaling
+STAT_LINES_PER_SEASON = 40
+# Season stat lines of every position, for views that need a player's season
+SEASON_POINTS = " UNION ALL ".join(
+    "SELECT season_id, player_id, nfl_team_id, season_rank, "
+    f'fantasy_points_per_game, total_fantasy_points FROM "PlayerStats_Season_{p}_LLM"'
+    for p in POSITIONS
+)
+# Denormalized views, defined over the base tables as in the production database,
+# in creation order (a view may read the ones before it)
+VIEW_DEFINITIONS = {
+    "DraftAnalysis_Full_LLM": f"""
+        WITH season_points AS ({SEASON_POINTS})
+        SELECT d.season_id, d.overall_pick_number AS pick_overall, d.draft_id,
+               d.round, d.pick_in_round, d.player_id, p.player_name,
+               d.player_position, s.nfl_team_id, n.nfl_team_name,
+               d.fantasy_team_id, t.fantasy_team_name, d.owner_id, o.owner_name,
+               d.rank_at_position_in_draft AS league_positional_draft_rank,
+               d.overall_pick_number AS overall_adp_rank,
+               d.rank_at_position_in_draft AS positional_adp_rank,
+               0 AS draft_value_vs_adp,
+               s.total_fantasy_points AS actual_total_fantasy_points_season,
+               s.fantasy_points_per_game,
+               s.season_rank AS actual_positional_finish_rank,
+               ROUND(200.0 - d.overall_pick_number, 2) AS expected_points,
+               ROUND(s.total_fantasy_points - (200.0 - d.overall_pick_number), 2)
+                   AS points_scored_over_expected,
+               d.rank_at_position_in_draft - s.season_rank
+                   AS player_finish_position_vs_drafted_position
+        FROM FantasyDraftPicks_LLM d
+        JOIN Players_LLM p ON p.player_id = d.player_id
+        JOIN FantasyTeams_LLM t ON t.fantasy_team_id = d.fantasy_team_id
+        JOIN FantasyOwners_LLM o ON o.owner_id = d.owner_id
+        LEFT JOIN season_points s
+            ON s.season_id = d.season_id AND s.player_id = d.player_id
+        LEFT JOIN NFLTeams_LLM n ON n.nfl_team_id = s.nfl_team_id
+    """,
+    "HeadToHeadMatchups_LLM": """
+        SELECT m.matchup_id, m.season_id, s.league_name, s.scoring_format,
+               m.nfl_week, m.fantasy_week, m.matchup_category,
+               CASE WHEN m.matchup_category != 'Regular Season'
+                    THEN m.matchup_category END AS playoff_matchup_category,
+               m.home_owner_id AS owner1_id, o1.owner_name AS owner1_name,
+               m.home_fantasy_team_id AS owner1_team_id,
+               t1.fantasy_team_name AS owner1_team_name,
+               m.home_score AS owner1_score,
+               m.away_owner_id AS owner2_id, o2.owner_name AS owner2_name,
+               m.away_fantasy_team_id AS owner2_team_id,
+               t2.fantasy_team_name AS owner2_team_name,
+               m.away_score AS owner2_score,
+               m.winning_owner_id, m.losing_owner_id, m.tie,
+               ROUND(ABS(m.home_score - m.away_score), 2) AS margin_of_victory
+        FROM FantasyMatchups_LLM m
+        JOIN FantasySeasons_LLM s ON s.season_id = m.season_id
+        JOIN FantasyOwners_LLM o1 ON o1.owner_id = m.home_owner_id
+        JOIN FantasyOwners_LLM o2 ON o2.owner_id = m.away_owner_id
+        JOIN FantasyTeams_LLM t1 ON t1.fantasy_team_id = m.home_fantasy_team_id
+        JOIN FantasyTeams_LLM t2 ON t2.fantasy_team_id = m.away_fantasy_team_id
+    """,
+    "RegularSeasonStandings_LLM": """
+        WITH sides AS (
+            SELECT home_fantasy_team_id AS team_id, home_owner_id AS owner_id,
+                   home_score AS points_for, away_score AS points_against,
+                   winning_owner_id, tie
+            FROM FantasyMatchups_LLM WHERE matchup_category = 'Regular Season'
+            UNION ALL
+            SELECT away_fantasy_team_id, away_owner_id, away_score, home_score,
+                   winning_owner_id, tie
+            FROM FantasyMatchups_LLM WHERE matchup_category = 'Regular Season'
+        ),
+        totals AS (
+            SELECT team_id,
+                   SUM(NOT tie AND winning_owner_id = owner_id) AS wins,
+                   SUM(NOT tie AND winning_owner_id != owner_id) AS losses,
+                   SUM(tie) AS ties,
+                   ROUND(SUM(points_for), 2) AS points_for,
+                   ROUND(SUM(points_against), 2) AS points_against
+            FROM sides GROUP BY team_id
+        )
+        SELECT t.season_id, t.fantasy_team_id, t.owner_id, o.owner_name,
+               t.fantasy_team_name,
+               COALESCE(r.wins, 0) AS regular_season_wins,
+               COALESCE(r.losses, 0) AS regular_season_losses,
+               COALESCE(r.ties, 0) AS regular_season_ties,
+               COALESCE(r.points_for, 0) AS regular_season_points_for,
+               COALESCE(r.points_against, 0) AS regular_season_points_against,
+               RANK() OVER (
+                   PARTITION BY t.season_id
+                   ORDER BY r.wins DESC, r.points_for DESC
+               ) AS regular_season_finish_position
+        FROM FantasyTeams_LLM t
+        JOIN FantasyOwners_LLM o ON o.owner_id = t.owner_id
+        LEFT JOIN totals r ON r.team_id = t.fantasy_team_id
+    """,
+    "OwnerCareerLeaderboard_LLM": """
+        SELECT o.owner_id, o.owner_name,
+               SUM(r.regular_season_wins) AS career_wins,
+               SUM(r.regular_season_losses) AS career_losses,
+               SUM(r.regular_season_ties) AS career_ties,
+               (SELECT COUNT(*) FROM FantasySeasons_LLM s
+                WHERE s.champion_owner_id = o.owner_id) AS championships_won,
+               ROUND(SUM(r.regular_season_points_for), 2) AS career_points_for,
+               ROUND(SUM(r.regular_season_points_against), 2)
+                   AS career_points_against,
+               ROUND(
+                   1.0 * SUM(r.regular_season_wins) / NULLIF(
+                       SUM(r.regular_season_wins + r.regular_season_losses
+                           + r.regular_season_ties), 0
+                   ), 4
+               ) AS career_win_percentage,
+               ROUND(AVG(t.final_standing <= s.playoff_team_count), 4)
+                   AS career_playoff_rate,
+               SUM(t.total_player_acquisitions) AS player_acquisitions,
+               ROUND(AVG(r.regular_season_finish_position), 2)
+                   AS avg_regular_season_finish,
+               ROUND(AVG(t.final_standing), 2) AS avg_final_standing
+        FROM FantasyOwners_LLM o
+        LEFT JOIN FantasyTeams_LLM t ON t.owner_id = o.owner_id
+        LEFT JOIN FantasySeasons_LLM s ON s.season_id = t.season_id
+        LEFT JOIN RegularSeasonStandings_LLM r
+            ON r.fantasy_team_id = t.fantasy_team_id
+        GROUP BY o.owner_id, o.owner_name
+    """,
+}
+
+TEXT_VALUES = {
+    "scoring_format": ["PPR", "Half PPR", "Standard"],
+    "matchup_category": ["Regular Season"],
+    "playoff_matchup_category": [None],
+    "league_name": ["The League"],
+}
+FLOAT_HINTS = (
+    "percentage",
+    "per_",
+    "rate",
+    "rating",
+    "average",
+    "avg_",
+    "points",
+    "score",
+    "margin",
+    "value",
+    "expected",
+)
+
+
+class LeagueGenerator:
+    """Deterministic row contexts for each table in the data dictionary."""
+
+    def __init__(self, scale: float = 1.0, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.seasons = list(range(FIRST_SEASON, FIRST_SEASON + SEASON_COUNT))
+        self.owners = list(range(1, len(OWNER_NAMES) + 1))
+        self.nfl_teams = list(NFL_TEAMS)
+        self.player_count = max(len(POSITIONS), int(1200 * scale))
+        self.stat_lines = max(1, int(STAT_LINES_PER_SEASON * scale))
+        self.players_by_position = {
+            position: [
+                p for p in range(1, self.player_count + 1) if p % len(POSITIONS) == i
+            ]
+            for i, position in enumerate(POSITIONS)
+        }
+
+    # --- Names for generated ids ---
+
+    def owner_name(self, owner_id: int) -> str:
+        return OWNER_NAMES[owner_id - 1]
+
+    def team_name(self, team_id: int) -> str:
+        owner_id = team_id % 100
+        mascot = TEAM_MASCOTS[(team_id // 100 + owner_id) % len(TEAM_MASCOTS)]
+        return f"{self.owner_name(owner_id)}'s {mascot}"
+
+    def player_name(self, player_id: int) -> str:
+        first = PLAYER_FIRST[player_id % len(PLAYER_FIRST)]
+        last = PLAYER_LAST[(player_id // len(PLAYER_FIRST)) % len(PLAYER_LAST)]
+        return f"{first} {last} {player_id}"
+
+    @staticmethod
+    def team_id(season_id: int, owner_id: int) -> int:
+        return season_id * 100 + owner_id
+
+    # --- Row contexts: the key columns each row is built around ---
+
+    def contexts(self, table: str) -> Iterator[Dict[str, Any]]:
+        if table == "FantasyOwners_LLM":
+            for owner_id in self.owners:
+                yield {"owner_id": owner_id}
+        elif table == "FantasySeasons_LLM":
+            for season_id in self.seasons:
+                champion = self.rng.choice(self.owners)
+                yield {
+                    "season_id": season_id,
+                    "team_count": len(self.owners),
+                    "champion_owner_id": champion,
+                    "champion_team_id": self.team_id(season_id, champion),
+                }
+        elif table == "FantasyTeams_LLM":
+            for season_id in self.seasons:
+                for owner_id in self.owners:
+                    yield self._team_context(season_id, owner_id)
+        elif table == "FantasyDraftPicks_LLM":
+            yield from self._draft_contexts()
+        elif table == "FantasyMatchups_LLM":
+            yield from self._matchup_contexts()
+        elif table == "Players_LLM":
+            for player_id in range(1, self.player_count + 1):
+                yield {"player_id": player_id}
+        elif table == "NFLTeams_LLM":
+            for nfl_team_id in self.nfl_teams:
+                yield {"nfl_team_id": nfl_team_id}
+        elif table.startswith("PlayerStats_"):
+            position = table.split("_")[2]
+            weeks = [None]
+            if "_Weekly_" in table:
+                weeks = list(range(1, REGULAR_SEASON_WEEKS + PLAYOFF_WEEKS + 1))
+            players = self.players_by_position[position]
+            for season_id in self.seasons:
+                for player_id in players[: self.stat_lines]:
+                    nfl_team_id = self.nfl_teams[player_id % len(self.nfl_teams)]
+                    for week in weeks:
+                        yield {
+                            "season_id": season_id,
+                            "player_id": player_id,
+                            "nfl_team_id": nfl_team_id,
+                            "game_week": week,
+                            "opponent": self.rng.choice(self.nfl_teams),
+                        }
+        else:
+            yield from ({} for _ in range(100))
+
+    def _team_context(self, season_id: int, owner_id: int) -> Dict[str, Any]:
+        return {
+            "season_id": season_id,
+            "owner_id": owner_id,
+            "fantasy_team_id": self.team_id(season_id, owner_id),
+        }
+
+    def _draft_contexts(self) -> Iterator[Dict[str, Any]]:
+        for season_id in self.seasons:
+            pool = list(range(1, self.player_count + 1))
+            self.rng.shuffle(pool)
+            order = self.owners[:]
+            self.rng.shuffle(order)
+            overall = 0
+            for round_number in range(1, DRAFT_ROUNDS + 1):
+                for pick, owner_id in enumerate(order, start=1):
+                    overall += 1
+                    player_id = pool[(overall - 1) % len(pool)]
+                    yield {
+                        **self._team_context(season_id, owner_id),
+                        "round": round_number,
+                        "pick_in_round": pick,
+                        "overall_pick_number": overall,
+                        "pick_overall": overall,
+                        "player_id": player_id,
+                        "player_position": POSITIONS[player_id % len(POSITIONS)],
+                        "nfl_team_id": self.nfl_teams[player_id % len(self.nfl_teams)],
+                    }
+                order.reverse()
+
+    def _matchup_contexts(self) -> Iterator[Dict[str, Any]]:
+        for season_id in self.seasons:
+            for week in range(1, REGULAR_SEASON_WEEKS + 1):
+                owners = self.owners[:]
+                self.rng.shuffle(owners)
+                for home, away in zip(owners[::2], owners[1::2]):
+                    home_score = round(self.rng.uniform(60, 180), 2)
+                    away_score = round(self.rng.uniform(60, 180), 2)
+                    winner, loser = (
+                        (home, away) if home_score > away_score else (away, home)
+                    )
+                    home_team = self.team_id(season_id, home)
+                    away_team = self.team_id(season_id, away)
+                    yield {
+                        "season_id": season_id,
+                        "nfl_week": week,
+                        "fantasy_week": f"Week {week}",
+                        "home_owner_id": home,
+                        "away_owner_id": away,
+                        "home_fantasy_team_id": home_team,
+                        "away_fantasy_team_id": away_team,
+                        "home_score": home_score,
+                        "away_score": away_score,
+                        "owner1_id": home,
+                        "owner2_id": away,
+                        "owner1_team_id": home_team,
+                        "owner2_team_id": away_team,
+                        "owner1_score": home_score,
+                        "owner2_score": away_score,
+                        "winning_owner_id": winner,
+                        "losing_owner_id": loser,
+                        "tie": 0,
+                        "margin_of_victory": round(abs(home_score - away_score), 2),
+                    }
+
+    # --- Column values ---
+
+    def row(
+        self, columns: List[str], context: Dict[str, Any], row_number: int
+    ) -> List[Any]:
+        """One row; a leading surrogate key column is numbered sequentially."""
+        values = [self.value(column, context, row_number) for column in columns]
+        if columns[0].endswith("_id") and columns[0] not in context:
+            values[0] = row_number
+        return values
+
+    def value(self, column: str, context: Dict[str, Any], row_number: int) -> Any:
+        if column in context:
+            return context[column]
+        if column.endswith("_name"):
+            return self._name_for(column, context)
+        if column in TEXT_VALUES:
+            return self.rng.choice(TEXT_VALUES[column])
+        if column.endswith("_id"):
+            return self._random_key(column, row_number)
+        if column == "logo_url":
+            return f"https://example.com/logos/{row_number}.png"
+        if any(hint in column for hint in FLOAT_HINTS):
+            return round(self.rng.uniform(0, 200), 2)
+        return self.rng.randint(0, 20)
+
+    def _name_for(self, column: str, context: Dict[str, Any]) -> Any:
+        id_column = column[: -len("_name")] + "_id"
+        key = context.get(id_column)
+        if key is None:
+            return TEXT_VALUES.get(column, [f"{column} value"])[0]
+        if "nfl_team" in id_column:
+            return NFL_TEAMS[key]
+        if "team" in id_column:
+            return self.team_name(key)
+        if "owner" in id_column:
+            return self.owner_name(key)
+        if "player" in id_column:
+            return self.player_name(key)
+        return str(key)
+
+    def _random_key(self, column: str, row_number: int) -> Any:
+        if "nfl_team" in column:
+            return self.rng.choice(self.nfl_teams)
+        if "season" in column:
+            return self.rng.choice(self.seasons)
+        if "team" in column:
+            return self.team_id(
+                self.rng.choice(self.seasons), self.rng.choice(self.owners)
+            )
+        if "owner" in column:
+            return self.rng.choice(self.owners)
+        if "player" in column and "stats" not in column:
+            return self.rng.randint(1, self.player_count)
+        return row_number
+
+
+def column_type(column: str) -> str:
+    if column in ("nfl_team_id", "opponent", "logo_url") or column.endswith("_name"):
+        return "TEXT"
+    if column in TEXT_VALUES or column in ("fantasy_week", "player_position"):
+        return "TEXT"
+    if column.endswith("_id"):
+        return "INTEGER"
+    if any(hint in column for hint in FLOAT_HINTS):
+        return "REAL"
+    return "INTEGER"
+
+
+def load_dictionary(dictionary_path: str) -> Dict[str, List[str]]:
+    """Table -> documented columns, in dictionary order."""
+    tables: Dict[str, List[str]] = {}
+    with open(dictionary_path, mode="r", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            tables.setdefault(row["table_name"].strip(), []).append(
+                row["column_name"].strip()
+            )
+    return tables
+
+
+def generate(
+    db_path: str,
+    dictionary_path: str = DATA_DICTIONARY_PATH,
+    scale: float = 1.0,
+    seed: int = 7,
+) -> Dict[str, int]:
+    """Create a fresh synthetic database at `db_path`. Returns rows per table."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    generator = LeagueGenerator(scale=scale, seed=seed)
+    row_counts: Dict[str, int] = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        dictionary = load_dictionary(dictionary_path)
+        for table, columns in dictionary.items():
+            if table in VIEW_DEFINITIONS:
+                continue
+            definitions = [f'"{c}" {column_type(c)}' for c in columns]
+            if columns[0].endswith("_id"):
+                definitions[0] += " PRIMARY KEY"
+            conn.execute(f'CREATE TABLE "{table}" ({", ".join(definitions)})')
+
+            rows = (
+                generator.row(columns, context, n)
+                for n, context in enumerate(generator.contexts(table), start=1)
+            )
+            placeholders = ", ".join("?" for _ in columns)
+            cursor = conn.executemany(
+                f'INSERT INTO "{table}" VALUES ({placeholders})', rows
+            )
+            row_counts[table] = cursor.rowcount
+
+        for view, query in VIEW_DEFINITIONS.items():
+            conn.execute(f'CREATE VIEW "{view}" AS {query}')
+            columns = [c[1] for c in conn.execute(f'PRAGMA table_info("{view}")')]
+            if columns != dictionary.get(view, columns):
+                raise ValueError(f"View {view} does not match data_dictionary.csv")
+            row_counts[view] = conn.execute(
+                f'SELECT COUNT(*) FROM "{view}"'
+            ).fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info(
+        f"Generated {db_path}: {len(row_counts)} tables, "
+        f"{sum(row_counts.values())} rows"
+    )
+    return row_counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default="bench/llm_fantasy_data.db")
+    parser.add_argument("--dictionary", default=DATA_DICTIONARY_PATH)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplier for player/stat rows"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for table, rows in generate(
+        args.out, args.dictionary, args.scale, args.seed
+    ).items():
+        print(f"  {table}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Bounded in-memory caches, and a registry that invalidates them together.
+
+One engine serves every session. Artifacts derived from the league database
+(schemas, SQL results, resolved names, the league snapshot, answers) are built
+once and shared. Conversation state is never shared: each chat keeps its own
+`ConversationMemory`. Only context-independent questions reach the shared
+answer cache.
+
+`BoundedCache` is a thread-safe LRU. It has a fixed entry limit and counts
+hits, misses, and evictions. `CacheRegistry` collects every shared cache's
+statistics and invalidation hook. It also watches the database file's
+fingerprint. When the weekly refresh replaces or rewrites the file,
+`database_changed` reports it once, and `invalidate_all` runs every hook, so
+results from the old data never outlive the swap.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+from answer_cache import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# How often (seconds) to stat the league database for a swap
+DB_CHECK_INTERVAL = 5.0
+
+
+class BoundedCache(Generic[K, V]):
+    """Thread-safe LRU mapping that never holds more than `max_entries`."""
+
+    def __init__(self, name: str, max_entries: int):
+        if max_entries < 1:
+            raise ValueError(f"Cache {name} needs room for at least one entry")
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[K, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: K, compute: Callable[[], V]) -> V:
+        """The cached value, or `compute()` stored under `key`. None isn't cached."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry; the counters keep running."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CacheRegistry:
+    """
+    Every cache shared across sessions, with its statistics and the hook
+    that empties (or reloads) it when the league database changes.
+    """
+
+    def __init__(self, db_path: str, check_interval: float = DB_CHECK_INTERVAL):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.invalidations = 0
+        self.last_invalidation: Optional[str] = None
+        self._stats: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._hooks: List[tuple[str, Callable[[], Any]]] = []
+        self._lock = threading.Lock()
+        self._fingerprint = file_fingerprint(db_path)
+        self._last_check = time.monotonic()
+
+    def register(
+        self,
+        name: str,
+        stats: Optional[Callable[[], Dict[str, Any]]] = None,
+        invalidate: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Add a shared cache. Hooks run in registration order, so register the
+        connection pool before anything that reloads from the database.
+        """
+        with self._lock:
+            if stats is not None:
+                self._stats[name] = stats
+            if invalidate is not None:
+                self._hooks.append((name, invalidate))
+
+    def database_changed(self) -> bool:
+        """
+        True, for exactly one caller, once the database file has changed. Stats
+        the file at most every `check_interval` seconds, so it is cheap enough
+        to call before every question.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            current = file_fingerprint(self.db_path)
+            if current == self._fingerprint:
+                return False
+            self._fingerprint = current
+            return True
+
+    def invalidate_all(self, reason: str) -> None:
+        """Run every invalidation hook; a failing hook doesn't stop the rest."""
+        with self._lock:
+            hooks = list(self._hooks)
+            self._fingerprint = file_fingerprint(self.db_path)
+            self.invalidations += 1
+            self.last_invalidation = reason
+        logger.info(f"Invalidating {len(hooks)} shared caches: {reason}")
+        for name, hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning(f"Could not invalidate {name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Each cache's statistics, plus how often everything was invalidated."""
+        with self._lock:
+            sources = dict(self._stats)
+            invalidations = {
+                "count": self.invalidations,
+                "last_reason": self.last_invalidation,
+            }
+        caches: Dict[str, Any] = {}
+        for name, stats in sources.items():
+            try:
+                caches[name] = stats()
+            except Exception as e:
+                caches[name] = {"error": str(e)}
+        return {"caches": caches, "invalidations": invalidations}
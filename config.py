@@ -0,0 +1,14 @@
+"""
+Default locations of the league database and its dictionaries.
+
+Nothing here imports a third-party package, so light modules (the snapshot,
+the materialize CLI, the caches) can share these without loading SQLAlchemy
+or LangChain.
+"""
+
+# The league's SQLite database
+DB_PATH = "llm_fantasy_data.db"
+# Column descriptions: agent schema, table router, materialize join keys
+DATA_DICTIONARY_PATH = "data_dictionary.csv"
+# Table descriptions: LLM table selector and table router
+TABLE_DICTIONARY_PATH = "table_dictionary.csv"
@@ -0,0 +1,217 @@
+"""
+Token-bounded conversation memory.
+
+Recent turns are kept verbatim in a sliding window; turns that fall out of it
+are folded into a running summary by a background thread, so summarizing never
+delays an answer. The table selector gets only the seasons, owners and teams
+mentioned so far, not the transcript.
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Total tokens of history (summary + recent turns) handed to the agent
+DEFAULT_TOKEN_BUDGET = 2000
+# Share of the budget reserved for verbatim recent turns
+WINDOW_SHARE = 0.75
+# Longest summary kept, in tokens; older detail is dropped first
+MAX_SUMMARY_TOKENS = 400
+# Rough characters per token for Gemini-style tokenizers on English text
+CHARS_PER_TOKEN = 4
+# After a failed summary, wait this long (seconds), doubling per failure up to
+# the maximum, before the next turn may retry it
+SUMMARY_RETRY_SECONDS = 5.0
+MAX_SUMMARY_RETRY_SECONDS = 300.0
+
+SEASON_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+
+# Shared by every conversation; summaries are cheap and infrequent
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a tokenizer round trip."""
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+@dataclass
+class ChatTurn:
+    """One message in the conversation."""
+
+    role: str  # "human" or "ai"
+    content: str
+    tokens: int
+
+    @property
+    def text(self) -> str:
+        speaker = "Human" if self.role == "human" else "AI"
+        return f"{speaker}: {self.content}"
+
+
+class ConversationMemory:
+    """
+    Sliding window of recent turns plus an incrementally updated summary.
+
+    `summarize(summary, transcript)` returns a new summary that folds
+    `transcript` into `summary`; it runs off the caller's thread. Until it
+    finishes, evicted turns stay in the history if they fit the budget.
+    """
+
+    def __init__(
+        self,
+        summarize: Optional[Callable[[str, str], str]] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.window_budget = int(token_budget * WINDOW_SHARE)
+        self.count_tokens = count_tokens
+        self.turns: List[ChatTurn] = []
+        self.summary = ""
+        self._summary_tokens = 0
+        # Evicted from the window, not yet folded into the summary
+        self._pending: List[ChatTurn] = []
+        self._summarizing = False
+        # Consecutive failed summaries, and when the next attempt is allowed
+        self._failures = 0
+        self._retry_at = 0.0
+        # Bumped by clear() so a late summary can't resurrect an old chat
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def save_turn(self, question: str, answer: str) -> None:
+        """Record a question and its answer, evicting old turns past the window."""
+        with self._lock:
+            for role, content in (("human", question), ("ai", answer)):
+                self.turns.append(ChatTurn(role, content, self.count_tokens(content)))
+            while len(self.turns) > 2 and self._window_tokens() > self.window_budget:
+                self._pending.append(self.turns.pop(0))
+            self._schedule_summary()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.turns = []
+            self._pending = []
+            self.summary = ""
+            self._summary_tokens = 0
+            self._failures = 0
+            self._retry_at = 0.0
+            self._generation += 1
+
+    def history_text(self) -> str:
+        """Summary plus as many recent turns as fit the token budget."""
+        with self._lock:
+            budget = self.token_budget - self._summary_tokens
+            kept: List[ChatTurn] = []
+            for turn in reversed(self._pending + self.turns):
+                if turn.tokens > budget:
+                    break
+                kept.append(turn)
+                budget -= turn.tokens
+
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of earlier conversation: {self.summary}")
+            parts.extend(turn.text for turn in reversed(kept))
+            return "\n".join(parts)
+
+    def token_count(self) -> int:
+        """Tokens of history the next question will carry."""
+        with self._lock:
+            total = self._summary_tokens + self._window_tokens()
+            total += sum(turn.tokens for turn in self._pending)
+        return min(total, self.token_budget)
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def mentioned_entities(
+        self, owners: Iterable[str] = (), teams: Iterable[str] = ()
+    ) -> Dict[str, List[str]]:
+        """Seasons, and the given owner/team names, mentioned in the conversation."""
+        with self._lock:
+            text = "\n".join(
+                [self.summary, *(turn.content for turn in self._pending + self.turns)]
+            )
+        lowered = text.lower()
+
+        def mentioned(names: Iterable[str]) -> List[str]:
+            return sorted(
+                name
+                for name in set(names)
+                if name and re.search(rf"\b{re.escape(name.lower())}\b", lowered)
+            )
+
+        return {
+            "seasons": sorted(set(SEASON_PATTERN.findall(text))),
+            "owners": mentioned(owners),
+            "teams": mentioned(teams),
+        }
+
+    def router_context(
+        self, owners: Iterable[str] = (), teams: Iterable[str] = ()
+    ) -> str:
+        """The entities the table selector needs, as one short line per kind."""
+        entities = self.mentioned_entities(owners, teams)
+        return "\n".join(
+            f"{kind.capitalize()} mentioned: {', '.join(values)}"
+            for kind, values in entities.items()
+            if values
+        )
+
+    def _window_tokens(self) -> int:
+        return sum(turn.tokens for turn in self.turns)
+
+    def _schedule_summary(self) -> None:
+        # Caller holds the lock
+        if self.summarize is None or self._summarizing or not self._pending:
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        self._summarizing = True
+        batch, generation, summary = list(self._pending), self._generation, self.summary
+        _summary_executor.submit(self._summarize_batch, batch, generation, summary)
+
+    def _summarize_batch(
+        self, batch: List[ChatTurn], generation: int, summary: str
+    ) -> None:
+        transcript = "\n".join(turn.text for turn in batch)
+        try:
+            new_summary = self.summarize(summary, transcript).strip()
+        except Exception as e:
+            logger.warning(f"Conversation summary failed, keeping turns verbatim: {e}")
+            new_summary = None
+
+        with self._lock:
+            self._summarizing = False
+            if generation != self._generation:
+                return
+            if new_summary is None:
+                # Don't retry the same failing batch in a loop: back off, and
+                # wait for the next turn to try again
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(
+                    MAX_SUMMARY_RETRY_SECONDS,
+                    SUMMARY_RETRY_SECONDS * 2 ** (self._failures - 1),
+                )
+                if len(self._pending) > len(batch):
+                    # Newer turns are waiting; give up on the failed batch
+                    self._pending = self._pending[len(batch):]
+                return
+
+            # Keep the tail: the newest facts matter most to follow-ups
+            max_chars = MAX_SUMMARY_TOKENS * CHARS_PER_TOKEN
+            self.summary = new_summary[-max_chars:]
+            self._summary_tokens = self.count_tokens(self.summary)
+            self._pending = self._pending[len(batch):]
+            self._failures = 0
+            self._retry_at = 0.0
+            self._schedule_summary()
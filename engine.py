@@ -0,0 +1,1035 @@
+"""
+The Oracle's question-answering pipeline, independent of any UI.
+
+`OracleEngine` owns the LLM, the read-only database, the caches and the agent
+executor, and exposes each stage (simple-query routing, table selection,
+schema assembly, agent construction) as a method. The Streamlit app, the API
+server and the offline benchmarks drive the pipeline through it; the LLM is
+injectable so the pipeline can run without a Google API key.
+"""
+
+import os
+import csv
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from dotenv import load_dotenv
+from typing import Any, AsyncIterator, Callable, List, Optional, Dict
+from langchain.agents import AgentExecutor, create_react_agent
+from langchain.prompts import PromptTemplate
+from langchain.callbacks.base import AsyncCallbackHandler, BaseCallbackHandler
+from langchain.schema import AgentAction, AgentFinish
+from langchain_core.language_models import BaseChatModel
+from langchain_core.tools import BaseTool
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+
+from agent_guard import AgentLoopDetected, GuardedQuerySQLDatabaseTool, guard_queries
+from answer_cache import AnswerCache, is_context_independent
+from cache_registry import CacheRegistry
+from conversation_memory import DEFAULT_TOKEN_BUDGET, ConversationMemory
+from table_router import TableRouter, TableSelection
+from schema_index import SchemaIndex
+from entity_index import EntityIndex
+from question_templates import TemplateLibrary
+from simple_router import route_query
+from startup import STARTUP
+from prompt_budget import PromptBudget, record_tokens_saved
+from config import DATA_DICTIONARY_PATH, DB_PATH, TABLE_DICTIONARY_PATH
+from league_db import POOL_SIZE, BoundedSQLDatabase, create_readonly_engine
+from league_snapshot import LeaderboardTool, LeagueSnapshot
+from sql_cache import SQLResultCache
+from telemetry import (
+    TelemetryStore,
+    current_trace,
+    telemetry_callbacks,
+    trace_request,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash-lite-preview-06-17"
+
+# Minimum local router confidence needed to skip the LLM table selector
+ROUTER_CONFIDENCE_THRESHOLD = 0.5
+
+AGENT_MAX_ITERATIONS = 8
+AGENT_MAX_EXECUTION_TIME = 30
+# Seconds the LLM table selector gets before the history-free retry joins the race
+RETRY_HEDGE_SECONDS = 2.0
+# Longest observation forwarded to clients as a step event
+MAX_OBSERVATION_CHARS = 2000
+
+CLARIFY_MESSAGE = (
+    "I'm having trouble understanding which data you need. "
+    "Could you rephrase your question? For example:\n"
+    "- 'Who won the championship in 2020?'\n"
+    "- 'What was my record against Jake?'\n"
+    "- 'Show me the top scorers from last season'"
+)
+AGENT_FAILURE_MESSAGE = "Sorry, I couldn't answer that question."
+LOOP_STOPPED_MESSAGE = (
+    "I stopped before finishing because I was going in circles. "
+    "The closest result I found was:"
+)
+# Substrings of provider errors that mean "slow down", not "this question failed"
+RATE_LIMIT_MARKERS = (
+    "429",
+    "resourceexhausted",
+    "resource exhausted",
+    "resource has been exhausted",
+    "rate limit",
+    "ratelimit",
+    "quota",
+)
+RATE_LIMITED_MESSAGE = (
+    "⏳ The language model is busy right now. Try again in a minute."
+)
+# Table selection reasoning when the LLM selector failed, or was rate-limited
+SELECTION_FAILED = "Error during table selection"
+SELECTION_RATE_LIMITED = "Rate limited during table selection"
+
+
+@dataclass
+class OracleAnswer:
+    """The outcome of one question, as returned to every client."""
+
+    answer: str
+    # "simple", "template", "cache", "agent", "partial", "clarify" or "error"
+    source: str
+    tables: List[str] = field(default_factory=list)
+    reasoning: str = ""
+    schema: str = ""
+    error: Optional[str] = None
+    times_asked: int = 0
+    request_id: str = ""
+    # SQL the agent ran, or the template's query
+    sql: List[str] = field(default_factory=list)
+    # The LLM provider refused the request; worth retrying later
+    rate_limited: bool = False
+
+
+class LoggingCallbackHandler(BaseCallbackHandler):
+    def on_chain_start(
+        self, serialized: Dict[str, Any], inputs: Dict[str, Any], **kwargs: Any
+    ) -> Any:
+        """Log the inputs when a chain starts, with checks for None."""
+        if serialized is None:
+            return
+
+        logger.info("=" * 80)
+        chain_name = serialized.get("name", serialized.get("id", ["UnknownChain"])[-1])
+        logger.info(f"CHAIN START: {chain_name}")
+        logger.info("INPUTS:")
+
+        for key, value in inputs.items():
+            if key == "agent_scratchpad":
+                logger.info(f"  - {key}: [present]")
+                continue
+            if key == "history" and len(str(value)) > 400:
+                logger.info(f"  - {key}: [present, truncated]")
+                continue
+            logger.info(f"  - {key}:\n{value}")
+        logger.info("=" * 80)
+
+    def on_agent_action(self, action: AgentAction, **kwargs: Any) -> Any:
+        logger.info(
+            f"Agent Action: {action.tool} called with input:\n{action.tool_input}"
+        )
+
+    def on_tool_end(self, output: str, **kwargs: Any) -> Any:
+        logger.info(f"Tool End: Tool produced output:\n{output}")
+
+    def on_agent_finish(self, finish: AgentFinish, **kwargs: Any) -> Any:
+        logger.info(f"Agent Finished: Final Answer:\n{finish.return_values['output']}")
+        logger.info("=" * 80 + "\n")
+
+
+class FinalAnswerStreamHandler(AsyncCallbackHandler):
+    """Emits the agent's Final Answer text as it is generated."""
+
+    FINAL_ANSWER_MARKER = "Final Answer:"
+
+    def __init__(self, emit: Callable[[Dict[str, Any]], None]):
+        self.emit = emit
+        self._buffer = ""
+
+    async def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any
+    ) -> None:
+        # Each ReAct iteration is a new LLM call with its own transcript
+        self._buffer = ""
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._buffer += token
+        marker_index = self._buffer.find(self.FINAL_ANSWER_MARKER)
+        if marker_index == -1:
+            return
+
+        answer_start = marker_index + len(self.FINAL_ANSWER_MARKER)
+        self.emit(
+            {"type": "partial_answer", "text": self._buffer[answer_start:].strip()}
+        )
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True if the LLM provider rejected a call for rate or quota limits."""
+    error_str = f"{type(error).__name__} {error}".lower()
+    return any(marker in error_str for marker in RATE_LIMIT_MARKERS)
+
+
+def describe_agent_error(error: Exception) -> str:
+    """A user-facing explanation of an agent failure."""
+    if is_rate_limit_error(error):
+        return RATE_LIMITED_MESSAGE
+    error_str = str(error).lower()
+    if "no such column" in error_str:
+        return "⚠️ I tried to query a column that doesn't exist."
+    if "no such table" in error_str:
+        return "⚠️ I tried to access a table that doesn't exist."
+    if "timeout" in error_str or "max_execution_time" in error_str:
+        return "⏱️ The query took too long. Try a simpler question."
+    return f"❌ Error: {error}"
+
+
+def _log_reload_failure(future: "Future[Any]") -> None:
+    error = future.exception()
+    if error is not None:
+        logger.warning(f"Background cache reload failed: {error}")
+
+
+def create_default_llm() -> BaseChatModel:
+    """The production LLM; requires GOOGLE_API_KEY in the environment or .env."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise ValueError("GOOGLE_API_KEY not found.")
+    return ChatGoogleGenerativeAI(model=DEFAULT_MODEL, temperature=0)
+
+
+def load_table_descriptions(filepath: str) -> str:
+    """Load table descriptions from CSV file."""
+    try:
+        with open(filepath, mode="r", encoding="utf-8") as csvfile:
+            reader = csv.DictReader(csvfile)
+            return "\n".join(
+                [
+                    f"Table: {row['table_name']}, Description: {row['table_description']}"
+                    for row in reader
+                ]
+            )
+    except Exception as e:
+        logger.error(f"Failed to load table dictionary: {e}")
+        return ""
+
+
+# Static instructions come first and the per-question context last, so every
+# request shares the same prompt prefix and the provider can cache it.
+TABLE_SELECTION_PROMPT_TEMPLATE = """You are an expert database routing assistant. Identify ALL database tables required to answer the user's question.
+
+**Mandatory Table Selection Rules (DO NOT VIOLATE THESE):**
+
+1. **Questions about PEOPLE/WINNERS/NAMES (WHO questions):**
+   - Keywords: "who", "winner", "champion", "owner", "name", "player"
+   - **ALWAYS include:** FantasyOwners_LLM + FantasySeasons_LLM
+   - Example: "Who won in 2017?" → [FantasySeasons_LLM, FantasyOwners_LLM]
+
+2. **Questions about TEAMS:**
+   - Keywords: "team", "team name"
+   - **ALWAYS include:** FantasyTeams_LLM + related tables
+
+3. **Questions about MATCHUPS/GAMES/SCORES:**
+   - Keywords: "game", "matchup", "score", "versus", "against"
+   - **ALWAYS include:** FantasyMatchups_LLM + related tables
+
+4. **Questions about SEASONS/YEARS/CHAMPIONSHIPS:**
+   - Keywords: "season", "year", "championship", numeric years (2017, 2020, etc.)
+   - **ALWAYS include:** FantasySeasons_LLM
+
+5. **When in doubt:** include MORE tables rather than fewer. Joining tables is cheap, missing data is expensive.
+
+**Your Task:**
+- Look for keywords that indicate what information they want
+- Think about what data you need to JOIN to get a complete answer
+- Return ALL relevant table names (be generous, not conservative)
+- If the answer requires showing a PERSON'S NAME, you MUST include FantasyOwners_LLM
+
+--- CONTEXT ---
+Available Tables:
+{table_descriptions}
+
+Conversation Context:
+{history}
+
+User Question: {user_query}
+--- END CONTEXT ---"""
+
+
+AGENT_PROMPT_TEMPLATE = """You are an expert SQLite data analyst. Your job is to answer questions by writing and executing SQL queries against a fantasy football database.
+
+**CRITICAL RULES:**
+1. This is SQLite - use ONLY SQLite syntax (no MySQL/PostgreSQL features)
+2. Run ONE query at a time, then WAIT for the actual Observation - never predict query results
+3. Only use tables and columns listed in the schema below
+4. Use explicit JOIN ... ON clauses and table aliases (T1, T2, etc.)
+5. If a query fails, read the error: "no such column"/"no such table" → check the schema; "ambiguous column" → qualify it with an alias
+6. If a query returns no results, think about WHY and try a different approach
+7. **NEVER run the exact same query more than twice - if stuck in a loop, STOP and try a completely different approach**
+
+**COMMON PATTERNS:**
+- To find data for a specific YEAR (e.g., 2017): Use `WHERE season_id = 2017` (season_id corresponds to the year)
+- To get a person's NAME from their ID: JOIN with FantasyOwners_LLM on owner_id
+- To get a team NAME from team ID: JOIN with FantasyTeams_LLM on team_id
+- Names under RESOLVED NAMES are already matched to their IDs: filter on those IDs directly instead of searching names with LIKE
+- For leaderboards over weekly scores (highest or lowest single-week score, biggest blowout, best single-game performance, most points in a season, best N-week stretch), use league_leaderboard if it is listed below: it answers instantly without SQL
+
+**AVAILABLE TOOLS:**
+{tools}
+
+**REQUIRED FORMAT:**
+Question: [the input question]
+Thought: [analyze the question and plan your query]
+Action: the action to take, should be one of [{tool_names}]
+Action Input: [your SQLite query, or the tool's input]
+Observation: [database will return results here]
+Thought: [analyze the results and decide next step]
+... (repeat Thought/Action/Observation as needed)
+Thought: [confirm you have enough information]
+Final Answer: [clear, natural language answer to the question]
+
+{schema}
+
+{entities}
+
+Conversation History:
+{history}
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+CONVERSATION_SUMMARY_PROMPT_TEMPLATE = """Progressively summarize a conversation about a fantasy football league.
+Keep every season, owner, team, player and number that a follow-up question could refer to. Drop pleasantries. Reply with the new summary only.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{transcript}
+
+New summary:"""
+
+
+class OracleEngine:
+    """The LLM, database, caches and stage functions behind the Oracle."""
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        db_path: str = DB_PATH,
+        table_dictionary_path: str = TABLE_DICTIONARY_PATH,
+        data_dictionary_path: str = DATA_DICTIONARY_PATH,
+        answer_cache_path: str = "answer_cache.db",
+        sql_cache_path: str = "sql_cache.db",
+        telemetry_path: str = "telemetry.jsonl",
+        verbose: bool = True,
+    ):
+        self.verbose = verbose
+        # The LLM client is built on first use: greetings, templates and cached
+        # answers never need it
+        self._llm = llm
+        self._structured_llm: Any = None
+        self._llm_lock = threading.Lock()
+        self.sql_engine = create_readonly_engine(db_path)
+        self.db = BoundedSQLDatabase(
+            self.sql_engine,
+            sample_rows_in_table_info=0,
+            lazy_table_reflection=True,
+            view_support=True,
+        )
+        # Blocking SQLite work (caches, agent queries) runs here when answering
+        # asynchronously, sized to the read-only connection pool
+        self.sqlite_executor = ThreadPoolExecutor(
+            max_workers=POOL_SIZE, thread_name_prefix="sqlite"
+        )
+        self.answer_cache = AnswerCache(cache_path=answer_cache_path, db_path=db_path)
+        self.sql_cache = SQLResultCache(db_path=db_path, cache_path=sql_cache_path)
+        self.telemetry_store = TelemetryStore(telemetry_path)
+        self.table_router = TableRouter.from_csv(
+            table_dictionary_path, data_dictionary_path
+        )
+        self.schema_index = SchemaIndex(data_dictionary_path)
+        self.table_descriptions = load_table_descriptions(table_dictionary_path)
+        self.agent_prompt = PromptTemplate.from_template(AGENT_PROMPT_TEMPLATE)
+        self.sql_tools: List[QuerySQLDatabaseTool] = [
+            GuardedQuerySQLDatabaseTool(
+                db=self.db, cache=self.sql_cache, executor=self.sqlite_executor
+            )
+        ]
+        # Weekly stats and matchups as NumPy columns, for instant leaderboards
+        self.snapshot = LeagueSnapshot(db_path)
+        self.agent_tools: List[BaseTool] = list(self.sql_tools)
+        if self.snapshot.enabled:
+            self.agent_tools.append(LeaderboardTool(snapshot=self.snapshot))
+        self.prompt_budget = PromptBudget.from_csv(
+            self.table_router, self.schema_index, table_dictionary_path
+        )
+        # The schema is a per-call input, so one executor serves every question
+        self._agent_executor: Optional[AgentExecutor] = None
+        self._agent_lock = threading.Lock()
+        # Owner, team and player names, indexed in the background at startup
+        self.entities = EntityIndex(self.db.query)
+        self.sqlite_executor.submit(self.entities.load)
+        self.sqlite_executor.submit(self.snapshot.load)
+        self.templates = TemplateLibrary(
+            self.db.query, self.entities, snapshot=self.snapshot
+        )
+        # Everything derived from the database is shared by every session and
+        # dropped together when the file is swapped; the pool goes first, so
+        # the reloads read the new file
+        self.caches = CacheRegistry(db_path)
+        self.caches.register("db_connections", invalidate=self.sql_engine.dispose)
+        self.caches.register(
+            "answer_cache",
+            self.answer_cache.stats,
+            self.answer_cache.invalidate_if_stale,
+        )
+        self.caches.register("sql_cache", self.sql_cache.stats, self.sql_cache.clear)
+        self.caches.register(
+            "schemas", self.schema_index.stats, self.schema_index.clear
+        )
+        self.caches.register("pruned_schemas", self.schema_index.pruned_stats)
+        # The old index and snapshot keep serving until their reloads swap in
+        self.caches.register(
+            "entities", self.entities.stats, self._reload_in_pool(self.entities)
+        )
+        self.caches.register(
+            "snapshot", self.snapshot.stats, self._reload_in_pool(self.snapshot)
+        )
+
+    route_query = staticmethod(route_query)
+
+    @property
+    def llm(self) -> BaseChatModel:
+        with self._llm_lock:
+            if self._llm is None:
+                with STARTUP.phase("llm_client"):
+                    self._llm = create_default_llm()
+            return self._llm
+
+    @property
+    def structured_llm(self) -> Any:
+        """The LLM constrained to return a `TableSelection`."""
+        llm = self.llm
+        with self._llm_lock:
+            if self._structured_llm is None:
+                self._structured_llm = llm.with_structured_output(TableSelection)
+            return self._structured_llm
+
+    def warm_up(self) -> None:
+        """
+        Load what the first real question would otherwise wait for: the name
+        index, the league snapshot, a database connection, the LLM client and
+        the agent. Each step
+        is timed in the startup report; failures are left for that question
+        to surface.
+        """
+        steps: List[tuple[str, Callable[[], Any]]] = [
+            ("entity_index", self.entities.load),
+            ("snapshot", self.snapshot.load),
+            ("database", lambda: self.db.query("SELECT 1 AS ok", {})),
+            ("agent", self.get_agent_executor),
+        ]
+        for name, step in steps:
+            try:
+                with STARTUP.phase(f"warm_up.{name}"):
+                    step()
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed: {e}")
+
+    def get_detailed_schema_info(
+        self, table_names: List[str], question: Optional[str] = None
+    ) -> str:
+        """
+        Returns the rich, human-readable schema for the selected tables, assembled
+        from the preloaded data dictionary index. With a `question`, column
+        descriptions are pruned to the ones relevant to it. Falls back to the
+        basic SQLAlchemy schema for tables missing from the dictionary.
+        """
+        logger.info(f"Loading schema for tables: {table_names}")
+
+        if question is None:
+            full_schema = self.schema_index.build_schema(table_names)
+        else:
+            full_schema, saved = self.prompt_budget.schema(question, table_names)
+            record_tokens_saved("schema", saved)
+        if full_schema is None:
+            logger.warning(
+                f"No schema found in {self.schema_index.filepath} for {table_names}, "
+                "using basic schema"
+            )
+            return self.db.get_table_info(table_names=table_names)
+
+        logger.info("Schema built successfully")
+        return full_schema
+
+    def _table_selection_prompt(
+        self, user_query: str, history: Any, table_descriptions: str
+    ) -> str:
+        return TABLE_SELECTION_PROMPT_TEMPLATE.format(
+            history=history,
+            table_descriptions=table_descriptions,
+            user_query=user_query,
+        )
+
+    @staticmethod
+    def _check_table_selection(
+        user_query: str, result: TableSelection
+    ) -> tuple[List[str], str]:
+        # Post-processing safety check: If "who" or "winner" is in the query and FantasyOwners not selected, add it
+        query_lower = user_query.lower()
+        who_keywords = ["who", "winner", "champion", "owner"]
+
+        if any(keyword in query_lower for keyword in who_keywords):
+            if not any("fantasyowners" in table.lower() for table in result.tables):
+                logger.warning(
+                    f"Safety catch: Adding FantasyOwners_LLM for WHO question: {user_query}"
+                )
+                result.tables.append("FantasyOwners_LLM")
+                result.reasoning += (
+                    " [Safety: Added FantasyOwners_LLM for WHO question]"
+                )
+
+        logger.info(f"Table Selector (Pydantic) identified: {result.tables}")
+        logger.info(f"Reasoning: {result.reasoning}")
+
+        return result.tables, result.reasoning
+
+    def get_relevant_tables_with_pydantic(
+        self, user_query: str, history: Any, table_descriptions: str
+    ) -> tuple[List[str], str]:
+        """
+        Use LLM with structured output (Pydantic) to identify which tables are needed.
+        Returns: (list of table names, reasoning)
+
+        BENEFIT: Guaranteed correct format, no parsing errors!
+        """
+        prompt = self._table_selection_prompt(user_query, history, table_descriptions)
+        try:
+            # This returns a TableSelection object with guaranteed structure
+            result: TableSelection = self.structured_llm.invoke(
+                prompt,
+                config={"callbacks": telemetry_callbacks("llm_table_selection")},
+            )
+            return self._check_table_selection(user_query, result)
+        except Exception as e:
+            return self._selection_failed(e)
+
+    async def aget_relevant_tables_with_pydantic(
+        self, user_query: str, history: Any, table_descriptions: str
+    ) -> tuple[List[str], str]:
+        """Async `get_relevant_tables_with_pydantic`, awaiting the LLM call."""
+        prompt = self._table_selection_prompt(user_query, history, table_descriptions)
+        try:
+            result: TableSelection = await self.structured_llm.ainvoke(
+                prompt,
+                config={"callbacks": telemetry_callbacks("llm_table_selection")},
+            )
+            return self._check_table_selection(user_query, result)
+        except Exception as e:
+            return self._selection_failed(e)
+
+    @staticmethod
+    def _selection_failed(error: Exception) -> tuple[List[str], str]:
+        logger.error(f"Structured table selector failed: {error}", exc_info=True)
+        if is_rate_limit_error(error):
+            return [], SELECTION_RATE_LIMITED
+        return [], SELECTION_FAILED
+
+    def _route_locally(
+        self, user_query: str, history: Any
+    ) -> tuple[TableSelection, bool]:
+        """The local router's guess, and whether it is good enough to use as is."""
+        selection, confidence = self.table_router.route(user_query)
+        uses_history = bool(history) and not is_context_independent(user_query)
+
+        if (
+            selection.tables
+            and confidence >= ROUTER_CONFIDENCE_THRESHOLD
+            and not uses_history
+        ):
+            logger.info(f"Local router identified: {selection.tables}")
+            logger.info(f"Reasoning: {selection.reasoning}")
+            return selection, True
+
+        logger.info(
+            f"Local router confidence {confidence:.2f} (follow-up: {uses_history}), "
+            "falling back to LLM table selector"
+        )
+        return selection, False
+
+    @staticmethod
+    def _fall_back_to_router(
+        tables: List[str], reasoning: str, selection: TableSelection
+    ) -> tuple[List[str], str]:
+        # Degrade gracefully if the LLM is down or slow: use the local guess.
+        # A rate limit is reported instead, so callers can back off and retry
+        if not tables and selection.tables and reasoning != SELECTION_RATE_LIMITED:
+            logger.warning("LLM table selector returned nothing, using local router")
+            return (
+                selection.tables,
+                selection.reasoning + " [Fallback: LLM selector unavailable]",
+            )
+        return tables, reasoning
+
+    def select_tables(
+        self, user_query: str, history: Any, router_context: Optional[str] = None
+    ) -> tuple[List[str], str]:
+        """
+        Pick tables with the local router, falling back to the LLM selector when
+        the router is not confident or the question leans on the conversation.
+        The LLM selector sees `router_context` (the entities mentioned so far)
+        instead of the full history when it is given.
+        Returns: (list of table names, reasoning)
+        """
+        selection, confident = self._route_locally(user_query, history)
+        if confident:
+            return selection.tables, selection.reasoning
+
+        tables, reasoning = self.get_relevant_tables_with_pydantic(
+            user_query,
+            history if router_context is None else router_context,
+            self.selector_descriptions(user_query),
+        )
+        return self._fall_back_to_router(tables, reasoning, selection)
+
+    async def aselect_tables(
+        self, user_query: str, history: Any, router_context: Optional[str] = None
+    ) -> tuple[List[str], str]:
+        """
+        Async `select_tables`. While the LLM selector runs, the schema and agent
+        for the local router's guess are prebuilt, and the history-free retry is
+        raced against the first call rather than run after it comes back empty.
+        """
+        selection, confident = self._route_locally(user_query, history)
+        if confident:
+            return selection.tables, selection.reasoning
+
+        if selection.tables:
+            asyncio.get_running_loop().run_in_executor(
+                None, self.prefetch_agent, selection.tables, user_query
+            )
+        tables, reasoning = await self._race_table_selection(
+            user_query, history if router_context is None else router_context
+        )
+        return self._fall_back_to_router(tables, reasoning, selection)
+
+    async def _race_table_selection(
+        self, user_query: str, history: Any
+    ) -> tuple[List[str], str]:
+        """
+        The LLM selection, hedged with `aretry_table_selection`. The retry
+        starts as soon as the first call comes back empty or has run for
+        RETRY_HEDGE_SECONDS; the first non-empty selection wins.
+        """
+        primary = asyncio.create_task(
+            self.aget_relevant_tables_with_pydantic(
+                user_query, history, self.selector_descriptions(user_query)
+            )
+        )
+        done, _ = await asyncio.wait({primary}, timeout=RETRY_HEDGE_SECONDS)
+        if done and primary.result()[0]:
+            return primary.result()
+
+        trace = current_trace()
+        if trace:
+            trace.increment("table_selection_retries")
+        retry = asyncio.create_task(self.aretry_table_selection(user_query))
+        pending = {retry} if done else {primary, retry}
+        result = primary.result() if done else ([], SELECTION_FAILED)
+        rate_limited = result[1] == SELECTION_RATE_LIMITED
+        while pending:
+            finished, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in finished:
+                result = task.result()
+                if result[0]:
+                    for loser in pending:
+                        loser.cancel()
+                    return result
+                rate_limited = rate_limited or result[1] == SELECTION_RATE_LIMITED
+        return ([], SELECTION_RATE_LIMITED) if rate_limited else result
+
+    def selector_descriptions(self, user_query: str) -> str:
+        """Descriptions of the plausible tables only; the retry still sees all."""
+        descriptions, saved = self.prompt_budget.table_descriptions(user_query)
+        record_tokens_saved("selector", saved)
+        return descriptions
+
+    @staticmethod
+    def _retry_query(user_query: str) -> str:
+        logger.warning("No tables selected, retrying...")
+        return f"Which database tables are needed for: '{user_query}'?"
+
+    def retry_table_selection(self, user_query: str) -> tuple[List[str], str]:
+        """Ask the LLM selector again, without history, after an empty selection."""
+        return self.get_relevant_tables_with_pydantic(
+            self._retry_query(user_query), "", self.table_descriptions
+        )
+
+    async def aretry_table_selection(self, user_query: str) -> tuple[List[str], str]:
+        """Async `retry_table_selection`."""
+        return await self.aget_relevant_tables_with_pydantic(
+            self._retry_query(user_query), "", self.table_descriptions
+        )
+
+    def create_specialized_agent(self) -> AgentExecutor:
+        """
+        Creates a custom SQL agent with improved prompts and error handling.
+        The schema and resolved names are supplied with each question as the
+        `schema` and `entities` inputs.
+        """
+        agent = create_react_agent(
+            llm=self.llm, tools=self.agent_tools, prompt=self.agent_prompt
+        )
+
+        return AgentExecutor(
+            agent=agent,
+            tools=self.agent_tools,
+            verbose=self.verbose,
+            handle_parsing_errors=True,
+            max_iterations=AGENT_MAX_ITERATIONS,
+            max_execution_time=AGENT_MAX_EXECUTION_TIME,
+        )
+
+    def resolve_entities(self, question: str) -> str:
+        """The names mentioned in the question, resolved to IDs for the agent."""
+        matches = self.entities.resolve(question)
+        trace = current_trace()
+        if trace and matches:
+            trace.increment("entities_resolved", len(matches))
+        return self.entities.prompt_context(matches)
+
+    def prefetch_agent(self, table_names: List[str], question: str) -> None:
+        """
+        Build the question-pruned schema and the agent executor for a likely
+        table set ahead of time. The schema is memoized, so
+        `get_detailed_schema_info` reuses it if the selection agrees.
+        """
+        try:
+            self.prompt_budget.schema(question, table_names)
+            self.get_agent_executor()
+        except Exception as e:
+            logger.warning(f"Speculative prefetch failed for {table_names}: {e}")
+
+    def get_agent_executor(self) -> AgentExecutor:
+        """The shared agent executor, built on first use."""
+        with self._agent_lock:
+            if self._agent_executor is None:
+                self._agent_executor = self.create_specialized_agent()
+                logger.info("Built agent executor")
+            return self._agent_executor
+
+    def agent_callbacks(self) -> List[BaseCallbackHandler]:
+        """Callbacks attached to every agent run."""
+        return [LoggingCallbackHandler(), *telemetry_callbacks("llm_agent")]
+
+    # --- Conversation memory ---
+
+    def league_names(self) -> Dict[str, List[str]]:
+        """Owner and team names, for spotting entities in the conversation."""
+        return {
+            "owners": self.entities.names("owner"),
+            "teams": self.entities.names("team"),
+        }
+
+    def summarize_conversation(self, summary: str, transcript: str) -> str:
+        """Fold new conversation lines into the running summary (one LLM call)."""
+        prompt = CONVERSATION_SUMMARY_PROMPT_TEMPLATE.format(
+            summary=summary or "(none)", transcript=transcript
+        )
+        response = self.llm.invoke(
+            prompt, config={"callbacks": telemetry_callbacks("llm_summary")}
+        )
+        return str(response.content)
+
+    def new_conversation(
+        self, token_budget: int = DEFAULT_TOKEN_BUDGET
+    ) -> ConversationMemory:
+        """Conversation memory summarized in the background by this engine's LLM."""
+        return ConversationMemory(
+            summarize=self.summarize_conversation, token_budget=token_budget
+        )
+
+    def router_context(self, memory: ConversationMemory) -> str:
+        """The seasons, owners and teams the table selector needs from a chat."""
+        return memory.router_context(**self.league_names())
+
+    # --- Full pipeline (used by the API server and the Streamlit client) ---
+
+    async def _in_sqlite_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking SQLite work off the event loop, keeping the trace context."""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.sqlite_executor, lambda: context.run(func, *args)
+        )
+
+    async def _run_agent(
+        self,
+        agent_executor: AgentExecutor,
+        inputs: Dict[str, Any],
+        emit: Callable[[Dict[str, Any]], None],
+        queries: List[str],
+    ) -> str:
+        """Run the agent, streaming its steps; appends each SQL it runs to `queries`."""
+        output = ""
+        callbacks = [FinalAnswerStreamHandler(emit), *self.agent_callbacks()]
+        async for chunk in agent_executor.astream(
+            inputs, config={"callbacks": callbacks}
+        ):
+            for action in chunk.get("actions", []):
+                queries.append(str(action.tool_input).strip())
+                emit({"type": "action", "log": action.log.strip()})
+            for step in chunk.get("steps", []):
+                emit(
+                    {
+                        "type": "observation",
+                        "text": str(step.observation)[:MAX_OBSERVATION_CHARS],
+                    }
+                )
+            if "output" in chunk:
+                output = chunk["output"]
+        return output
+
+    def invalidate_caches(self, reason: str = "requested") -> None:
+        """
+        Drop every shared cache and schedule reloads of the name index and
+        snapshot. Returns without waiting for the reloads.
+        """
+        self.caches.invalidate_all(reason)
+
+    def _reload_in_pool(self, cache: Any) -> Callable[[], None]:
+        """Invalidation hook that runs `cache.reload()` on the SQLite pool."""
+
+        def schedule() -> None:
+            future = self.sqlite_executor.submit(cache.reload)
+            future.add_done_callback(_log_reload_failure)
+
+        return schedule
+
+    async def _answer(
+        self,
+        question: str,
+        history: str,
+        router_context: Optional[str],
+        emit: Callable[[Dict[str, Any]], None],
+    ) -> OracleAnswer:
+        if self.caches.database_changed():
+            await self._in_sqlite_pool(
+                self.invalidate_caches, "the league database changed"
+            )
+        with trace_request(question, self.telemetry_store) as trace:
+            result = await self._answer_traced(
+                question, history, router_context, emit, trace
+            )
+            result.request_id = trace.request_id
+            return result
+
+    async def _answer_traced(
+        self,
+        question: str,
+        history: str,
+        router_context: Optional[str],
+        emit: Callable[[Dict[str, Any]], None],
+        trace: Any,
+    ) -> OracleAnswer:
+        # 1. Check for simple queries
+        with trace.span("route_query"):
+            simple_response = route_query(question)
+        if simple_response:
+            return OracleAnswer(simple_response, "simple")
+
+        # 2. Answer formulaic questions with a vetted SQL template, no LLM
+        with trace.span("template") as span:
+            templated = await self._in_sqlite_pool(self.templates.answer, question)
+            span["hit"] = templated is not None
+        if templated:
+            trace.increment("template_answers")
+            reasoning = f"Matched question template '{templated.template}'"
+            if templated.from_snapshot:
+                trace.increment("snapshot_answers")
+                reasoning += " (computed from the league snapshot)"
+            return OracleAnswer(
+                templated.answer,
+                "template",
+                tables=templated.tables,
+                reasoning=reasoning,
+                sql=[templated.sql],
+            )
+
+        # 3. Check the shared answer cache (only for self-contained questions)
+        cacheable = is_context_independent(question)
+        if cacheable:
+            with trace.span("answer_cache") as span:
+                cached = await self._in_sqlite_pool(self.answer_cache.get, question)
+                span["hit"] = cached is not None
+            if cached:
+                trace.increment("answer_cache_hits")
+                return OracleAnswer(
+                    cached.answer,
+                    "cache",
+                    tables=cached.tables,
+                    reasoning=cached.reasoning,
+                    times_asked=cached.hits + 1,
+                )
+
+        # 4. Select tables locally, or via structured LLM output (retry raced in)
+        with trace.span("table_selection") as span:
+            tables, reasoning = await self.aselect_tables(
+                question, history, router_context
+            )
+            span["tables"] = len(tables)
+        if not tables and reasoning == SELECTION_RATE_LIMITED:
+            return OracleAnswer(
+                AGENT_FAILURE_MESSAGE,
+                "error",
+                reasoning=reasoning,
+                error=RATE_LIMITED_MESSAGE,
+                rate_limited=True,
+            )
+        if not tables:
+            return OracleAnswer(CLARIFY_MESSAGE, "clarify")
+
+        with trace.span("schema"):
+            schema = self.get_detailed_schema_info(tables, question)
+        with trace.span("entities"):
+            entities = await self._in_sqlite_pool(self.resolve_entities, question)
+        emit(
+            {
+                "type": "context",
+                "tables": tables,
+                "reasoning": reasoning,
+                "schema": schema,
+                "entities": entities,
+            }
+        )
+
+        # 5. Fetch (or build) the agent for these tables and run it
+        with trace.span("agent_setup"):
+            agent_executor = self.get_agent_executor()
+        logger.info(f"Invoking agent with tables: {tables}")
+        queries: List[str] = []
+        try:
+            with trace.span("agent"), guard_queries(self.schema_index):
+                output = await self._run_agent(
+                    agent_executor,
+                    {
+                        "input": question,
+                        "history": history,
+                        "schema": schema,
+                        "entities": entities,
+                    },
+                    emit,
+                    queries,
+                )
+        except AgentLoopDetected as e:
+            # Answer with what the agent found instead of burning more LLM calls
+            answer = AGENT_FAILURE_MESSAGE
+            if e.best_observation:
+                answer = f"{LOOP_STOPPED_MESSAGE}\n\n```\n{e.best_observation}\n```"
+            return OracleAnswer(
+                answer,
+                "partial" if e.best_observation else "error",
+                tables=tables,
+                reasoning=reasoning,
+                schema=schema,
+                error=f"Stopped early: {e.reason}",
+                sql=queries,
+            )
+        except Exception as e:
+            logger.error(f"Agent execution failed: {e}", exc_info=True)
+            return OracleAnswer(
+                AGENT_FAILURE_MESSAGE,
+                "error",
+                tables=tables,
+                reasoning=reasoning,
+                schema=schema,
+                error=describe_agent_error(e),
+                sql=queries,
+                rate_limited=is_rate_limit_error(e),
+            )
+
+        # Only cache real answers, not iteration/time-limit stops
+        if cacheable and not output.startswith("Agent stopped"):
+            await self._in_sqlite_pool(
+                self.answer_cache.put, question, output, tables, reasoning
+            )
+        return OracleAnswer(
+            output,
+            "agent",
+            tables=tables,
+            reasoning=reasoning,
+            schema=schema,
+            sql=queries,
+        )
+
+    async def aanswer(
+        self, question: str, history: str = "", router_context: Optional[str] = None
+    ) -> OracleAnswer:
+        """
+        Answer one question end to end. `history` goes to the agent;
+        `router_context`, if given, replaces it in the LLM table selector.
+        """
+        return await self._answer(
+            question, history, router_context, lambda event: None
+        )
+
+    async def astream_answer(
+        self, question: str, history: str = "", router_context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer one question like `aanswer`, yielding events as it progresses:
+        `context` (tables, reasoning, schema, entities), `action` and `observation` for
+        each agent step, `partial_answer` while the final answer streams, and
+        finally `answer` with the OracleAnswer fields.
+        """
+        events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+
+        # One task owns the whole pipeline so its trace context stays intact
+        async def run() -> None:
+            try:
+                result = await self._answer(
+                    question, history, router_context, events.put_nowait
+                )
+            except Exception as e:
+                logger.error(f"Pipeline failed: {e}", exc_info=True)
+                result = OracleAnswer(
+                    AGENT_FAILURE_MESSAGE,
+                    "error",
+                    error=describe_agent_error(e),
+                    rate_limited=is_rate_limit_error(e),
+                )
+            events.put_nowait({"type": "answer", **asdict(result)})
+            events.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and latency statistics shared by every client."""
+        return {
+            "answer_cache": self.answer_cache.stats(),
+            "sql_cache": self.sql_cache.stats(),
+            "stages": self.telemetry_store.summary(),
+            "counters": self.telemetry_store.counters(),
+            "startup": STARTUP.report(),
+            "caches": self.caches.stats(),
+        }
@@ -0,0 +1,403 @@
+"""
+In-memory index of owner, fantasy team, and player names.
+
+Mentions in a question ("Jake", "mahomes", "the Gladiators") are resolved to
+IDs before the agent runs, so it can filter on `owner_id = 3` directly instead
+of spending ReAct iterations on `LIKE '%jake%'` exploratory queries. Matching
+tries, in order:
+
+1. exact full names
+2. aliases: unique first or last names, plus nicknames from `entity_aliases.csv`
+3. fuzzy trigram similarity, for misspellings ("Mahomez")
+"""
+
+import os
+import re
+import csv
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from answer_cache import normalize_question
+from cache_registry import BoundedCache
+from table_router import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Runs a trusted SQL query with bound parameters and returns rows as dicts:
+# run_query(sql, parameters, max_rows=None), where None means every row
+QueryRunner = Callable[..., List[Dict[str, Any]]]
+
+DEFAULT_ALIASES_PATH = "entity_aliases.csv"
+
+# kind -> (query returning id/name/detail, ID column the agent should filter on)
+ENTITY_SOURCES: Dict[str, Tuple[str, str]] = {
+    "owner": (
+        "SELECT owner_id AS id, owner_name AS name, NULL AS detail "
+        "FROM FantasyOwners_LLM",
+        "owner_id",
+    ),
+    "team": (
+        "SELECT fantasy_team_id AS id, fantasy_team_name AS name, "
+        "season_id AS detail FROM FantasyTeams_LLM",
+        "fantasy_team_id",
+    ),
+    "player": (
+        "SELECT player_id AS id, player_name AS name, NULL AS detail "
+        "FROM Players_LLM",
+        "player_id",
+    ),
+}
+
+# Longest mention, in words, looked up in the index
+MAX_MENTION_WORDS = 4
+# Shortest mention tried for fuzzy matching, in characters
+MIN_FUZZY_LENGTH = 4
+# Trigram Jaccard similarity needed for a fuzzy match
+FUZZY_THRESHOLD = 0.5
+# Mentions matching more entities than this are too vague to be useful
+MAX_MATCHES_PER_MENTION = 5
+# Questions whose resolved names are remembered
+MAX_CACHED_RESOLUTIONS = 1024
+# Common words that are never names on their own
+NON_NAME_WORDS: Set[str] = STOPWORDS | {
+    "won",
+    "win",
+    "wins",
+    "record",
+    "against",
+    "vs",
+    "versus",
+    "team",
+    "owner",
+    "player",
+    "season",
+    "week",
+    "game",
+    "points",
+    "score",
+    "scored",
+    "draft",
+    "pick",
+    "top",
+    "best",
+    "worst",
+    "show",
+    "list",
+    "me",
+    "my",
+    "i",
+    "all",
+    "time",
+    "ever",
+    "last",
+    "first",
+    "year",
+    "s",
+}
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class Entity:
+    kind: str
+    id: Any
+    name: str
+    # Extra context, e.g. the season of a fantasy team
+    detail: Any = None
+
+
+@dataclass
+class EntityMatch:
+    """A mention in a question resolved to one entity."""
+
+    mention: str
+    entity: Entity
+    # "exact", "alias" or "fuzzy"
+    method: str
+    score: float = 1.0
+    # Seasons a team name was used in; `entity` is the latest one
+    seasons: int = 1
+
+    def describe(self) -> str:
+        entity = self.entity
+        id_column = ENTITY_SOURCES[entity.kind][1]
+        if self.seasons > 1:
+            key = (
+                f"fantasy_team_name = {entity.name!r} in {self.seasons} seasons; "
+                f"{id_column} = {entity.id!r} in {entity.detail}"
+            )
+        elif entity.detail:
+            key = f"{id_column} = {entity.id!r}, {entity.detail} season"
+        else:
+            key = f"{id_column} = {entity.id!r}"
+        return (
+            f'- "{self.mention}" → {entity.kind} {entity.name} '
+            f"({key}; {self.method} match)"
+        )
+
+
+class EntityIndex:
+    """
+    Exact, alias, and trigram indexes over every owner, team, and player name.
+
+    `load` reads the names from the database; call it once at startup (it is
+    also called on first use). Lookups are in memory and thread-safe.
+    `reload` rebuilds the index after the database changes.
+    """
+
+    def __init__(
+        self, run_query: QueryRunner, aliases_path: str = DEFAULT_ALIASES_PATH
+    ):
+        self.run_query = run_query
+        self.aliases_path = aliases_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.entities: Dict[str, List[Entity]] = {kind: [] for kind in ENTITY_SOURCES}
+        self._exact: Dict[str, List[Entity]] = defaultdict(list)
+        self._alias: Dict[str, List[Entity]] = defaultdict(list)
+        # trigram -> fuzzy terms containing it; term -> exact keys it came from
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._term_names: Dict[str, Set[str]] = defaultdict(set)
+        self._term_trigram_counts: Dict[str, int] = {}
+        # Keyed on (index generation, question): a resolution computed against
+        # an index that has since been reloaded is never served again
+        self._generation = 0
+        self._resolutions: BoundedCache[Tuple[int, str], List[EntityMatch]] = (
+            BoundedCache("entity_resolutions", MAX_CACHED_RESOLUTIONS)
+        )
+
+    def load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            for kind, (query, _) in ENTITY_SOURCES.items():
+                try:
+                    rows = self.run_query(query, {}, max_rows=None)
+                except Exception as e:
+                    logger.warning(f"Could not load {kind} names: {e}")
+                    continue
+                for row in rows:
+                    if row["name"]:
+                        self._add(Entity(kind, row["id"], row["name"], row["detail"]))
+                self._check_coverage(kind, query, rows)
+            self._add_aliases()
+            self._loaded = True
+            logger.info(
+                "Entity index built: "
+                + ", ".join(f"{len(v)} {k}s" for k, v in self.entities.items())
+            )
+
+    def _check_coverage(
+        self, kind: str, query: str, rows: List[Dict[str, Any]]
+    ) -> None:
+        """Warn if the loaded rows miss any named entity in the database."""
+        try:
+            expected = self.run_query(
+                f"SELECT COUNT(DISTINCT id) AS n FROM ({query}) "
+                "WHERE name IS NOT NULL AND name != ''",
+                {},
+            )[0]["n"]
+        except Exception as e:
+            logger.warning(f"Could not check {kind} name coverage: {e}")
+            return
+        loaded = len({row["id"] for row in rows if row["name"]})
+        if loaded < expected:
+            logger.warning(
+                f"Entity index has {loaded} of {expected} {kind}s; "
+                "names outside the index will not be resolved"
+            )
+
+    def reload(self) -> None:
+        """Rebuild from the database, swapping the new index in when it's ready."""
+        fresh = EntityIndex(self.run_query, self.aliases_path)
+        fresh.load()
+        with self._lock:
+            self.entities = fresh.entities
+            self._exact = fresh._exact
+            self._alias = fresh._alias
+            self._trigrams = fresh._trigrams
+            self._term_names = fresh._term_names
+            self._term_trigram_counts = fresh._term_trigram_counts
+            self._loaded = True
+            self._generation += 1
+            # Entries of older generations can't be hit any more; free them
+            self._resolutions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **{f"{kind}s": len(entities) for kind, entities in self.entities.items()},
+            "resolutions": self._resolutions.stats(),
+        }
+
+    def _add(self, entity: Entity) -> None:
+        key = normalize_question(entity.name)
+        if not key:
+            return
+        self.entities[entity.kind].append(entity)
+        self._exact[key].append(entity)
+        words = [
+            word
+            for word in key.split()
+            if word not in NON_NAME_WORDS and not word.isdigit()
+        ]
+        if len(words) > 1:
+            for word in {words[0], words[-1]}:
+                self._alias[word].append(entity)
+        # Fuzzy terms: the full name and each longer word of it
+        for term in {key, *(word for word in words if len(word) >= MIN_FUZZY_LENGTH)}:
+            if term not in self._term_names:
+                grams = trigrams(term)
+                self._term_trigram_counts[term] = len(grams)
+                for gram in grams:
+                    self._trigrams[gram].add(term)
+            self._term_names[term].add(key)
+
+    def _add_aliases(self) -> None:
+        """Nicknames from the optional `kind,alias,name` CSV."""
+        if not os.path.exists(self.aliases_path):
+            return
+        with open(self.aliases_path, mode="r", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                targets = [
+                    entity
+                    for entity in self._exact.get(normalize_question(row["name"]), [])
+                    if entity.kind == row["kind"].strip()
+                ]
+                alias = normalize_question(row["alias"])
+                if alias and targets:
+                    self._alias[alias].extend(targets)
+                elif alias:
+                    logger.warning(
+                        f"Alias {row['alias']!r} names unknown {row['name']!r}"
+                    )
+
+    def names(self, kind: str) -> List[str]:
+        """Every distinct name of one kind ("owner", "team" or "player")."""
+        self.load()
+        return sorted({entity.name for entity in self.entities.get(kind, [])})
+
+    def lookup(
+        self, text: str, kind: Optional[str] = None, fuzzy: bool = True
+    ) -> Optional[EntityMatch]:
+        """The single entity a mention refers to, or None if unknown or ambiguous."""
+        # "Jake's" means Jake, but "Jake's Wolves" is a team name
+        matches = self._candidates(normalize_question(text), kind, fuzzy=False)
+        if not matches:
+            key = normalize_question(re.sub(r"'s\b", "", text))
+            matches = self._candidates(key, kind, fuzzy)
+        if not matches:
+            return None
+        method, score, entities = matches
+        latest = _latest(entities)
+        if len(latest) != 1:
+            return None
+        entity, seasons = latest[0]
+        return EntityMatch(text.strip(), entity, method, score, seasons)
+
+    def resolve(self, question: str) -> List[EntityMatch]:
+        """
+        Every name mentioned in the question, longest mentions first and
+        without overlaps. Ambiguous mentions resolve to each candidate, up to
+        MAX_MATCHES_PER_MENTION. Results are remembered per normalized question.
+        """
+        key = normalize_question(question)
+        with self._lock:
+            generation = self._generation
+        return self._resolutions.get_or_compute(
+            (generation, key), lambda: self._resolve(key)
+        )
+
+    def _resolve(self, key: str) -> List[EntityMatch]:
+        words = key.split()
+        taken = [False] * len(words)
+        matches: List[EntityMatch] = []
+        for size in range(min(MAX_MENTION_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(taken[start : start + size]):
+                    continue
+                span = words[start : start + size]
+                if span[0] in NON_NAME_WORDS or span[-1] in NON_NAME_WORDS:
+                    continue
+                mention = " ".join(span)
+                found = self._candidates(mention)
+                if not found:
+                    continue
+                method, score, entities = found
+                latest = _latest(entities)
+                if len(latest) > MAX_MATCHES_PER_MENTION:
+                    continue
+                taken[start : start + size] = [True] * size
+                matches.extend(
+                    EntityMatch(mention, entity, method, score, seasons)
+                    for entity, seasons in latest
+                )
+        return matches
+
+    def _candidates(
+        self, key: str, kind: Optional[str] = None, fuzzy: bool = True
+    ) -> Optional[Tuple[str, float, List[Entity]]]:
+        self.load()
+        for method, index in (("exact", self._exact), ("alias", self._alias)):
+            entities = [e for e in index.get(key, []) if kind in (None, e.kind)]
+            if entities:
+                return method, 1.0, entities
+
+        if not fuzzy or len(key) < MIN_FUZZY_LENGTH:
+            return None
+        best_key, best_score = self._fuzzy(key)
+        if best_key is None:
+            return None
+        entities = [e for e in self._exact[best_key] if kind in (None, e.kind)]
+        return ("fuzzy", round(best_score, 2), entities) if entities else None
+
+    def _fuzzy(self, key: str) -> Tuple[Optional[str], float]:
+        """The indexed name closest to `key` by trigram Jaccard, if close enough."""
+        grams = trigrams(key)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] += 1
+
+        best_term, best_score = None, FUZZY_THRESHOLD
+        for term, overlap in shared.items():
+            score = overlap / (len(grams) + self._term_trigram_counts[term] - overlap)
+            if score > best_score:
+                best_term, best_score = term, score
+        if best_term is None:
+            return None, 0.0
+        names = self._term_names[best_term]
+        # A misspelled word shared by several names identifies none of them
+        if len(names) != 1:
+            return None, 0.0
+        return next(iter(names)), best_score
+
+    def prompt_context(self, matches: Iterable[EntityMatch]) -> str:
+        """Resolved names for the agent prompt, or "" if there are none."""
+        lines = [match.describe() for match in matches]
+        if not lines:
+            return ""
+        return (
+            "**RESOLVED NAMES** (filter on these IDs directly; "
+            "no LIKE lookups needed):\n" + "\n".join(lines)
+        )
+
+
+def _latest(entities: List[Entity]) -> List[Tuple[Entity, int]]:
+    """
+    One entity per (kind, name) with the number of rows sharing it: team names
+    recur every season, and the latest season's row stands for them all.
+    """
+    grouped: Dict[Tuple[str, str], List[Entity]] = defaultdict(list)
+    for entity in entities:
+        grouped[(entity.kind, entity.name)].append(entity)
+    return [
+        (max(group, key=lambda e: e.detail or 0), len(group))
+        for group in grouped.values()
+    ]
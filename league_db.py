@@ -0,0 +1,262 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Union
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, Result, Row
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.expression import Executable
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+
+from config import DB_PATH
+from telemetry import current_trace
+
+logger = logging.getLogger(__name__)
+
+# Connection pool and per-query limits for agent-issued SQL
+POOL_SIZE = 4
+POOL_TIMEOUT_SECONDS = 10
+QUERY_TIME_BUDGET_SECONDS = 10.0
+MAX_RESULT_ROWS = 50
+# SQLite VM instructions between progress handler calls
+PROGRESS_HANDLER_INTERVAL = 10_000
+
+_query_deadline = threading.local()
+
+
+class QueryTimeoutError(SQLAlchemyError):
+    """Raised when a query exceeds its time budget and is interrupted."""
+
+
+def _check_deadline() -> int:
+    """SQLite progress handler: a non-zero return aborts the running statement."""
+    deadline = getattr(_query_deadline, "value", None)
+    if deadline is not None and time.monotonic() > deadline:
+        return 1
+    return 0
+
+
+def _shadow_materialized_views(conn: sqlite3.Connection) -> int:
+    """
+    Point each view built by `materialize.py` at its precomputed table.
+
+    TEMP objects are resolved before `main`, so a TEMP view with the original
+    name transparently redirects every query that uses the view.
+    """
+    try:
+        rows = conn.execute(
+            "SELECT view_name, table_name FROM _materialized_views"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return 0
+    for view_name, table_name in rows:
+        conn.execute(
+            f'CREATE TEMP VIEW IF NOT EXISTS "{view_name}" '
+            f'AS SELECT * FROM main."{table_name}"'
+        )
+    return len(rows)
+
+
+def create_readonly_engine(
+    db_path: str = DB_PATH,
+    pool_size: int = POOL_SIZE,
+    use_materialized: bool = True,
+) -> Engine:
+    """
+    SQLAlchemy engine over a read-only, immutable SQLite URI with a bounded pool.
+
+    Every connection gets a progress handler that enforces the time budget set
+    by `BoundedSQLDatabase.run` for the calling thread and, if
+    `use_materialized`, reads materialized views instead of recomputing them.
+
+    The pool is one shared `QueuePool` rather than a connection per thread.
+    Queries arrive from Streamlit script threads, uvicorn workers, and the
+    engine's SQLite executor, so a per-thread pool would grow with the number
+    of threads. The deadline is still per thread, because it lives in
+    thread-local state that the handler reads, and an immutable database is safe
+    to share across threads.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found at {db_path}")
+    uri = f"file:{os.path.abspath(db_path)}?mode=ro&immutable=1"
+
+    def connect() -> sqlite3.Connection:
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.set_progress_handler(_check_deadline, PROGRESS_HANDLER_INTERVAL)
+        if use_materialized:
+            _shadow_materialized_views(conn)
+        return conn
+
+    logger.info(f"Opening {db_path} read-only (pool size {pool_size})")
+    return create_engine(
+        "sqlite://",
+        creator=connect,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=POOL_TIMEOUT_SECONDS,
+    )
+
+
+class BoundedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase whose `run` enforces a per-query time budget and a row cap.
+    `query`, for the app's own vetted SQL, keeps the time budget but not the cap.
+
+    Results beyond `max_rows` are never fetched from SQLite; the text returned
+    to the agent ends with a marker saying that rows were omitted.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_rows: int = MAX_RESULT_ROWS,
+        time_budget: float = QUERY_TIME_BUDGET_SECONDS,
+        **kwargs: Any,
+    ):
+        super().__init__(engine, **kwargs)
+        self.max_rows = max_rows
+        self.time_budget = time_budget
+
+    def run(
+        self,
+        command: Union[str, Executable],
+        fetch: Literal["all", "one", "cursor"] = "all",
+        include_columns: bool = False,
+        *,
+        parameters: Optional[Dict[str, Any]] = None,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Sequence[Dict[str, Any]], Result[Any]]:
+        """Execute a SQL command within the time budget, returning at most max_rows rows."""
+        if fetch == "cursor":
+            return self._buffered_cursor(command, parameters, execution_options)
+
+        limit = 1 if fetch == "one" else self.max_rows
+        rows = self._fetch(command, limit, parameters, execution_options)
+        if rows is None:
+            return ""
+
+        omitted = len(rows) > limit
+        res = [
+            {
+                column: truncate_word(value, length=self._max_string_length)
+                for column, value in row._asdict().items()
+            }
+            for row in rows[:limit]
+        ]
+        if not include_columns:
+            res = [tuple(row.values()) for row in res]  # type: ignore[misc]
+
+        if not res:
+            return ""
+        result = str(res)
+        if omitted and fetch == "all":
+            logger.info(f"Query result truncated to {limit} rows")
+            result += (
+                f"\n[Only the first {limit} rows are shown; additional rows omitted. "
+                "Use LIMIT, ORDER BY, or aggregation to narrow the result.]"
+            )
+        return result
+
+    def query(
+        self,
+        sql: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rows of a trusted, parameterized query, within the time budget. Unlike
+        `run`, there is no row cap unless the caller passes `max_rows`.
+        """
+        rows = self._fetch(text(sql), max_rows, parameters)
+        return [row._asdict() for row in (rows or [])[:max_rows]]
+
+    def _fetch(
+        self,
+        command: Union[str, Executable],
+        limit: Optional[int],
+        parameters: Optional[Dict[str, Any]] = None,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Optional[List[Row[Any]]]:
+        """
+        Up to `limit` + 1 rows (to detect truncation), every row if `limit` is
+        None, or None if there is no result set.
+        """
+        if isinstance(command, str):
+            command = text(command)
+
+        start = time.perf_counter()
+        try:
+            with self._time_budget(), self._engine.connect() as connection:
+                cursor = connection.execute(
+                    command, parameters or {}, execution_options=execution_options or {}
+                )
+                if not cursor.returns_rows:
+                    return None
+                if limit is None:
+                    rows = cursor.fetchall()
+                else:
+                    rows = cursor.fetchmany(limit + 1)
+                cursor.close()
+        except (OperationalError, QueryTimeoutError) as e:
+            trace = current_trace()
+            if trace:
+                trace.add_span(
+                    "sql",
+                    (time.perf_counter() - start) * 1000,
+                    error=str(getattr(e, "orig", e)),
+                )
+            raise
+
+        trace = current_trace()
+        if trace:
+            trace.add_span(
+                "sql",
+                (time.perf_counter() - start) * 1000,
+                rows=len(rows) if limit is None else min(len(rows), limit),
+                truncated=limit is not None and len(rows) > limit,
+            )
+        return list(rows)
+
+    def _buffered_cursor(
+        self,
+        command: Union[str, Executable],
+        parameters: Optional[Dict[str, Any]] = None,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Result[Any]:
+        """
+        The full result for `fetch="cursor"`, read within the time budget.
+
+        A live cursor would keep running after the deadline is cleared, so the
+        rows are buffered here and handed back as a replayable result.
+        """
+        if isinstance(command, str):
+            command = text(command)
+        with self._time_budget(), self._engine.connect() as connection:
+            result = connection.execute(
+                command, parameters or {}, execution_options=execution_options or {}
+            )
+            if not result.returns_rows:
+                return result
+            return result.freeze()()
+
+    @contextmanager
+    def _time_budget(self) -> Iterator[None]:
+        """Interrupt this thread's statements once they outlive the time budget."""
+        _query_deadline.value = time.monotonic() + self.time_budget
+        try:
+            yield
+        except OperationalError as e:
+            if "interrupted" in str(e.orig):
+                raise QueryTimeoutError(
+                    f"Query exceeded the {self.time_budget:g}s time budget and was "
+                    "cancelled. Add filters (e.g. on season_id) or aggregate in SQL."
+                ) from e
+            raise
+        finally:
+            _query_deadline.value = None
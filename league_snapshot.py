@@ -0,0 +1,639 @@
+"""
+Columnar in-memory snapshot of the weekly stat and matchup tables.
+
+Leaderboard questions ("most points in a single week across all seasons",
+"best three-week stretch in 2021") scan every row of the
+`PlayerStats_Weekly_*` tables or `FantasyMatchups_LLM` in SQLite, one row at a
+time, on every ask. `LeagueSnapshot` loads those tables once into NumPy
+columns with the narrowest dtype that fits. Top-N, season totals, and rolling
+sums are then a few vectorized passes over contiguous arrays. It takes well
+under a millisecond on multi-season data.
+
+The snapshot is optional. Set `ORACLE_SNAPSHOT=0` to turn it off. It stays
+unloaded if NumPy is missing, or if the tables would not fit in
+`MAX_SNAPSHOT_BYTES`. Callers check `ready` and fall back to SQL. When the
+database file changes, the engine's cache registry calls `reload`.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import Field
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+
+from config import DB_PATH
+from telemetry import current_trace
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to skip the snapshot and answer leaderboards with SQL
+SNAPSHOT_ENV = "ORACLE_SNAPSHOT"
+# Upper bound on the snapshot's arrays; larger databases stay on SQL
+MAX_SNAPSHOT_BYTES = 64 * 1024 * 1024
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 25
+# Longest rolling window, in games
+MAX_STRETCH_WEEKS = 17
+# Rows per fetchmany() while streaming a table into the arrays
+FETCH_BATCH_ROWS = 10_000
+
+# Position code -> weekly stat table
+WEEKLY_STAT_TABLES: Dict[str, str] = {
+    "QB": "PlayerStats_Weekly_QB_LLM",
+    "RB": "PlayerStats_Weekly_RB_LLM",
+    "WR": "PlayerStats_Weekly_WR_LLM",
+    "TE": "PlayerStats_Weekly_TE_LLM",
+    "K": "PlayerStats_Weekly_K_LLM",
+    "DST": "PlayerStats_Weekly_DST_LLM",
+}
+MATCHUP_TABLE = "FantasyMatchups_LLM"
+REGULAR_SEASON = "Regular Season"
+
+# Column -> dtype of each block; one row per (player, game) or (owner, matchup)
+PLAYER_WEEK_DTYPES: Dict[str, str] = {
+    "player": "int32",
+    "season": "int16",
+    "week": "int8",
+    "position": "int8",
+    "points": "float32",
+}
+OWNER_WEEK_DTYPES: Dict[str, str] = {
+    "owner": "int16",
+    "season": "int16",
+    "week": "int8",
+    "label": "int16",
+    "opponent": "int16",
+    "points": "float32",
+    "opponent_points": "float32",
+    "playoffs": "bool",
+}
+
+# One player's game, fields in PLAYER_WEEK_DTYPES order; NULLs become 0
+PLAYER_WEEKS_QUERY = """
+SELECT player_id, COALESCE(season_id, 0), COALESCE(game_week, 0), :position,
+       COALESCE(total_fantasy_points, 0)
+FROM {table}
+WHERE player_id IS NOT NULL
+"""
+# Both sides of every matchup, so each owner's weeks are one column; fields in
+# OWNER_WEEK_DTYPES order, with the week label still text
+OWNER_WEEKS_QUERY = f"""
+SELECT home_owner_id, COALESCE(season_id, 0), COALESCE(nfl_week, 0),
+       COALESCE(fantasy_week, 'Week ' || nfl_week), COALESCE(away_owner_id, 0),
+       COALESCE(home_score, 0), COALESCE(away_score, 0),
+       COALESCE(matchup_category != '{REGULAR_SEASON}', 0)
+FROM {MATCHUP_TABLE}
+WHERE home_owner_id IS NOT NULL
+UNION ALL
+SELECT away_owner_id, COALESCE(season_id, 0), COALESCE(nfl_week, 0),
+       COALESCE(fantasy_week, 'Week ' || nfl_week), COALESCE(home_owner_id, 0),
+       COALESCE(away_score, 0), COALESCE(home_score, 0),
+       COALESCE(matchup_category != '{REGULAR_SEASON}', 0)
+FROM {MATCHUP_TABLE}
+WHERE away_owner_id IS NOT NULL
+"""
+
+# "metric=owner_week; n=5; season=2019" -> {"metric": "owner_week", ...}
+TOOL_ARGUMENT_PATTERN = re.compile(r"(\w+)\s*[=:]\s*([\w-]+)")
+
+
+@dataclass
+class ColumnBlock:
+    """
+    Equal-length columns sorted by (entity, season, week), so each entity's
+    season is one contiguous run.
+    """
+
+    columns: Dict[str, Any]
+    # Index of the first row of each (entity, season) run
+    group_starts: Any
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(self.columns["season"])
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [*self.columns.values(), self.group_starts]
+        return sum(int(array.nbytes) for array in arrays)
+
+
+def _row_bytes(dtypes: Dict[str, str]) -> int:
+    # The group index adds at most one int64 per row
+    return sum(np.dtype(dtype).itemsize for dtype in dtypes.values()) + 8
+
+
+def _group_starts(entity: Any, season: Any) -> Any:
+    """First row of each (entity, season) run in rows sorted by both."""
+    if not len(entity):
+        return np.zeros(0, dtype=np.int64)
+    changed = (entity[1:] != entity[:-1]) | (season[1:] != season[:-1])
+    return np.flatnonzero(np.concatenate(([True], changed)))
+
+
+def _empty_columns(dtypes: Dict[str, str], length: int) -> Dict[str, Any]:
+    return {name: np.zeros(length, dtype=dtype) for name, dtype in dtypes.items()}
+
+
+def _fill(
+    cursor: sqlite3.Cursor,
+    columns: Dict[str, Any],
+    start: int,
+    convert: Optional[Dict[str, Callable[[Any], Any]]] = None,
+) -> int:
+    """
+    Stream the cursor's rows, fields in `columns` order, into the preallocated
+    arrays from row `start`, one batch at a time. Returns the next free row.
+    """
+    convert = convert or {}
+    names = list(columns)
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_ROWS)
+        if not rows:
+            return start
+        end = start + len(rows)
+        for name, values in zip(names, zip(*rows)):
+            if name in convert:
+                values = [convert[name](value) for value in values]
+            columns[name][start:end] = values
+        start = end
+
+
+def _block(columns: Dict[str, Any]) -> ColumnBlock:
+    """A block from equal-length columns, the first being the entity."""
+    entity = next(iter(columns.values()))
+    order = np.lexsort((columns["week"], columns["season"], entity))
+    columns = {name: column[order] for name, column in columns.items()}
+    entity = next(iter(columns.values()))
+    return ColumnBlock(columns, _group_starts(entity, columns["season"]))
+
+
+def _top(values: Any, n: int, lowest: bool = False) -> Any:
+    """Indices of the n largest (or smallest) values, best first."""
+    n = min(n, len(values))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = values if lowest else -values
+    if n < len(values):
+        candidates = np.argpartition(keys, n - 1)[:n]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(keys[candidates], kind="stable")]
+
+
+class LeagueSnapshot:
+    """
+    NumPy columns of every player's weekly points and every owner's matchup
+    scores, with vectorized leaderboards over them.
+
+    `load` reads the tables once (call it at startup; it is also called on
+    first use), and `reload` reads them again after the database changes.
+    Queries only read the arrays, so they are thread-safe. Every query returns
+    rows as dicts, like `BoundedSQLDatabase.query`.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        max_bytes: int = MAX_SNAPSHOT_BYTES,
+        enabled: Optional[bool] = None,
+    ):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.getenv(SNAPSHOT_ENV, "1") != "0"
+        self.enabled = enabled and np is not None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.player_weeks: Optional[ColumnBlock] = None
+        self.owner_weeks: Optional[ColumnBlock] = None
+        self.positions: List[str] = list(WEEKLY_STAT_TABLES)
+        self.week_labels: List[str] = []
+        self.player_names: Dict[int, str] = {}
+        self.owner_names: Dict[int, str] = {}
+        self.load_ms = 0.0
+        self.skipped_reason: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """Loaded and usable; False means "answer with SQL"."""
+        self.load()
+        return self.owner_weeks is not None
+
+    @property
+    def nbytes(self) -> int:
+        blocks = (self.player_weeks, self.owner_weeks)
+        return sum(block.nbytes for block in blocks if block is not None)
+
+    def load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.enabled:
+                self.skipped_reason = (
+                    "NumPy is not installed" if np is None else f"{SNAPSHOT_ENV}=0"
+                )
+                return
+            start = time.perf_counter()
+            try:
+                self._load()
+            except Exception as e:
+                self.player_weeks = self.owner_weeks = None
+                self.skipped_reason = str(e)
+                logger.warning(f"League snapshot not loaded: {e}")
+                return
+            self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+            if self.owner_weeks is not None:
+                logger.info(
+                    f"League snapshot loaded in {self.load_ms:.0f} ms: "
+                    f"{len(self.player_weeks or [])} player weeks, "
+                    f"{len(self.owner_weeks)} owner weeks, "
+                    f"{self.nbytes / 1024:.0f} KiB"
+                )
+
+    def reload(self) -> None:
+        """
+        Load a fresh copy of the tables, then swap it in. The current arrays
+        keep answering queries until then.
+        """
+        fresh = LeagueSnapshot(self.db_path, self.max_bytes, self.enabled)
+        fresh.load()
+        with self._lock:
+            self.player_weeks = fresh.player_weeks
+            self.owner_weeks = fresh.owner_weeks
+            self.week_labels = fresh.week_labels
+            self.player_names = fresh.player_names
+            self.owner_names = fresh.owner_names
+            self.load_ms = fresh.load_ms
+            self.skipped_reason = fresh.skipped_reason
+            self._loaded = True
+
+    def _load(self) -> None:
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            existing = {
+                row[0]
+                for row in conn.execute("SELECT name FROM sqlite_master")
+            }
+            tables = {
+                code: table
+                for code, table in WEEKLY_STAT_TABLES.items()
+                if table in existing
+            }
+            player_counts = [
+                conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE player_id IS NOT NULL"
+                ).fetchone()[0]
+                for table in tables.values()
+            ]
+            owner_count = conn.execute(
+                f"SELECT COUNT(*) FROM ({OWNER_WEEKS_QUERY})"
+            ).fetchone()[0]
+            estimate = sum(player_counts) * _row_bytes(PLAYER_WEEK_DTYPES) + (
+                owner_count * _row_bytes(OWNER_WEEK_DTYPES)
+            )
+            if estimate > self.max_bytes:
+                self.skipped_reason = (
+                    f"needs ~{estimate // 2**20} MiB, over the "
+                    f"{self.max_bytes // 2**20} MiB limit"
+                )
+                logger.warning(f"League snapshot skipped: {self.skipped_reason}")
+                return
+
+            # Rows go straight from the cursor into the arrays, a batch at a time
+            player_columns = _empty_columns(PLAYER_WEEK_DTYPES, sum(player_counts))
+            filled = 0
+            for code, table in tables.items():
+                filled = _fill(
+                    conn.execute(
+                        PLAYER_WEEKS_QUERY.format(table=table),
+                        {"position": self.positions.index(code)},
+                    ),
+                    player_columns,
+                    filled,
+                )
+            player_columns = {n: c[:filled] for n, c in player_columns.items()}
+
+            labels: Dict[str, int] = {}
+            owner_columns = _empty_columns(OWNER_WEEK_DTYPES, owner_count)
+            filled = _fill(
+                conn.execute(OWNER_WEEKS_QUERY),
+                owner_columns,
+                0,
+                {"label": lambda label: labels.setdefault(label, len(labels))},
+            )
+            owner_columns = {n: c[:filled] for n, c in owner_columns.items()}
+
+            self.player_names = dict(
+                conn.execute("SELECT player_id, player_name FROM Players_LLM")
+            )
+            self.owner_names = dict(
+                conn.execute("SELECT owner_id, owner_name FROM FantasyOwners_LLM")
+            )
+        finally:
+            conn.close()
+
+        self.week_labels = list(labels)
+        self.player_weeks = _block(player_columns)
+        self.owner_weeks = _block(owner_columns)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.player_weeks is not None and self.owner_weeks is not None,
+            "player_weeks": len(self.player_weeks or []),
+            "owner_weeks": len(self.owner_weeks or []),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "load_ms": self.load_ms,
+            "skipped_reason": self.skipped_reason,
+        }
+
+    # --- Leaderboards ---
+
+    def top_owner_weeks(
+        self,
+        n: int = DEFAULT_TOP_N,
+        season: Optional[int] = None,
+        playoffs: Optional[bool] = None,
+        lowest: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Highest (or lowest) single-week fantasy team scores."""
+        block, rows = self._filtered("owner", season, playoffs=playoffs)
+        return [
+            self._owner_week(block, i)
+            for i in rows[_top(block["points"][rows], n, lowest)]
+        ]
+
+    def biggest_blowouts(
+        self, n: int = DEFAULT_TOP_N, season: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Matchups with the largest winning margins, from the winner's side."""
+        block, rows = self._filtered("owner", season)
+        margins = block["points"][rows] - block["opponent_points"][rows]
+        # Each decided matchup appears once with a positive margin
+        rows, margins = rows[margins > 0], margins[margins > 0]
+        best = _top(margins, n)
+        return [
+            {
+                "winner_name": self._owner(block["owner"][i]),
+                "loser_name": self._owner(block["opponent"][i]),
+                "season_id": int(block["season"][i]),
+                "fantasy_week": self.week_labels[block["label"][i]],
+                "winner_points": round(float(block["points"][i]), 2),
+                "loser_points": round(float(block["opponent_points"][i]), 2),
+                "margin": round(float(margin), 2),
+            }
+            for i, margin in zip(rows[best], margins[best])
+        ]
+
+    def top_player_weeks(
+        self,
+        n: int = DEFAULT_TOP_N,
+        season: Optional[int] = None,
+        position: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best single-game fantasy performances by players."""
+        block, rows = self._filtered("player", season, position=position)
+        return [
+            {
+                "player_name": self._player(block["player"][i]),
+                "position": self.positions[block["position"][i]],
+                "season_id": int(block["season"][i]),
+                "game_week": int(block["week"][i]),
+                "total_fantasy_points": round(float(block["points"][i]), 2),
+            }
+            for i in rows[_top(block["points"][rows], n)]
+        ]
+
+    def season_totals(
+        self,
+        kind: str = "owner",
+        n: int = DEFAULT_TOP_N,
+        season: Optional[int] = None,
+        position: Optional[str] = None,
+        playoffs: Optional[bool] = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most points in one season by an owner ("owner") or player ("player").
+        Owners' totals count the regular season unless `playoffs` is None.
+        """
+        block, rows = self._filtered(
+            kind, season, position=position, playoffs=playoffs
+        )
+        starts = self._starts(block, rows)
+        if not len(starts):
+            return []
+        totals = np.add.reduceat(block["points"][rows].astype(np.float64), starts)
+        games = np.diff(np.append(starts, len(rows)))
+        best = _top(totals, n)
+        return [
+            {
+                **self._entity(kind, block, rows[starts[g]]),
+                "season_id": int(block["season"][rows[starts[g]]]),
+                "games": int(games[g]),
+                "total_points": round(float(totals[g]), 2),
+            }
+            for g in best
+        ]
+
+    def best_stretches(
+        self,
+        kind: str = "owner",
+        weeks: int = 3,
+        n: int = DEFAULT_TOP_N,
+        season: Optional[int] = None,
+        position: Optional[str] = None,
+        playoffs: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """Highest rolling sums over `weeks` consecutive games within a season."""
+        weeks = max(1, min(weeks, MAX_STRETCH_WEEKS))
+        block, rows = self._filtered(
+            kind, season, position=position, playoffs=playoffs
+        )
+        if len(rows) < weeks:
+            return []
+        cumulative = np.concatenate(
+            ([0.0], np.cumsum(block["points"][rows], dtype=np.float64))
+        )
+        sums = cumulative[weeks:] - cumulative[:-weeks]
+        group = np.zeros(len(rows), dtype=np.int64)
+        group[self._starts(block, rows)[1:]] = 1
+        group = np.cumsum(group)
+        # A window may not cross from one entity-season into the next
+        valid = np.flatnonzero(group[: len(sums)] == group[weeks - 1 :])
+        best = valid[_top(sums[valid], n)]
+        return [
+            {
+                **self._entity(kind, block, rows[i]),
+                "season_id": int(block["season"][rows[i]]),
+                "first_week": int(block["week"][rows[i]]),
+                "last_week": int(block["week"][rows[i + weeks - 1]]),
+                "weeks": weeks,
+                "total_points": round(float(sums[i]), 2),
+            }
+            for i in best
+        ]
+
+    # --- Helpers ---
+
+    def _block(self, kind: str) -> Optional[ColumnBlock]:
+        if kind not in ("owner", "player"):
+            raise ValueError(f"Unknown kind {kind!r}; use 'owner' or 'player'")
+        return self.owner_weeks if kind == "owner" else self.player_weeks
+
+    def _filtered(
+        self,
+        kind: str,
+        season: Optional[int] = None,
+        position: Optional[str] = None,
+        playoffs: Optional[bool] = None,
+    ) -> Tuple[ColumnBlock, Any]:
+        """
+        One kind's block and the indices of its rows that pass every filter,
+        in order.
+        """
+        block = self._block(kind) if self.ready else None
+        if block is None:
+            raise RuntimeError("League snapshot is not loaded")
+        _count("snapshot_queries")
+        mask = np.ones(len(block), dtype=bool)
+        if season is not None:
+            mask &= block["season"] == season
+        if position is not None and "position" in block.columns:
+            code = position.upper()
+            if code not in self.positions:
+                raise ValueError(f"Unknown position {position!r}")
+            mask &= block["position"] == self.positions.index(code)
+        if playoffs is not None and "playoffs" in block.columns:
+            mask &= block["playoffs"] == playoffs
+        return block, np.flatnonzero(mask)
+
+    @staticmethod
+    def _starts(block: ColumnBlock, rows: Any) -> Any:
+        """Run starts within `rows`; filtering keeps the (entity, season) order."""
+        if len(rows) == len(block):
+            return block.group_starts
+        entity = block[next(iter(block.columns))][rows]
+        return _group_starts(entity, block["season"][rows])
+
+    def _entity(self, kind: str, block: ColumnBlock, i: int) -> Dict[str, Any]:
+        if kind == "owner":
+            return {"owner_name": self._owner(block["owner"][i])}
+        return {
+            "player_name": self._player(block["player"][i]),
+            "position": self.positions[block["position"][i]],
+        }
+
+    def _owner_week(self, block: ColumnBlock, i: int) -> Dict[str, Any]:
+        return {
+            "owner_name": self._owner(block["owner"][i]),
+            "opponent_name": self._owner(block["opponent"][i]),
+            "season_id": int(block["season"][i]),
+            "fantasy_week": self.week_labels[block["label"][i]],
+            "points": round(float(block["points"][i]), 2),
+            "opponent_points": round(float(block["opponent_points"][i]), 2),
+        }
+
+    def _owner(self, owner_id: Any) -> str:
+        return self.owner_names.get(int(owner_id), f"owner {int(owner_id)}")
+
+    def _player(self, player_id: Any) -> str:
+        return self.player_names.get(int(player_id), f"player {int(player_id)}")
+
+
+def _count(name: str) -> None:
+    trace = current_trace()
+    if trace:
+        trace.increment(name)
+
+
+def run_leaderboard(snapshot: LeagueSnapshot, spec: str) -> List[Dict[str, Any]]:
+    """
+    Rows for a `key=value; ...` leaderboard spec, as the agent's tool writes it.
+    Raises ValueError for a bad spec.
+    """
+    args = {
+        key.lower(): value.lower()
+        for key, value in TOOL_ARGUMENT_PATTERN.findall(spec)
+    }
+    metric = args.pop("metric", "")
+    n = max(1, min(int(args.pop("n", DEFAULT_TOP_N)), MAX_TOP_N))
+    season = int(args.pop("season")) if "season" in args else None
+    position = args.pop("position", None)
+    playoffs = {"only": True, "exclude": False}.get(args.pop("playoffs", ""))
+    lowest = args.pop("order", "highest") == "lowest"
+    weeks = int(args.pop("weeks", 3))
+    if args:
+        raise ValueError(f"Unknown arguments: {', '.join(sorted(args))}")
+
+    if metric == "owner_week":
+        return snapshot.top_owner_weeks(n, season, playoffs, lowest)
+    if metric == "blowout":
+        return snapshot.biggest_blowouts(n, season)
+    if metric == "player_week":
+        return snapshot.top_player_weeks(n, season, position)
+    kind, _, aggregate = metric.partition("_")
+    if aggregate == "season":
+        if playoffs is None and kind == "owner":
+            playoffs = False
+        return snapshot.season_totals(kind, n, season, position, playoffs)
+    if aggregate == "stretch":
+        return snapshot.best_stretches(kind, weeks, n, season, position, playoffs)
+    raise ValueError(f"Unknown metric {metric!r}")
+
+
+class LeaderboardTool(BaseTool):
+    """Agent tool answering weekly-score leaderboards from the snapshot."""
+
+    name: str = "league_leaderboard"
+    description: str = (
+        "Instant leaderboards over every weekly fantasy score, computed in memory. "
+        "Prefer it to SQL for 'highest/lowest single-week score', 'biggest "
+        "blowout', 'best single-game player performance', 'most points in a "
+        "season' and 'best N-week stretch'. Input is key=value pairs separated "
+        "by semicolons: metric (owner_week, blowout, player_week, owner_season, "
+        "player_season, owner_stretch or player_stretch), and optionally n (rows, "
+        "default 5), season (e.g. 2019), position (QB, RB, WR, TE, K, DST), weeks "
+        "(stretch length, default 3), playoffs (only or exclude) and order "
+        "(lowest, for owner_week). Example: metric=owner_week; n=3; season=2019"
+    )
+    snapshot: LeagueSnapshot = Field(exclude=True)
+
+    def _run(
+        self,
+        spec: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        if not self.snapshot.ready:
+            return (
+                "Error: the leaderboard snapshot is unavailable; "
+                "use sql_db_query instead."
+            )
+        start = time.perf_counter()
+        try:
+            rows = run_leaderboard(self.snapshot, spec)
+        except RuntimeError as e:
+            return f"Error: {e}; use sql_db_query instead."
+        except ValueError as e:
+            return f"Error: {e}. Example input: metric=owner_week; n=3; season=2019"
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        logger.info(f"Leaderboard {spec.strip()!r} answered in {elapsed_us:.0f}µs")
+        if not rows:
+            return "No matching rows."
+        header = tuple(rows[0])
+        return f"Columns: {header}\n{[tuple(row.values()) for row in rows]}"
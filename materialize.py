@@ -0,0 +1,230 @@
+"""
+Build step for the league database: join-key indexes and materialized views.
+
+Usage:
+    python materialize.py build     # create indexes, materialize all views
+    python materialize.py refresh   # recompute the materialized tables
+    python materialize.py status    # show what is materialized and when
+    python materialize.py drop      # remove materialized tables
+
+The agent keeps querying the view names; connections opened by
+`league_db.create_readonly_engine` shadow each materialized view with a TEMP
+view over its precomputed table.
+"""
+
+import os
+import csv
+import time
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from config import DATA_DICTIONARY_PATH, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZED_SUFFIX = "_MAT"
+METADATA_TABLE = "_materialized_views"
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def load_join_keys(dictionary_path: str = DATA_DICTIONARY_PATH) -> Dict[str, Set[str]]:
+    """Table -> the *_id columns the data dictionary documents for it."""
+    keys: Dict[str, Set[str]] = {}
+    with open(dictionary_path, mode="r", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            column = row["column_name"].strip()
+            if column.endswith("_id"):
+                keys.setdefault(row["table_name"].strip(), set()).add(column)
+    return keys
+
+
+def list_objects(conn: sqlite3.Connection, object_type: str) -> List[str]:
+    """Names of the user tables or views in the main schema."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = ? AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY name",
+        (object_type,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def materialized_views(conn: sqlite3.Connection) -> Dict[str, str]:
+    """View name -> materialized table name, empty if nothing was built."""
+    try:
+        rows = conn.execute(
+            f"SELECT view_name, table_name FROM {METADATA_TABLE}"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {view: table for view, table in rows}
+
+
+def create_indexes(
+    conn: sqlite3.Connection, table: str, join_keys: Set[str]
+) -> List[str]:
+    """
+    Index every join key of `table`, plus (season_id, key) composites that
+    cover the common "filter by season, join on id" access path.
+    """
+    columns = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+    primary_keys = {col[1] for col in columns if col[5]}
+    keys = sorted(
+        col[1] for col in columns if col[1] in join_keys and col[1] not in primary_keys
+    )
+
+    index_columns = [[key] for key in keys]
+    if "season_id" in keys:
+        index_columns += [["season_id", key] for key in keys if key != "season_id"]
+
+    created = []
+    for cols in index_columns:
+        name = f"idx_{table}_{'_'.join(cols)}"
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+            f"({', '.join(_quote(c) for c in cols)})"
+        )
+        created.append(name)
+    return created
+
+
+def materialize_view(conn: sqlite3.Connection, view: str, join_keys: Set[str]) -> int:
+    """(Re)compute `view` into its materialized table atomically. Returns row count."""
+    table = view + MATERIALIZED_SUFFIX
+    staging = table + "_new"
+    start = time.perf_counter()
+
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(staging)}")
+        conn.execute(f"CREATE TABLE {_quote(staging)} AS SELECT * FROM {_quote(view)}")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        conn.execute(f"ALTER TABLE {_quote(staging)} RENAME TO {_quote(table)}")
+        create_indexes(conn, table, join_keys)
+        row_count = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+        conn.execute(
+            f"INSERT OR REPLACE INTO {METADATA_TABLE} "
+            "(view_name, table_name, row_count, refreshed_at) VALUES (?, ?, ?, ?)",
+            (view, table, row_count, datetime.now().isoformat(timespec="seconds")),
+        )
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Materialized {view} -> {table}: {row_count} rows in {elapsed:.2f}s")
+    return row_count
+
+
+def build(
+    db_path: str = DB_PATH,
+    dictionary_path: str = DATA_DICTIONARY_PATH,
+    views: Optional[List[str]] = None,
+) -> None:
+    """Create join-key indexes on base tables and materialize views."""
+    join_keys = load_join_keys(dictionary_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {METADATA_TABLE} ("
+            "view_name TEXT PRIMARY KEY, table_name TEXT NOT NULL, "
+            "row_count INTEGER NOT NULL, refreshed_at TEXT NOT NULL)"
+        )
+
+        already_materialized = set(materialized_views(conn).values())
+        with conn:
+            for table in list_objects(conn, "table"):
+                if table == METADATA_TABLE or table in already_materialized:
+                    continue
+                created = create_indexes(conn, table, join_keys.get(table, set()))
+                if created:
+                    print(f"  {table}: {len(created)} indexes")
+
+        for view in views or list_objects(conn, "view"):
+            rows = materialize_view(conn, view, join_keys.get(view, set()))
+            print(f"  {view} -> {view}{MATERIALIZED_SUFFIX} ({rows} rows)")
+
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def refresh(db_path: str = DB_PATH, dictionary_path: str = DATA_DICTIONARY_PATH):
+    """Recompute every previously materialized view."""
+    conn = sqlite3.connect(db_path)
+    try:
+        views = list(materialized_views(conn))
+    finally:
+        conn.close()
+    if not views:
+        print("Nothing materialized yet; run `python materialize.py build` first.")
+        return
+    build(db_path, dictionary_path, views=views)
+
+
+def drop(db_path: str = DB_PATH) -> None:
+    """Remove the materialized tables so the agent queries the live views again."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for view, table in materialized_views(conn).items():
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                print(f"  dropped {table}")
+            conn.execute(f"DROP TABLE IF EXISTS {METADATA_TABLE}")
+    finally:
+        conn.close()
+
+
+def status(db_path: str = DB_PATH) -> None:
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            rows = conn.execute(
+                f"SELECT view_name, table_name, row_count, refreshed_at "
+                f"FROM {METADATA_TABLE} ORDER BY view_name"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        index_count = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' "
+            "AND name LIKE 'idx_%'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"{db_path}: {index_count} join-key indexes")
+    if not rows:
+        print("No materialized views.")
+    for view, table, row_count, refreshed_at in rows:
+        print(f"  {view} -> {table}: {row_count} rows, refreshed {refreshed_at}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["build", "refresh", "status", "drop"])
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path")
+    parser.add_argument(
+        "--dictionary", default=DATA_DICTIONARY_PATH, help="Data dictionary CSV"
+    )
+    parser.add_argument(
+        "--views", nargs="+", help="Views to materialize (default: all views)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not os.path.exists(args.db):
+        parser.error(f"Database not found at {args.db}")
+
+    if args.command == "build":
+        build(args.db, args.dictionary, args.views)
+    elif args.command == "refresh":
+        refresh(args.db, args.dictionary)
+    elif args.command == "drop":
+        drop(args.db)
+    status(args.db)
+
+
+if __name__ == "__main__":
+    main()
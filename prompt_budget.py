@@ -0,0 +1,176 @@
+"""
+Input-token budgeting for the table selector and agent prompts.
+
+The LLM table selector is shown only the tables the local BM25 index finds
+plausible for the question, plus the core league tables its rules refer to.
+The agent's schema keeps descriptions only for the columns that matter to the
+question (keys, names, and the best-matching columns of wide tables); other
+columns are listed by name so they can still be queried. Estimated tokens
+saved are counted on the request's trace.
+"""
+
+import csv
+import math
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import TABLE_DICTIONARY_PATH
+from conversation_memory import estimate_tokens
+from telemetry import current_trace
+from schema_index import SchemaIndex
+from table_router import TableRouter, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Tables the selector prompt's rules name explicitly; always offered
+CORE_TABLES = (
+    "FantasyOwners_LLM",
+    "FantasySeasons_LLM",
+    "FantasyTeams_LLM",
+    "FantasyMatchups_LLM",
+)
+# Extra candidate tables offered to the LLM selector, by BM25 rank
+MAX_SELECTOR_CANDIDATES = 8
+# Tables with at most this many columns are always described in full
+MAX_DESCRIBED_COLUMNS = 8
+# Otherwise: keys and names, plus this many best-matching columns
+MAX_RANKED_COLUMNS = 6
+# Column names matching these suffixes are join keys or labels; always described
+KEY_COLUMN_SUFFIXES = ("_id", "_name")
+COLUMN_NAME_WEIGHT = 2.0
+
+
+def record_tokens_saved(prompt: str, saved: int) -> None:
+    """Count estimated input tokens saved on the current request's trace."""
+    trace = current_trace()
+    if trace and saved > 0:
+        trace.increment(f"{prompt}_tokens_saved", saved)
+
+
+class PromptBudget:
+    """Per-question pruning of table descriptions and schema column detail."""
+
+    def __init__(
+        self,
+        router: TableRouter,
+        schema_index: SchemaIndex,
+        table_descriptions: Dict[str, str],
+    ):
+        self.router = router
+        self.schema_index = schema_index
+        self.description_lines = {
+            table: f"Table: {table}, Description: {description}"
+            for table, description in table_descriptions.items()
+        }
+        self.all_descriptions = "\n".join(self.description_lines.values())
+        # Recomputed when the schema index reloads its dictionary
+        self._column_idf: Dict[str, float] = {}
+        self._idf_source: Optional[Dict[str, Dict[str, str]]] = None
+
+    @classmethod
+    def from_csv(
+        cls,
+        router: TableRouter,
+        schema_index: SchemaIndex,
+        table_dictionary_path: str = TABLE_DICTIONARY_PATH,
+    ) -> "PromptBudget":
+        table_descriptions: Dict[str, str] = {}
+        try:
+            with open(table_dictionary_path, mode="r", encoding="utf-8") as csvfile:
+                table_descriptions = {
+                    row["table_name"].strip(): row["table_description"]
+                    for row in csv.DictReader(csvfile)
+                }
+        except Exception as e:
+            logger.error(f"Failed to load table dictionary: {e}")
+        return cls(router, schema_index, table_descriptions)
+
+    def table_descriptions(self, question: str) -> Tuple[str, int]:
+        """
+        Descriptions of the candidate tables for the LLM selector, and the
+        tokens saved versus listing every table. Questions with no indexable
+        terms get every table.
+        """
+        scores = self.router.score(tokenize(question, expand=True))
+        if not scores:
+            return self.all_descriptions, 0
+
+        ranked = sorted(scores, key=lambda table: scores[table], reverse=True)
+        keep = set(CORE_TABLES) | set(ranked[:MAX_SELECTOR_CANDIDATES])
+        text = "\n".join(
+            line for table, line in self.description_lines.items() if table in keep
+        )
+        return text, estimate_tokens(self.all_descriptions) - estimate_tokens(text)
+
+    def schema(
+        self, question: str, table_names: List[str]
+    ) -> Tuple[Optional[str], int]:
+        """
+        The agent schema for these tables with column detail pruned to the
+        question, and the tokens saved versus the full schema. None if no
+        table is in the data dictionary.
+        """
+        full_schema = self.schema_index.build_schema(table_names)
+        if full_schema is None:
+            return None, 0
+
+        terms = set(tokenize(question, expand=True))
+        wanted = {name.lower() for name in table_names}
+        described = {
+            table: self._described_columns(terms, columns)
+            for table, columns in self.schema_index.columns.items()
+            if table.lower() in wanted
+        }
+        schema = self.schema_index.build_pruned_schema(table_names, described)
+        if schema is None:
+            return full_schema, 0
+        return schema, estimate_tokens(full_schema) - estimate_tokens(schema)
+
+    def _described_columns(
+        self, terms: Set[str], columns: Dict[str, str]
+    ) -> Set[str]:
+        """Keys and names, plus the columns that best match the question."""
+        if len(columns) <= MAX_DESCRIBED_COLUMNS:
+            return set(columns)
+
+        described = {c for c in columns if c.endswith(KEY_COLUMN_SUFFIXES)}
+        idf = self._idf()
+        scores = {}
+        for column, description in columns.items():
+            if column in described:
+                continue
+            name_terms = set(tokenize(column))
+            description_terms = set(tokenize(description))
+            score = sum(
+                idf.get(term, 0.0)
+                * (
+                    COLUMN_NAME_WEIGHT * (term in name_terms)
+                    + (term in description_terms)
+                )
+                for term in terms
+            )
+            if score > 0:
+                scores[column] = score
+
+        ranked = sorted(scores, key=lambda column: scores[column], reverse=True)
+        described.update(ranked[:MAX_RANKED_COLUMNS])
+        return described
+
+    def _idf(self) -> Dict[str, float]:
+        """Inverse document frequency of terms over every dictionary column."""
+        source = self.schema_index.columns
+        if source is not self._idf_source:
+            document_counts: Counter = Counter()
+            total = 0
+            for columns in source.values():
+                for column, description in columns.items():
+                    terms = set(tokenize(column) + tokenize(description))
+                    document_counts.update(terms)
+                    total += 1
+            self._column_idf = {
+                term: math.log(1 + total / count)
+                for term, count in document_counts.items()
+            }
+            self._idf_source = source
+        return self._column_idf
@@ -0,0 +1,617 @@
+"""
+Fast path for formulaic questions.
+
+Common question shapes ("who won in 2019", "Jake's record against Mike",
+"top 5 quarterbacks in 2021") are matched against a library of parameterized
+templates. Owner and player names are resolved against the in-memory entity
+index (exact and alias matches only), a vetted parameterized query is run
+directly, and the answer is formatted without any LLM call. Anything that
+does not match a template, or names someone who can't be resolved, goes to the
+agent as before. Leaderboards over weekly scores are computed from the
+in-memory league snapshot when it is loaded, and with their SQL otherwise.
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from answer_cache import is_context_independent
+from entity_index import Entity, EntityIndex, QueryRunner
+from league_snapshot import WEEKLY_STAT_TABLES, LeagueSnapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 25
+
+POSITION_TABLES: Dict[str, str] = {
+    "qb": "PlayerStats_Season_QB_LLM",
+    "quarterback": "PlayerStats_Season_QB_LLM",
+    "rb": "PlayerStats_Season_RB_LLM",
+    "running back": "PlayerStats_Season_RB_LLM",
+    "wr": "PlayerStats_Season_WR_LLM",
+    "receiver": "PlayerStats_Season_WR_LLM",
+    "wide receiver": "PlayerStats_Season_WR_LLM",
+    "te": "PlayerStats_Season_TE_LLM",
+    "tight end": "PlayerStats_Season_TE_LLM",
+    "k": "PlayerStats_Season_K_LLM",
+    "kicker": "PlayerStats_Season_K_LLM",
+    "dst": "PlayerStats_Season_DST_LLM",
+    "defense": "PlayerStats_Season_DST_LLM",
+}
+POSITION_LABELS: Dict[str, str] = {
+    "PlayerStats_Season_QB_LLM": "quarterbacks",
+    "PlayerStats_Season_RB_LLM": "running backs",
+    "PlayerStats_Season_WR_LLM": "wide receivers",
+    "PlayerStats_Season_TE_LLM": "tight ends",
+    "PlayerStats_Season_K_LLM": "kickers",
+    "PlayerStats_Season_DST_LLM": "defenses",
+}
+_POSITION_PATTERN = "|".join(
+    sorted((re.escape(name) for name in POSITION_TABLES), key=len, reverse=True)
+)
+_SEASON_SCOPE = (
+    r"(?: ever| all[- ]time| of all[- ]time| in (?:league )?history"
+    r"| across all seasons)?"
+    r"(?: in (?:the )?(?P<season>(?:19|20)\d{2})(?: season)?)?"
+)
+# Slots that shape the SQL text but are not bound as query parameters
+UNBOUND_PARAMS = ("table", "owner", "opponent", "player", "position", "lowest")
+
+
+@dataclass
+class QuestionTemplate:
+    """A question shape, the vetted SQL behind it, and how to phrase the answer."""
+
+    name: str
+    patterns: List[Pattern[str]]
+    # Turns the regex groups into query parameters; None means "not this template"
+    bind: Callable[["TemplateLibrary", Dict[str, str]], Optional[Dict[str, Any]]]
+    # SQL may depend on the parameters (e.g. the position's table), never on raw text
+    sql: Callable[[Dict[str, Any]], str]
+    format: Callable[[Dict[str, Any], List[Dict[str, Any]]], Optional[str]]
+    tables: List[str] = field(default_factory=list)
+    # The same rows computed from the league snapshot, used when it is loaded
+    compute: Optional[
+        Callable[[LeagueSnapshot, Dict[str, Any]], List[Dict[str, Any]]]
+    ] = None
+
+
+@dataclass
+class TemplateAnswer:
+    """An answer produced without the agent."""
+
+    template: str
+    answer: str
+    tables: List[str]
+    sql: str
+    # Rows came from the in-memory snapshot rather than running `sql`
+    from_snapshot: bool = False
+
+
+def _compile(*patterns: str) -> List[Pattern[str]]:
+    return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+
+def _season(groups: Dict[str, str]) -> Dict[str, Any]:
+    return {"season": int(groups["season"])}
+
+
+def _optional_season(groups: Dict[str, str]) -> Dict[str, Any]:
+    return {"season": int(groups["season"]) if groups.get("season") else None}
+
+
+def _scope(params: Dict[str, Any]) -> str:
+    return f"in {params['season']}" if params["season"] else "ever"
+
+
+def _position_code(text: str) -> str:
+    """'quarterback' -> 'QB', via its season stats table."""
+    return POSITION_TABLES[text.lower()].split("_")[-2]
+
+
+def _format_points(value: Any) -> str:
+    return f"{float(value or 0):,.1f}"
+
+
+def _format_percentage(value: Any) -> str:
+    value = float(value or 0)
+    return f"{value * 100 if value <= 1 else value:.1f}%"
+
+
+def _bind_owners(
+    library: "TemplateLibrary", groups: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    owner = library.resolve("owner", groups["owner"])
+    opponent = library.resolve("owner", groups["opponent"])
+    if owner is None or opponent is None or owner.id == opponent.id:
+        return None
+    return {
+        "owner_id": owner.id,
+        "owner": owner.name,
+        "opponent_id": opponent.id,
+        "opponent": opponent.name,
+    }
+
+
+def _bind_top_players(
+    library: "TemplateLibrary", groups: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    count = groups.get("count")
+    limit = 1 if groups.get("single") else int(count) if count else DEFAULT_TOP_N
+    return {
+        "season": int(groups["season"]),
+        "table": POSITION_TABLES[groups["position"].lower()],
+        "limit": max(1, min(limit, MAX_TOP_N)),
+    }
+
+
+def _bind_weekly_score(
+    library: "TemplateLibrary", groups: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    lowest = groups["rank"].lower() in ("lowest", "fewest", "worst")
+    return {**_optional_season(groups), "lowest": lowest}
+
+
+def _bind_player_weeks(
+    library: "TemplateLibrary", groups: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    count = groups.get("count")
+    position = groups.get("position")
+    return {
+        **_optional_season(groups),
+        "position": _position_code(position) if position else None,
+        "limit": max(1, min(int(count), MAX_TOP_N)) if count else 1,
+    }
+
+
+def _bind_player_season(
+    library: "TemplateLibrary", groups: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    player = library.resolve("player", groups["player"])
+    if player is None:
+        return None
+    return {
+        "player_id": player.id,
+        "player": player.name,
+        "season": int(groups["season"]),
+    }
+
+
+def _format_champion(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    row = rows[0]
+    team = f" with {row['fantasy_team_name']}" if row.get("fantasy_team_name") else ""
+    return f"{row['owner_name']} won the {params['season']} championship{team}."
+
+
+def _format_record(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    row = rows[0] if rows else {}
+    games = int(row.get("games") or 0)
+    if not games:
+        return f"{params['owner']} and {params['opponent']} have never played."
+    wins, losses, ties = (int(row.get(key) or 0) for key in ("wins", "losses", "ties"))
+    record = f"{wins}-{losses}" + (f"-{ties}" if ties else "")
+    return (
+        f"{params['owner']} is {record} all-time against {params['opponent']} "
+        f"over {games} games, scoring {_format_points(row['points_for'])} points "
+        f"to {_format_points(row['points_against'])}."
+    )
+
+
+def _format_top_players(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    label = POSITION_LABELS[params["table"]]
+    if params["limit"] == 1:
+        row = rows[0]
+        points = _format_points(row["total_fantasy_points"])
+        return (
+            f"{row['player_name']} scored the most fantasy points among {label} "
+            f"in {params['season']}, with {points}."
+        )
+    lines = [f"Top {len(rows)} {label} by fantasy points in {params['season']}:"]
+    lines.extend(
+        f"{rank}. {row['player_name']} – "
+        f"{_format_points(row['total_fantasy_points'])}"
+        for rank, row in enumerate(rows, start=1)
+    )
+    return "\n".join(lines)
+
+
+def _format_player_season(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return f"{params['player']} has no recorded stats for {params['season']}."
+    row = rows[0]
+    return (
+        f"{params['player']} scored {_format_points(row['total_fantasy_points'])} "
+        f"fantasy points in {params['season']} "
+        f"({_format_points(row['fantasy_points_per_game'])} per game)."
+    )
+
+
+def _format_weekly_score(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    row = rows[0]
+    rank = "lowest" if params["lowest"] else "highest"
+    return (
+        f"The {rank} single-week score {_scope(params)} is "
+        f"{_format_points(row['points'])}, by {row['owner_name']} in "
+        f"{row['fantasy_week']} of {row['season_id']} against "
+        f"{row['opponent_name']} ({_format_points(row['opponent_points'])})."
+    )
+
+
+def _format_blowout(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    row = rows[0]
+    return (
+        f"The biggest blowout {_scope(params)} was {row['winner_name']} beating "
+        f"{row['loser_name']} {_format_points(row['winner_points'])} to "
+        f"{_format_points(row['loser_points'])} in {row['fantasy_week']} of "
+        f"{row['season_id']}, a {_format_points(row['margin'])}-point margin."
+    )
+
+
+def _format_player_weeks(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    among = ""
+    if params["position"]:
+        table = POSITION_TABLES[params["position"].lower()]
+        among = f" among {POSITION_LABELS[table]}"
+    if params["limit"] == 1:
+        row = rows[0]
+        return (
+            f"The best single-game performance{among} {_scope(params)} is "
+            f"{row['player_name']} ({row['position']}) with "
+            f"{_format_points(row['total_fantasy_points'])} fantasy points in week "
+            f"{row['game_week']} of {row['season_id']}."
+        )
+    scope = f" in {params['season']}" if params["season"] else ""
+    lines = [f"Top {len(rows)} single-game performances{among}{scope}:"]
+    lines.extend(
+        f"{rank}. {row['player_name']} ({row['position']}) – "
+        f"{_format_points(row['total_fantasy_points'])}, week {row['game_week']} "
+        f"of {row['season_id']}"
+        for rank, row in enumerate(rows, start=1)
+    )
+    return "\n".join(lines)
+
+
+def _format_leaders(
+    stat: str, describe: Callable[[Any], str]
+) -> Callable[[Dict[str, Any], List[Dict[str, Any]]], Optional[str]]:
+    def format_rows(
+        params: Dict[str, Any], rows: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        if not rows:
+            return None
+        names = [row["owner_name"] for row in rows]
+        if len(names) == 1:
+            leader, verb = names[0], "has"
+        else:
+            leader, verb = ", ".join(names[:-1]) + f" and {names[-1]}", "are tied with"
+        return f"{leader} {verb} {describe(rows[0][stat])}."
+
+    return format_rows
+
+
+def _format_standings(
+    params: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> Optional[str]:
+    if not rows:
+        return None
+    lines = [f"{params['season']} regular season standings:"]
+    for row in rows:
+        ties = row["regular_season_ties"]
+        record = f"{row['regular_season_wins']}-{row['regular_season_losses']}" + (
+            f"-{ties}" if ties else ""
+        )
+        lines.append(
+            f"{row['regular_season_finish_position']}. {row['owner_name']} "
+            f"({row['fantasy_team_name']}) – {record}, "
+            f"{_format_points(row['regular_season_points_for'])} PF"
+        )
+    return "\n".join(lines)
+
+
+TEMPLATES: List[QuestionTemplate] = [
+    QuestionTemplate(
+        name="season_champion",
+        patterns=_compile(
+            r"^who won (?:the )?(?:league |championship |title |ship )?(?:in )?(?P<season>(?:19|20)\d{2})\??$",
+            r"^who (?:was|is) the (?P<season>(?:19|20)\d{2}) (?:league )?champion\??$",
+            r"^who was (?:the )?(?:league )?champion in (?P<season>(?:19|20)\d{2})\??$",
+            r"^who won the (?P<season>(?:19|20)\d{2}) (?:championship|title|league)\??$",
+        ),
+        bind=lambda library, groups: _season(groups),
+        sql=lambda params: (
+            "SELECT o.owner_name, t.fantasy_team_name "
+            "FROM FantasySeasons_LLM s "
+            "JOIN FantasyOwners_LLM o ON o.owner_id = s.champion_owner_id "
+            "LEFT JOIN FantasyTeams_LLM t ON t.fantasy_team_id = s.champion_team_id "
+            "WHERE s.season_id = :season"
+        ),
+        format=_format_champion,
+        tables=["FantasySeasons_LLM", "FantasyOwners_LLM", "FantasyTeams_LLM"],
+    ),
+    QuestionTemplate(
+        name="head_to_head_record",
+        patterns=_compile(
+            r"^(?:what is |what's |whats )?(?P<owner>[\w .'-]+?)(?:'s)? (?:all[- ]time |career |overall |head[- ]to[- ]head )?record (?:against|vs\.?|versus) (?P<opponent>[\w .'-]+?)\??$",
+            r"^(?:what is |what's |whats )?(?:the )?(?:all[- ]time |career |head[- ]to[- ]head )?record (?:of|for|between) (?P<owner>[\w .'-]+?) (?:vs\.?|versus|against|and) (?P<opponent>[\w .'-]+?)\??$",
+        ),
+        bind=_bind_owners,
+        sql=lambda params: (
+            "SELECT COUNT(*) AS games, "
+            "SUM(winning_owner_id = :owner_id) AS wins, "
+            "SUM(winning_owner_id = :opponent_id) AS losses, "
+            "SUM(tie) AS ties, "
+            "SUM(CASE WHEN owner1_id = :owner_id THEN owner1_score "
+            "ELSE owner2_score END) AS points_for, "
+            "SUM(CASE WHEN owner1_id = :owner_id THEN owner2_score "
+            "ELSE owner1_score END) AS points_against "
+            "FROM HeadToHeadMatchups_LLM "
+            "WHERE (owner1_id = :owner_id AND owner2_id = :opponent_id) "
+            "OR (owner1_id = :opponent_id AND owner2_id = :owner_id)"
+        ),
+        format=_format_record,
+        tables=["HeadToHeadMatchups_LLM", "FantasyOwners_LLM"],
+    ),
+    QuestionTemplate(
+        name="top_players_by_position",
+        patterns=_compile(
+            rf"^(?:who were |show (?:me )?|list )?(?:the )?top (?P<count>\d+ )?(?P<position>{_POSITION_PATTERN})s? (?:scorers )?(?:by fantasy points )?(?:in|of|from|during) (?:the )?(?P<season>(?:19|20)\d{{2}})(?: season)?\??$",
+            rf"^(?P<single>which|what|who was the) (?P<position>{_POSITION_PATTERN}) scored the most (?:fantasy )?points (?:in|during) (?:the )?(?P<season>(?:19|20)\d{{2}})(?: season)?\??$",
+        ),
+        bind=_bind_top_players,
+        sql=lambda params: (
+            f"SELECT p.player_name, s.total_fantasy_points FROM {params['table']} s "
+            "JOIN Players_LLM p ON p.player_id = s.player_id "
+            "WHERE s.season_id = :season "
+            "ORDER BY s.total_fantasy_points DESC LIMIT :limit"
+        ),
+        format=_format_top_players,
+        tables=["Players_LLM"],
+    ),
+    QuestionTemplate(
+        name="player_season_points",
+        patterns=_compile(
+            r"^how many (?:fantasy )?points did (?P<player>[\w .'-]+?) (?:score|have|get) in (?:the )?(?P<season>(?:19|20)\d{2})(?: season)?\??$",
+        ),
+        bind=_bind_player_season,
+        sql=lambda params: " UNION ALL ".join(
+            "SELECT total_fantasy_points, fantasy_points_per_game "
+            f"FROM {table} WHERE player_id = :player_id AND season_id = :season"
+            for table in POSITION_LABELS
+        ),
+        format=_format_player_season,
+        tables=["Players_LLM", *POSITION_LABELS],
+    ),
+    QuestionTemplate(
+        name="most_championships",
+        patterns=_compile(
+            r"^(?:which owner|who) (?:has )?(?:won )?(?:the )?most (?:championships|titles|chips)(?: all[- ]time| ever)?\??$",
+        ),
+        bind=lambda library, groups: {},
+        sql=lambda params: (
+            "SELECT owner_name, championships_won FROM OwnerCareerLeaderboard_LLM "
+            "WHERE championships_won = "
+            "(SELECT MAX(championships_won) FROM OwnerCareerLeaderboard_LLM) "
+            "ORDER BY owner_name"
+        ),
+        format=_format_leaders(
+            "championships_won",
+            lambda value: f"the most championships ({int(value or 0)})",
+        ),
+        tables=["OwnerCareerLeaderboard_LLM"],
+    ),
+    QuestionTemplate(
+        name="best_win_percentage",
+        patterns=_compile(
+            r"^(?:which owner|who) (?:has|had) the (?:best|highest) (?:all[- ]time |career )?win(?:ning)? (?:percentage|pct|%)\??$",
+        ),
+        bind=lambda library, groups: {},
+        sql=lambda params: (
+            "SELECT owner_name, career_win_percentage FROM OwnerCareerLeaderboard_LLM "
+            "WHERE career_win_percentage = "
+            "(SELECT MAX(career_win_percentage) FROM OwnerCareerLeaderboard_LLM) "
+            "ORDER BY owner_name"
+        ),
+        format=_format_leaders(
+            "career_win_percentage",
+            lambda value: (
+                f"the best career win percentage ({_format_percentage(value)})"
+            ),
+        ),
+        tables=["OwnerCareerLeaderboard_LLM"],
+    ),
+    QuestionTemplate(
+        name="season_standings",
+        patterns=_compile(
+            r"^(?:show (?:me )?|list |what were )?(?:the )?(?P<season>(?:19|20)\d{2}) (?:regular season )?standings\??$",
+            r"^(?:show (?:me )?|list |what were )?(?:the )?(?:regular season )?standings (?:for|in|from) (?:the )?(?P<season>(?:19|20)\d{2})(?: season)?\??$",
+        ),
+        bind=lambda library, groups: _season(groups),
+        sql=lambda params: (
+            "SELECT regular_season_finish_position, owner_name, fantasy_team_name, "
+            "regular_season_wins, regular_season_losses, regular_season_ties, "
+            "regular_season_points_for FROM RegularSeasonStandings_LLM "
+            "WHERE season_id = :season ORDER BY regular_season_finish_position"
+        ),
+        format=_format_standings,
+        tables=["RegularSeasonStandings_LLM"],
+    ),
+    QuestionTemplate(
+        name="highest_weekly_score",
+        patterns=_compile(
+            rf"^(?:what (?:is|was) |who (?:has|had) )?the (?P<rank>highest|most|best|lowest|fewest|worst) (?:single[- ]week|weekly|one[- ]week) (?:score|points|total){_SEASON_SCOPE}\??$",
+            rf"^(?:who (?:scored|has scored) )?(?:the )?(?P<rank>most) points in a (?:single|one) week{_SEASON_SCOPE}\??$",
+        ),
+        bind=_bind_weekly_score,
+        sql=lambda params: (
+            "SELECT o.owner_name, p.owner_name AS opponent_name, w.season_id, "
+            "w.fantasy_week, w.points, w.opponent_points FROM ("
+            "SELECT home_owner_id AS owner_id, away_owner_id AS opponent_id, "
+            "season_id, fantasy_week, home_score AS points, "
+            "away_score AS opponent_points FROM FantasyMatchups_LLM UNION ALL "
+            "SELECT away_owner_id, home_owner_id, season_id, fantasy_week, "
+            "away_score, home_score FROM FantasyMatchups_LLM) w "
+            "JOIN FantasyOwners_LLM o ON o.owner_id = w.owner_id "
+            "JOIN FantasyOwners_LLM p ON p.owner_id = w.opponent_id "
+            "WHERE (:season IS NULL OR w.season_id = :season) "
+            f"ORDER BY w.points {'ASC' if params['lowest'] else 'DESC'} LIMIT 1"
+        ),
+        format=_format_weekly_score,
+        tables=["FantasyMatchups_LLM", "FantasyOwners_LLM"],
+        compute=lambda snapshot, params: snapshot.top_owner_weeks(
+            1, params["season"], lowest=params["lowest"]
+        ),
+    ),
+    QuestionTemplate(
+        name="biggest_blowout",
+        patterns=_compile(
+            rf"^(?:what (?:is|was) )?the (?:biggest|largest) (?:blowout|margin of victory|win){_SEASON_SCOPE}\??$",
+        ),
+        bind=lambda library, groups: _optional_season(groups),
+        sql=lambda params: (
+            "SELECT w.owner_name AS winner_name, l.owner_name AS loser_name, "
+            "m.season_id, m.fantasy_week, "
+            "MAX(m.home_score, m.away_score) AS winner_points, "
+            "MIN(m.home_score, m.away_score) AS loser_points, "
+            "ABS(m.home_score - m.away_score) AS margin "
+            "FROM FantasyMatchups_LLM m "
+            "JOIN FantasyOwners_LLM w ON w.owner_id = m.winning_owner_id "
+            "JOIN FantasyOwners_LLM l ON l.owner_id = m.losing_owner_id "
+            "WHERE m.tie = 0 AND (:season IS NULL OR m.season_id = :season) "
+            "ORDER BY margin DESC LIMIT 1"
+        ),
+        format=_format_blowout,
+        tables=["FantasyMatchups_LLM", "FantasyOwners_LLM"],
+        compute=lambda snapshot, params: snapshot.biggest_blowouts(
+            1, params["season"]
+        ),
+    ),
+    QuestionTemplate(
+        name="top_player_weeks",
+        patterns=_compile(
+            rf"^(?:what (?:is|was|were) |show (?:me )?|list )?(?:the )?(?:best|highest[- ]scoring|top (?P<count>\d+)) (?:single[- ](?:week|game)|one[- ]week) (?:fantasy )?(?:performances?|games?)(?: (?:by|for|from|among) (?:an? |the )?(?P<position>{_POSITION_PATTERN})s?)?{_SEASON_SCOPE}\??$",
+        ),
+        bind=_bind_player_weeks,
+        sql=lambda params: (
+            "SELECT p.player_name, w.position, w.season_id, w.game_week, "
+            "w.total_fantasy_points FROM ("
+            + " UNION ALL ".join(
+                f"SELECT player_id, '{code}' AS position, season_id, game_week, "
+                f"total_fantasy_points FROM {table}"
+                for code, table in WEEKLY_STAT_TABLES.items()
+                if params["position"] in (None, code)
+            )
+            + ") w JOIN Players_LLM p ON p.player_id = w.player_id "
+            "WHERE (:season IS NULL OR w.season_id = :season) "
+            "ORDER BY w.total_fantasy_points DESC LIMIT :limit"
+        ),
+        format=_format_player_weeks,
+        tables=["Players_LLM", *WEEKLY_STAT_TABLES.values()],
+        compute=lambda snapshot, params: snapshot.top_player_weeks(
+            params["limit"], params["season"], params["position"]
+        ),
+    ),
+]
+
+
+class TemplateLibrary:
+    """
+    Matches questions against TEMPLATES and answers them with one SQL query.
+
+    Names are resolved through the shared entity index, which loads itself
+    from the database on first use.
+    """
+
+    def __init__(
+        self,
+        run_query: QueryRunner,
+        entities: Optional[EntityIndex] = None,
+        templates: Optional[List[QuestionTemplate]] = None,
+        snapshot: Optional[LeagueSnapshot] = None,
+    ):
+        self.run_query = run_query
+        self.entities = entities if entities is not None else EntityIndex(run_query)
+        self.templates = TEMPLATES if templates is None else templates
+        self.snapshot = snapshot
+
+    def resolve(self, kind: str, text: str) -> Optional[Entity]:
+        """
+        The owner or player a slot names. Fuzzy matches are not trusted here:
+        a template answer is never reviewed by the agent.
+        """
+        match = self.entities.lookup(text, kind, fuzzy=False)
+        return match.entity if match else None
+
+    def match(self, question: str) -> Optional[Tuple[QuestionTemplate, Dict[str, Any]]]:
+        """The first template whose pattern matches and whose slots all resolve."""
+        if not is_context_independent(question):
+            return None
+        text = " ".join(question.strip().split())
+        for template in self.templates:
+            for pattern in template.patterns:
+                found = pattern.match(text)
+                if not found:
+                    continue
+                groups = {k: v.strip() for k, v in found.groupdict().items() if v}
+                params = template.bind(self, groups)
+                if params is not None:
+                    return template, params
+        return None
+
+    def answer(self, question: str) -> Optional[TemplateAnswer]:
+        """Answer from a template, or None to fall back to the agent."""
+        try:
+            matched = self.match(question)
+            if matched is None:
+                return None
+            template, params = matched
+            sql_params = {
+                key: value
+                for key, value in params.items()
+                if key not in UNBOUND_PARAMS
+            }
+            sql = template.sql(params)
+            from_snapshot = bool(
+                template.compute and self.snapshot and self.snapshot.ready
+            )
+            if from_snapshot:
+                rows = template.compute(self.snapshot, params)
+            else:
+                rows = self.run_query(sql, sql_params)
+            answer = template.format(params, rows)
+        except Exception as e:
+            logger.warning(f"Template fast path failed for {question!r}: {e}")
+            return None
+        if answer is None:
+            return None
+        logger.info(
+            f"Answered {question!r} from template {template.name}"
+            + (" (snapshot)" if from_snapshot else "")
+        )
+        tables = [*template.tables, *([params["table"]] if "table" in params else [])]
+        return TemplateAnswer(template.name, answer, tables, sql, from_snapshot)
@@ -0,0 +1,206 @@
+import os
+import csv
+import time
+import logging
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from cache_registry import BoundedCache
+from config import DATA_DICTIONARY_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_HEADER = "\n".join(
+    [
+        "=" * 70,
+        "DATABASE SCHEMA - AVAILABLE TABLES AND COLUMNS",
+        "=" * 70,
+        "",
+        "These are the ONLY tables and columns you can use:",
+        "",
+        "",
+    ]
+)
+SCHEMA_FOOTER = "\n".join(
+    [
+        "=" * 70,
+        "IMPORTANT: Do not reference any tables or columns not listed above.",
+        "=" * 70,
+    ]
+)
+
+# How often (seconds) to stat the dictionary file for changes
+RELOAD_CHECK_INTERVAL = 2.0
+MAX_CACHED_SCHEMAS = 256
+# Question-pruned schemas vary with the question's terms, so keep more of them
+MAX_CACHED_PRUNED_SCHEMAS = 1024
+
+# Tables, plus each table's described columns
+PrunedKey = Tuple[FrozenSet[str], FrozenSet[Tuple[str, FrozenSet[str]]]]
+
+
+def canonical_tables(table_names: Iterable[str]) -> FrozenSet[str]:
+    """Order- and case-insensitive key for a set of table names."""
+    return frozenset(name.strip().lower() for name in table_names)
+
+
+def _table_fragment(
+    table: str, columns: Dict[str, str], described: Optional[Set[str]] = None
+) -> str:
+    """One table's schema block; columns outside `described` are listed by name."""
+    lines = [f"📊 Table: {table}"]
+    lines.extend(
+        f"  • {column}: {description}"
+        for column, description in columns.items()
+        if described is None or column in described
+    )
+    others = [c for c in columns if described is not None and c not in described]
+    if others:
+        lines.append(f"  • Other columns: {', '.join(others)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class SchemaIndex:
+    """
+    The data dictionary, parsed once into one prebuilt schema fragment per table.
+
+    `build_schema` joins the fragments for the requested tables and memoizes the
+    result on the canonical set of names, so [A, B] and [B, A] share an entry.
+    The CSV is re-read automatically when its modification time changes.
+    """
+
+    def __init__(self, filepath: str = DATA_DICTIONARY_PATH):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._last_check = 0.0
+        self.table_order: List[str] = []
+        self.columns: Dict[str, Dict[str, str]] = {}
+        self._fragments: Dict[str, str] = {}
+        self._schemas: BoundedCache[FrozenSet[str], str] = BoundedCache(
+            "schemas", MAX_CACHED_SCHEMAS
+        )
+        self._pruned: BoundedCache[PrunedKey, str] = BoundedCache(
+            "pruned_schemas", MAX_CACHED_PRUNED_SCHEMAS
+        )
+        self._reload_if_changed(force=True)
+
+    def _reload_if_changed(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+
+        try:
+            mtime = os.stat(self.filepath).st_mtime_ns
+        except OSError:
+            if self._mtime is not None or force:
+                logger.error(f"Data dictionary file not found at {self.filepath}")
+            mtime = None
+        if mtime == self._mtime and not force:
+            return
+
+        self._load(mtime)
+
+    def _load(self, mtime: Optional[int]) -> None:
+        """Parse the CSV into per-table fragments and drop memoized schemas."""
+        columns: Dict[str, Dict[str, str]] = {}
+        if mtime is not None:
+            try:
+                with open(self.filepath, mode="r", encoding="utf-8") as csvfile:
+                    for row in csv.DictReader(csvfile):
+                        table = row["table_name"].strip()
+                        columns.setdefault(table, {})[row["column_name"]] = row[
+                            "column_description"
+                        ]
+            except Exception as e:
+                logger.error(f"Error reading {self.filepath}: {e}", exc_info=True)
+                return
+
+        fragments = {
+            table.lower(): _table_fragment(table, table_columns)
+            for table, table_columns in columns.items()
+        }
+
+        self.table_order = list(columns)
+        self.columns = columns
+        self._fragments = fragments
+        self._schemas.clear()
+        self._pruned.clear()
+        self._mtime = mtime
+        logger.info(
+            f"Loaded data dictionary {self.filepath}: {len(columns)} tables, "
+            f"{sum(len(c) for c in columns.values())} columns"
+        )
+
+    def build_schema(self, table_names: Iterable[str]) -> Optional[str]:
+        """
+        Returns the formatted schema for the given tables, or None if none of
+        them are described in the data dictionary.
+        """
+        key = canonical_tables(table_names)
+        with self._lock:
+            self._reload_if_changed()
+
+            schema = self._schemas.get(key)
+            if schema is not None:
+                return schema
+
+            parts = [
+                self._fragments[table.lower()]
+                for table in self.table_order
+                if table.lower() in key
+            ]
+            if not parts:
+                return None
+
+            schema = SCHEMA_HEADER + "".join(parts) + SCHEMA_FOOTER
+            self._schemas.put(key, schema)
+            return schema
+
+    def build_pruned_schema(
+        self, table_names: Iterable[str], described: Dict[str, Set[str]]
+    ) -> Optional[str]:
+        """
+        Like `build_schema`, but only the columns in `described[table]` keep
+        their descriptions; the rest of a table's columns are listed by name.
+        Tables missing from `described` are shown in full. Memoized on the
+        tables and the described columns, so a prefetched schema is reused.
+        """
+        key = canonical_tables(table_names)
+        pruned_key = (
+            key,
+            frozenset(
+                (table.lower(), frozenset(columns))
+                for table, columns in described.items()
+                if table.lower() in key
+            ),
+        )
+        with self._lock:
+            self._reload_if_changed()
+            schema = self._pruned.get(pruned_key)
+            if schema is not None:
+                return schema
+
+            parts = [
+                _table_fragment(table, self.columns[table], described.get(table))
+                for table in self.table_order
+                if table.lower() in key
+            ]
+            if not parts:
+                return None
+
+            schema = SCHEMA_HEADER + "".join(parts) + SCHEMA_FOOTER
+            self._pruned.put(pruned_key, schema)
+            return schema
+
+    def clear(self) -> None:
+        """Drop memoized schemas; the dictionary itself stays loaded."""
+        self._schemas.clear()
+        self._pruned.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._schemas.stats()
+
+    def pruned_stats(self) -> Dict[str, Any]:
+        return self._pruned.stats()
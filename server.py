@@ -0,0 +1,143 @@
+"""
+Headless HTTP/JSON API for the Oracle.
+
+Usage:
+    python server.py --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /ask           {"question": "...", "history": "..."} -> answer JSON
+    POST /ask/stream    same body -> newline-delimited JSON events
+    GET  /stats         cache hit rates, per-stage latency percentiles, startup times
+    POST /invalidate    drop every shared cache, e.g. right after a data refresh
+    GET  /health
+
+Questions are answered concurrently on one event loop: LLM calls are awaited
+with `ainvoke`/`astream` and SQLite work runs on the engine's thread pool.
+The server keeps no conversation state: each client sends its own history, and
+only caches derived from the database are shared between clients.
+"""
+
+import json
+import asyncio
+import logging
+import argparse
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from engine import OracleEngine
+from startup import STARTUP
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# Questions answered at once; the rest wait their turn
+MAX_CONCURRENT_QUESTIONS = 32
+
+
+class AskRequest(BaseModel):
+    question: str = Field(min_length=1)
+    history: str = Field(default="", description="Prior conversation, as text")
+    router_context: Optional[str] = Field(
+        default=None,
+        description="Seasons/owners/teams mentioned so far, for the table selector",
+    )
+
+
+class AskResponse(BaseModel):
+    answer: str
+    source: str
+    tables: List[str]
+    reasoning: str
+    schema_text: str = Field(alias="schema")
+    error: Optional[str]
+    times_asked: int
+    request_id: str
+    sql: List[str]
+    rate_limited: bool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    with STARTUP.phase("engine_init"):
+        app.state.engine = OracleEngine(verbose=False)
+    STARTUP.mark("engine_ready")
+    app.state.slots = asyncio.Semaphore(MAX_CONCURRENT_QUESTIONS)
+    # Serve right away; the agent and name index finish loading in the background
+    warm_up = asyncio.get_running_loop().run_in_executor(
+        None, app.state.engine.warm_up
+    )
+    warm_up.add_done_callback(lambda _: STARTUP.mark("warm"))
+    logger.info("Oracle engine ready")
+    yield
+    app.state.engine.sqlite_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="Fantasy Football Oracle API", lifespan=lifespan)
+
+
+@app.post("/ask", response_model=AskResponse)
+async def ask(body: AskRequest, request: Request) -> Dict[str, Any]:
+    engine: OracleEngine = request.app.state.engine
+    async with request.app.state.slots:
+        result = await engine.aanswer(
+            body.question, body.history, body.router_context
+        )
+    return asdict(result)
+
+
+@app.post("/ask/stream")
+async def ask_stream(body: AskRequest, request: Request) -> StreamingResponse:
+    engine: OracleEngine = request.app.state.engine
+
+    async def events() -> AsyncIterator[str]:
+        async with request.app.state.slots:
+            async for event in engine.astream_answer(
+                body.question, body.history, body.router_context
+            ):
+                yield json.dumps(event) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/stats")
+def stats(request: Request) -> Dict[str, Any]:
+    # Sync: reads the answer cache's SQLite file, so FastAPI runs it in a thread
+    return request.app.state.engine.stats()
+
+
+@app.post("/invalidate")
+def invalidate(request: Request) -> Dict[str, Any]:
+    # Sync: clears the SQLite-backed caches; names and the snapshot reload in the
+    # background
+    engine: OracleEngine = request.app.state.engine
+    engine.invalidate_caches("POST /invalidate")
+    return engine.caches.stats()["invalidations"]
+
+
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Replies to greetings and thanks without touching the database or the LLM.
+
+Kept free of heavy imports so a client can answer "hi" before the engine (and
+LangChain) has been loaded.
+"""
+
+from typing import Optional, Set
+
+GREETINGS: Set[str] = {"hello", "hi", "hey"}
+THANKS: Set[str] = {"thanks", "thank"}
+
+
+def route_query(query: str) -> Optional[str]:
+    """Handle simple queries that don't need database access."""
+    query_words: Set[str] = set(query.lower().split())
+
+    if GREETINGS.intersection(query_words):
+        return "Hello! How can I help you with your fantasy league data?"
+    if THANKS.intersection(query_words):
+        return "You're welcome!"
+    return None
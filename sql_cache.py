@@ -0,0 +1,323 @@
+import re
+import time
+import asyncio
+import contextvars
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+from pydantic import Field
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+
+from answer_cache import file_fingerprint
+from telemetry import current_trace
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "sql_cache.db"
+MAX_MEMORY_ENTRIES = 256
+MAX_DISK_ENTRIES = 5000
+
+# Strings, quoted identifiers, numbers, words, and single punctuation characters
+SQL_TOKEN_PATTERN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|\d+(?:\.\d+)?|\w+|<>|!=|<=|>=|\|\||\S"""
+)
+# Keywords that can never be a table alias
+SQL_KEYWORDS = {
+    "select",
+    "from",
+    "where",
+    "join",
+    "inner",
+    "left",
+    "right",
+    "outer",
+    "cross",
+    "full",
+    "natural",
+    "on",
+    "using",
+    "group",
+    "order",
+    "by",
+    "having",
+    "limit",
+    "offset",
+    "union",
+    "intersect",
+    "except",
+    "as",
+    "and",
+    "or",
+    "not",
+    "with",
+    "case",
+    "when",
+    "then",
+    "else",
+    "end",
+    "in",
+    "is",
+    "null",
+    "like",
+    "between",
+    "asc",
+    "desc",
+    "distinct",
+    "all",
+    "window",
+}
+
+
+def _strip_markdown(query: str) -> str:
+    """Remove the ```sql fences and trailing semicolons LLMs like to add."""
+    query = query.strip()
+    query = re.sub(r"^```(?:sql|sqlite)?\s*", "", query, flags=re.IGNORECASE)
+    query = re.sub(r"\s*```$", "", query)
+    return query.strip().rstrip(";").strip()
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Canonical form of a SQL query for cache lookups.
+
+    Tokenizes the query, lowercases everything except string literals,
+    collapses whitespace, and renames table aliases to t0, t1, ... in order of
+    appearance, so `SELECT T2.owner_name FROM X AS T1 JOIN Y AS T2 ...` and
+    `select o.owner_name from X s join Y o ...` share a cache entry.
+    """
+    tokens = SQL_TOKEN_PATTERN.findall(_strip_markdown(query))
+    # String literals keep their case: SQLite compares them case-sensitively
+    tokens = [t if t[0] in "'\"" else t.lower() for t in tokens]
+
+    # Find alias declarations: FROM/JOIN <table> [AS] <alias>
+    aliases: Dict[str, str] = {}
+    for i, token in enumerate(tokens):
+        if token not in ("from", "join") or i + 2 >= len(tokens):
+            continue
+        j = i + 2
+        if tokens[j] == "as" and j + 1 < len(tokens):
+            j += 1
+        candidate = tokens[j]
+        if (
+            re.fullmatch(r"[a-z_]\w*", candidate)
+            and candidate not in SQL_KEYWORDS
+            and candidate not in aliases
+        ):
+            aliases[candidate] = f"t{len(aliases)}"
+
+    def follows_table(i: int) -> bool:
+        """Whether tokens[i] comes right after FROM/JOIN <table>."""
+        # Bounds-checked: a negative index would wrap to the end of the query
+        return i >= 2 and tokens[i - 2] in ("from", "join")
+
+    if aliases:
+        canonical: List[str] = []
+        for i, token in enumerate(tokens):
+            is_declaration = token in aliases and (
+                follows_table(i) or (follows_table(i - 1) and tokens[i - 1] == "as")
+            )
+            is_reference = (
+                token in aliases and i + 1 < len(tokens) and tokens[i + 1] == "."
+            )
+            # "FROM X AS a" and "FROM X a" are the same query
+            if (
+                token == "as"
+                and follows_table(i)
+                and i + 1 < len(tokens)
+                and tokens[i + 1] in aliases
+            ):
+                continue
+            canonical.append(
+                aliases[token] if is_declaration or is_reference else token
+            )
+        tokens = canonical
+
+    return " ".join(tokens)
+
+
+class SQLResultCache:
+    """
+    Two-level cache of query results keyed on normalized SQL.
+
+    A small in-memory LRU answers repeated queries in microseconds; a larger
+    SQLite file keeps results across restarts. Both levels are cleared when the
+    league database file changes.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = MAX_MEMORY_ENTRIES,
+        max_disk_entries: int = MAX_DISK_ENTRIES,
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._fingerprint: Optional[str] = None
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _check_db_fingerprint(self) -> None:
+        current = file_fingerprint(self.db_path)
+        if current == self._fingerprint:
+            return
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'db_fingerprint'"
+        ).fetchone()
+        if row is None or row[0] != current:
+            if row is not None:
+                logger.info(f"Database {self.db_path} changed, clearing SQL cache")
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('db_fingerprint', ?)",
+                (current,),
+            )
+            self._conn.commit()
+        self._memory.clear()
+        self._fingerprint = current
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached result for a normalized query, or None."""
+        with self._lock:
+            self._check_db_fingerprint()
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return result
+
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, result: str) -> None:
+        """Store the result for a normalized query in both levels."""
+        with self._lock:
+            self._check_db_fingerprint()
+            self._remember(key, result)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, last_access) "
+                "VALUES (?, ?, ?)",
+                (key, result, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, result: str) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every cached result from both levels and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process and the size of both levels."""
+        with self._lock:
+            disk_entries = self._conn.execute(
+                "SELECT COUNT(*) FROM results"
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "disk_entries": disk_entries,
+            "max_disk_entries": self.max_disk_entries,
+        }
+
+
+class CachedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """QuerySQLDatabaseTool that serves repeated queries from a SQLResultCache."""
+
+    cache: SQLResultCache = Field(exclude=True)
+    # Thread pool for the blocking query when the agent runs asynchronously
+    executor: Optional[Executor] = Field(default=None, exclude=True)
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        """Execute the query (or reuse a cached result), return results or an error."""
+        key = normalize_sql(query)
+        start = time.perf_counter()
+        cached = self.cache.get(key)
+        trace = current_trace()
+        if cached is not None:
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            logger.info(f"SQL cache HIT ({elapsed_us:.0f}µs): {key}")
+            if trace:
+                trace.add_span("sql", elapsed_us / 1000, cache_hit=True)
+                trace.increment("sql_cache_hits")
+            return cached
+
+        if trace:
+            trace.increment("sql_cache_misses")
+
+        result = self.db.run_no_throw(query)
+        # Errors and timeouts are not cached so the agent can retry them
+        if isinstance(result, str) and not result.startswith("Error:"):
+            self.cache.put(key, result)
+        logger.info(f"SQL cache MISS: {key}")
+        return result
+
+    async def _arun(
+        self,
+        query: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        """Run the query on the tool's executor without blocking the event loop."""
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: context.run(self._run, query)
+        )
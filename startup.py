@@ -0,0 +1,116 @@
+"""
+Lazy construction of the Oracle engine, and a report of what startup cost.
+
+Importing `engine` pulls in LangChain, SQLAlchemy and the Gemini client, which
+dominates cold starts. `LazyEngine` defers that import and the engine itself
+until the first question that needs them, and can warm everything up on a
+background thread once the UI is visible. `STARTUP` records how long each
+phase took, and when milestones were reached relative to this module's import.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional
+
+if TYPE_CHECKING:
+    from engine import OracleEngine
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to skip the background warm-up
+WARM_UP_ENV = "ORACLE_WARM_UP"
+
+
+class StartupReport:
+    """Durations of startup phases and times to milestones, in milliseconds."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._milestones: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block of startup work."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                self._phases[name] = elapsed
+
+    def mark(self, name: str) -> None:
+        """Record the first time a milestone (e.g. "first_render") is reached."""
+        elapsed = round((time.perf_counter() - self.started) * 1000, 1)
+        with self._lock:
+            if name in self._milestones:
+                return
+            self._milestones[name] = elapsed
+        logger.info(f"Startup milestone {name} reached after {elapsed:.0f} ms")
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                "phases_ms": dict(self._phases),
+                "milestones_ms": dict(self._milestones),
+            }
+
+
+# One report per process
+STARTUP = StartupReport()
+
+
+class LazyEngine:
+    """
+    An `OracleEngine` built on the first call to `get`. Thread-safe: callers
+    that arrive during construction wait for the one engine.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], "OracleEngine"]] = None):
+        self.factory = factory
+        self._engine: Optional["OracleEngine"] = None
+        self._lock = threading.Lock()
+        self._warm_up_thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._engine is not None
+
+    def get(self) -> "OracleEngine":
+        with self._lock:
+            if self._engine is None:
+                factory = self.factory
+                if factory is None:
+                    with STARTUP.phase("import_engine"):
+                        from engine import OracleEngine
+                    factory = OracleEngine
+                with STARTUP.phase("engine_init"):
+                    self._engine = factory()
+                STARTUP.mark("engine_ready")
+            return self._engine
+
+    def warm_up_in_background(self) -> None:
+        """Build and warm up the engine on a daemon thread, once per process."""
+        if os.getenv(WARM_UP_ENV, "1") == "0":
+            return
+        with self._lock:
+            if self._warm_up_thread is not None:
+                return
+            self._warm_up_thread = threading.Thread(
+                target=self._warm_up, name="oracle-warm-up", daemon=True
+            )
+            self._warm_up_thread.start()
+
+    def _warm_up(self) -> None:
+        try:
+            self.get().warm_up()
+        except Exception as e:
+            logger.warning(f"Background warm-up failed: {e}")
+            return
+        STARTUP.mark("warm")
+        logger.info(f"Startup report: {STARTUP.report()}")
@@ -0,0 +1,336 @@
+import re
+import csv
+import math
+import logging
+from collections import Counter, defaultdict
+from typing import List, Dict, Set, Tuple
+from pydantic import BaseModel, Field
+
+from config import DATA_DICTIONARY_PATH, TABLE_DICTIONARY_PATH
+
+logger = logging.getLogger(__name__)
+
+
+# --- Pydantic Model for Structured Output ---
+class TableSelection(BaseModel):
+    """Structured output format for table selection."""
+
+    tables: List[str] = Field(
+        description="List of table names needed to answer the query. Include ALL relevant tables."
+    )
+    reasoning: str = Field(
+        description="Brief explanation of why these tables were selected"
+    )
+
+
+STOPWORDS: Set[str] = {
+    "a",
+    "an",
+    "the",
+    "of",
+    "in",
+    "on",
+    "for",
+    "to",
+    "and",
+    "or",
+    "by",
+    "at",
+    "is",
+    "was",
+    "were",
+    "are",
+    "be",
+    "been",
+    "did",
+    "do",
+    "does",
+    "has",
+    "have",
+    "had",
+    "what",
+    "which",
+    "when",
+    "where",
+    "how",
+    "many",
+    "much",
+    "who",
+    "whom",
+    "whose",
+    "most",
+    "least",
+    "top",
+    "best",
+    "worst",
+    "me",
+    "show",
+    "tell",
+    "list",
+    "give",
+    "with",
+    "from",
+    "that",
+    "this",
+    "their",
+    "they",
+    "it",
+    "its",
+    "all",
+    "any",
+    "ever",
+    "time",
+    "there",
+    "than",
+    "per",
+    "like",
+    "between",
+    "across",
+    "single",
+    "last",
+    "llm",
+    "use",
+    "table",
+}
+
+# Multi-word phrases and synonyms that map user wording onto the vocabulary of
+# the data dictionary. Only applied to questions, never to the index itself.
+PHRASES: Dict[str, str] = {
+    "head to head": "matchup",
+    "running back": "rb",
+    "wide receiver": "wr",
+    "tight end": "te",
+    "all time": "career",
+    "regular season": "regular",
+    "draft pick": "draft",
+}
+SYNONYMS: Dict[str, str] = {
+    "quarterback": "qb",
+    "receiver": "wr",
+    "kicker": "k",
+    "defense": "dst",
+    "versus": "matchup",
+    "vs": "matchup",
+    "against": "matchup",
+    "won": "champion",
+    "winner": "champion",
+    "championship": "champion",
+    "title": "champion",
+    "manager": "owner",
+    "year": "season",
+    "weekly": "week",
+    "drafted": "draft",
+    "lifetime": "career",
+    "scorer": "point",
+    "scored": "point",
+}
+YEAR_PATTERN = re.compile(r"^(19|20)\d\d$")
+CAMEL_PATTERN = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+# Mirrors the "who" rule and safety check of the LLM table selector.
+WHO_KEYWORDS = ("who", "winner", "champion", "owner", "name")
+
+# ID column -> (lookup table holding its name, query keywords that require
+# the name). An empty keyword tuple means the lookup is always needed.
+NAME_LOOKUPS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "player_id": ("Players_LLM", ()),
+    "owner_id": ("FantasyOwners_LLM", WHO_KEYWORDS),
+    "nfl_team_id": ("NFLTeams_LLM", ("nfl team", "team name")),
+}
+
+# BM25 parameters and selection thresholds.
+BM25_K1 = 1.2
+BM25_B = 0.75
+TABLE_NAME_WEIGHT = 3
+RELATIVE_SCORE_CUTOFF = 0.6
+MAX_CONFIDENT_TABLES = 4
+
+
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str, expand: bool = False) -> List[str]:
+    """
+    Split text (including CamelCase/snake_case identifiers) into index terms.
+    With `expand=True`, user phrasing is mapped onto dictionary vocabulary.
+    """
+    text = CAMEL_PATTERN.sub(" ", text).lower()
+    if expand:
+        for phrase, replacement in PHRASES.items():
+            text = text.replace(phrase, replacement)
+
+    tokens = []
+    for raw in re.split(r"[^a-z0-9]+", text):
+        if not raw or raw in STOPWORDS:
+            continue
+        if YEAR_PATTERN.match(raw):
+            tokens.append("season")
+            continue
+        token = _stem(raw)
+        if expand:
+            token = SYNONYMS.get(raw, SYNONYMS.get(token, token))
+        tokens.append(token)
+    return tokens
+
+
+def proper_nouns(text: str) -> Set[str]:
+    """Capitalized words after the first one, e.g. owner or player names."""
+    words = re.findall(r"[A-Za-z][A-Za-z']*", text)
+    return {_stem(w.lower()) for w in words[1:] if w[0].isupper()}
+
+
+class TableRouter:
+    """
+    Local, deterministic table selector built from the table and data dictionaries.
+
+    Scores every table with BM25 over its name, description, column names and
+    column descriptions, keeps the tables close to the best score, then adds the
+    lookup tables needed to turn IDs into names. `route` returns the selection
+    together with a confidence in [0, 1] so callers can fall back to the LLM.
+    """
+
+    def __init__(
+        self,
+        table_descriptions: Dict[str, str],
+        table_columns: Dict[str, Dict[str, str]],
+    ):
+        self.table_columns = table_columns
+        self.tables = list(table_descriptions)
+
+        # Inverted index: term -> {table: term frequency}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        for table in self.tables:
+            terms = tokenize(table) * TABLE_NAME_WEIGHT
+            terms += tokenize(table_descriptions[table])
+            for column, description in table_columns.get(table, {}).items():
+                terms += tokenize(column) + tokenize(description)
+            counts = Counter(terms)
+            for term, tf in counts.items():
+                self.postings[term][table] = tf
+            self.doc_lengths[table] = len(terms)
+
+        self.avg_doc_length = sum(self.doc_lengths.values()) / max(len(self.tables), 1)
+        self.idf = {
+            term: math.log(1 + (len(self.tables) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    @classmethod
+    def from_csv(
+        cls,
+        table_dictionary_path: str = TABLE_DICTIONARY_PATH,
+        data_dictionary_path: str = DATA_DICTIONARY_PATH,
+    ) -> "TableRouter":
+        """Build a router from the two dictionary CSV files."""
+        with open(table_dictionary_path, mode="r", encoding="utf-8") as csvfile:
+            table_descriptions = {
+                row["table_name"].strip(): row["table_description"]
+                for row in csv.DictReader(csvfile)
+            }
+
+        table_columns: Dict[str, Dict[str, str]] = defaultdict(dict)
+        with open(data_dictionary_path, mode="r", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                table_columns[row["table_name"].strip()][row["column_name"].strip()] = (
+                    row["column_description"]
+                )
+
+        logger.info(f"Table router indexed {len(table_descriptions)} tables")
+        return cls(table_descriptions, dict(table_columns))
+
+    def score(self, query_terms: List[str]) -> Dict[str, float]:
+        """BM25 score of every table that matches at least one query term."""
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(query_terms):
+            for table, tf in self.postings.get(term, {}).items():
+                norm = (
+                    1 - BM25_B + BM25_B * self.doc_lengths[table] / self.avg_doc_length
+                )
+                scores[table] += (
+                    self.idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                )
+        return scores
+
+    def _add_name_tables(
+        self, tables: List[str], query_lower: str, has_names: bool, notes: List[str]
+    ) -> None:
+        """
+        Add the ID -> name lookup tables the selected tables depend on. Names
+        mentioned in the question (`has_names`) also need their lookup table.
+        """
+        for table in list(tables):
+            columns = self.table_columns.get(table, {})
+            for id_column, (name_table, keywords) in NAME_LOOKUPS.items():
+                if name_table in tables or name_table not in self.table_columns:
+                    continue
+                # Matches prefixed foreign keys too, e.g. home_owner_id
+                if not any(c.endswith(id_column) for c in columns):
+                    continue
+                # Views that already carry the name column need no lookup
+                name_column = id_column.replace("_id", "_name")
+                if any(c.endswith(name_column) for c in columns):
+                    continue
+                if (
+                    keywords
+                    and not has_names
+                    and not any(k in query_lower for k in keywords)
+                ):
+                    continue
+                tables.append(name_table)
+                notes.append(f"{name_table} resolves {id_column} from {table}")
+
+    def route(self, user_query: str) -> Tuple[TableSelection, float]:
+        """Select tables for `user_query`. Returns (selection, confidence)."""
+        query_terms = tokenize(user_query, expand=True)
+        query_lower = user_query.lower()
+        if not query_terms:
+            return TableSelection(tables=[], reasoning="No searchable terms"), 0.0
+
+        scores = self.score(query_terms)
+        if not scores:
+            return TableSelection(tables=[], reasoning="No matching tables"), 0.0
+
+        top_score = max(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        tables = [t for t, s in ranked if s >= RELATIVE_SCORE_CUTOFF * top_score]
+        notes = [f"BM25 top match {ranked[0][0]} ({top_score:.2f})"]
+
+        # Same rule as the LLM selector: WHO questions always get owners + seasons,
+        # unless they are clearly about NFL players rather than league members.
+        is_player_question = any(
+            "player_id" in self.table_columns.get(t, {}) for t in tables
+        ) and not {"owner", "champion"}.intersection(query_terms)
+        if any(k in query_lower for k in WHO_KEYWORDS) and not is_player_question:
+            for required in ("FantasyOwners_LLM", "FantasySeasons_LLM"):
+                if required in self.table_columns and required not in tables:
+                    tables.append(required)
+                    notes.append(f"{required} added for WHO question")
+
+        names = proper_nouns(user_query)
+        self._add_name_tables(tables, query_lower, bool(names), notes)
+
+        # Confidence: how much of the question the dictionaries explain (names
+        # excluded), how clearly the chosen tables stand out from the rest, and
+        # a penalty for sprawling selections.
+        content_terms = [t for t in query_terms if t not in names]
+        known = [t for t in content_terms if t in self.postings]
+        coverage = len(known) / len(content_terms) if content_terms else 0.0
+        unselected = [s for t, s in ranked if t not in tables]
+        separation = 1.0
+        if unselected:
+            separation = min(
+                1.0,
+                (1 - unselected[0] / top_score) / (1 - RELATIVE_SCORE_CUTOFF),
+            )
+        breadth = min(1.0, MAX_CONFIDENT_TABLES / len(tables))
+        confidence = round(coverage * separation * breadth, 3)
+
+        reasoning = f"Local router (confidence {confidence:.2f}): " + "; ".join(notes)
+        logger.info(f"Table router selected {tables} for: {user_query}")
+        return TableSelection(tables=tables, reasoning=reasoning), confidence
@@ -0,0 +1,258 @@
+import os
+import json
+import math
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TELEMETRY_PATH = "telemetry.jsonl"
+MAX_RECENT_TRACES = 500
+# telemetry.jsonl is rotated to telemetry.jsonl.1 (replacing it) past this size
+MAX_TELEMETRY_BYTES = 10 * 1024 * 1024
+
+# Name of the innermost open span, used to attribute nested spans to a stage
+_current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+
+class RequestTrace:
+    """Timing spans and counters collected while answering one question."""
+
+    def __init__(self, question: str):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.question = question
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict can be given extra attributes."""
+        span = {"name": name, **attributes}
+        parent = _current_stage.get()
+        if parent:
+            span["stage"] = parent
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            _current_stage.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def add_span(self, name: str, duration_ms: float, **attributes: Any) -> None:
+        """Record a span timed elsewhere (e.g. by a callback)."""
+        span = {"name": name, "duration_ms": round(duration_ms, 3), **attributes}
+        stage = _current_stage.get()
+        if stage:
+            span.setdefault("stage", stage)
+        with self._lock:
+            self.spans.append(span)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "question": self.question,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "counters": self.counters,
+            "spans": self.spans,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being handled on this thread/task, if any."""
+    return _current_trace.get()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class TelemetryStore:
+    """
+    Appends finished traces to a JSON lines file and keeps the most recent ones
+    in memory for p50/p95 summaries.
+
+    Summaries only ever read the in-memory window; the file is read once, for
+    its tail, at startup. Once it grows past `max_bytes` it is rotated to
+    `<path>.1`, so at most two files' worth of traces are kept on disk.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_TELEMETRY_PATH,
+        max_recent: int = MAX_RECENT_TRACES,
+        max_bytes: int = MAX_TELEMETRY_BYTES,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=max_recent)
+        self._load_recent()
+
+    def _load_recent(self) -> None:
+        # Oldest first, so a freshly rotated file is topped up from its backup
+        for path in (f"{self.path}.1", self.path):
+            try:
+                with open(path, mode="r", encoding="utf-8") as f:
+                    for line in deque(f, maxlen=self._recent.maxlen):
+                        try:
+                            self._recent.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+            except FileNotFoundError:
+                continue
+
+    def record(self, trace: RequestTrace) -> None:
+        data = trace.to_dict()
+        line = json.dumps(data, default=str)
+        with self._lock:
+            self._recent.append(data)
+            try:
+                with open(self.path, mode="a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                    size = f.tell()
+                if size >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                    logger.info(f"Rotated {self.path} at {size} bytes")
+            except OSError as e:
+                logger.error(f"Failed to write telemetry to {self.path}: {e}")
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-stage count, p50 and p95 latency over the recent traces."""
+        with self._lock:
+            traces = list(self._recent)
+
+        durations: Dict[str, List[float]] = {"total": []}
+        tokens: Dict[str, int] = {}
+        for trace in traces:
+            durations["total"].append(trace["duration_ms"])
+            for span in trace["spans"]:
+                durations.setdefault(span["name"], []).append(span["duration_ms"])
+                for key in ("input_tokens", "output_tokens"):
+                    if key in span:
+                        tokens[span["name"]] = tokens.get(span["name"], 0) + span[key]
+
+        return [
+            {
+                "stage": name,
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "tokens": tokens.get(name, 0),
+            }
+            for name, values in durations.items()
+        ]
+
+    def counters(self) -> Dict[str, float]:
+        """Average per-request counters (ReAct iterations, cache hits, ...)."""
+        with self._lock:
+            traces = list(self._recent)
+        totals: Dict[str, int] = {}
+        for trace in traces:
+            for key, value in trace["counters"].items():
+                totals[key] = totals.get(key, 0) + value
+        return {key: value / len(traces) for key, value in totals.items()}
+
+
+@contextmanager
+def trace_request(question: str, store: TelemetryStore) -> Iterator[RequestTrace]:
+    """Make a new trace current for the duration of the block, then record it."""
+    trace = RequestTrace(question)
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.duration_ms = (time.perf_counter() - start) * 1000
+        _current_trace.reset(token)
+        store.record(trace)
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Records LLM call latency/token counts and ReAct iterations on a trace."""
+
+    # Cheap and thread-safe: run on the caller's thread/event loop
+    run_inline = True
+
+    def __init__(self, trace: RequestTrace, stage: str = "llm"):
+        self.trace = trace
+        self.stage = stage
+        self._llm_starts: Dict[UUID, float] = {}
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> Any:
+        self._llm_starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> Any:
+        start = self._llm_starts.pop(run_id, None)
+        if start is None:
+            return
+
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+
+        self.trace.add_span(
+            self.stage,
+            (time.perf_counter() - start) * 1000,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+        )
+        self.trace.increment("llm_calls")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> Any:
+        start = self._llm_starts.pop(run_id, None)
+        if start is not None:
+            self.trace.add_span(
+                self.stage, (time.perf_counter() - start) * 1000, error=str(error)
+            )
+
+    def on_agent_action(self, action: Any, **kwargs: Any) -> Any:
+        self.trace.increment("react_iterations")
+
+
+def telemetry_callbacks(stage: str = "llm") -> List[BaseCallbackHandler]:
+    """Callbacks that record into the current trace (empty outside a request)."""
+    trace = current_trace()
+    return [TelemetryCallbackHandler(trace, stage)] if trace else []
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_db import generate  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def league_db(tmp_path_factory) -> str:
+    """A small synthetic league database, shared by the whole session."""
+    path = str(tmp_path_factory.mktemp("league") / "llm_fantasy_data.db")
+    generate(path, scale=0.25)
+    return path
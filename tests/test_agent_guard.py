@@ -0,0 +1,142 @@
+import sqlite3
+from typing import List
+
+import pytest
+
+from agent_guard import (
+    REPEATED_QUERY_NOTICE,
+    AgentLoopDetected,
+    QueryGuard,
+    error_signature,
+)
+from config import DATA_DICTIONARY_PATH
+from schema_index import SchemaIndex
+
+
+class Executor:
+    """Runs queries against the synthetic league the way the SQL tool reports them."""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.queries: List[str] = []
+
+    def __call__(self, query: str) -> str:
+        self.queries.append(query)
+        try:
+            return str(self.conn.execute(query).fetchall())
+        except sqlite3.Error as e:
+            return f"Error: (sqlite3.OperationalError) {e}"
+
+
+@pytest.fixture(scope="module")
+def schema_index() -> SchemaIndex:
+    return SchemaIndex(DATA_DICTIONARY_PATH)
+
+
+@pytest.fixture
+def execute(league_db) -> Executor:
+    return Executor(league_db)
+
+
+def test_repeated_query_is_answered_from_memory(schema_index, execute):
+    guard = QueryGuard(schema_index)
+    first = guard.run("SELECT COUNT(*) FROM FantasyOwners_LLM", execute)
+
+    repeat = guard.run("select count(*)\nfrom FantasyOwners_LLM;", execute)
+
+    assert repeat == REPEATED_QUERY_NOTICE + first
+    assert len(execute.queries) == 1
+    assert guard.best_observation == first
+
+
+def test_repeating_a_repeat_stops_the_agent(schema_index, execute):
+    guard = QueryGuard(schema_index)
+    query = "SELECT COUNT(*) FROM FantasyOwners_LLM"
+    first = guard.run(query, execute)
+    guard.run(query, execute)
+
+    with pytest.raises(AgentLoopDetected) as stopped:
+        guard.run(query, execute)
+
+    assert stopped.value.best_observation == first
+
+
+def test_misspelled_column_is_corrected_locally(schema_index, execute):
+    guard = QueryGuard(schema_index)
+
+    observation = guard.run(
+        "SELECT o.owner_nme FROM FantasyOwners_LLM AS o WHERE o.owner_id = 1",
+        execute,
+    )
+
+    assert observation.startswith("[Auto-corrected o.owner_nme to o.owner_name]")
+    assert execute.queries[-1] == (
+        "SELECT o.owner_name FROM FantasyOwners_LLM AS o WHERE o.owner_id = 1"
+    )
+
+
+def test_misspelled_table_is_corrected_locally(schema_index, execute):
+    guard = QueryGuard(schema_index)
+
+    observation = guard.run("SELECT COUNT(*) FROM FantasyOwner_LLM", execute)
+
+    assert observation.startswith("[Auto-corrected FantasyOwner_LLM")
+    assert "Error" not in observation
+
+
+def test_string_literals_are_not_rewritten(schema_index):
+    guard = QueryGuard(schema_index)
+
+    fixed_query, _ = guard.correct(
+        "SELECT owner_nme FROM FantasyOwners_LLM WHERE owner_name = 'owner_nme'",
+        "Error: (sqlite3.OperationalError) no such column: owner_nme",
+    )
+
+    assert fixed_query == (
+        "SELECT owner_name FROM FantasyOwners_LLM WHERE owner_name = 'owner_nme'"
+    )
+
+
+def test_unrelated_names_are_left_to_the_agent(schema_index, execute):
+    guard = QueryGuard(schema_index)
+
+    observation = guard.run("SELECT banana FROM FantasyOwners_LLM", execute)
+
+    assert observation.startswith("Error:")
+    assert len(execute.queries) == 1
+
+
+def test_the_same_error_three_times_stops_the_agent(schema_index, execute):
+    guard = QueryGuard(schema_index)
+    guard.run("SELECT banana FROM FantasyOwners_LLM", execute)
+    guard.run("SELECT banana FROM FantasyOwners_LLM WHERE owner_id = 1", execute)
+
+    with pytest.raises(AgentLoopDetected, match="same error"):
+        guard.run("SELECT banana FROM FantasyOwners_LLM LIMIT 1", execute)
+
+
+def test_consecutive_errors_stop_the_agent(schema_index, execute):
+    guard = QueryGuard(schema_index)
+    for column in ("apple", "banana", "cherry"):
+        guard.run(f"SELECT {column} FROM FantasyOwners_LLM", execute)
+
+    with pytest.raises(AgentLoopDetected, match="in a row"):
+        guard.run("SELECT damson FROM FantasyOwners_LLM", execute)
+
+
+def test_a_success_resets_the_error_streak(schema_index, execute):
+    guard = QueryGuard(schema_index)
+    for column in ("apple", "banana", "cherry"):
+        guard.run(f"SELECT {column} FROM FantasyOwners_LLM", execute)
+    guard.run("SELECT COUNT(*) FROM FantasyOwners_LLM", execute)
+
+    assert guard.run("SELECT damson FROM FantasyOwners_LLM", execute).startswith(
+        "Error:"
+    )
+
+
+def test_error_signature_drops_the_driver_prefix():
+    assert (
+        error_signature("Error: (sqlite3.OperationalError) no such column: x\n[SQL]")
+        == "no such column: x"
+    )
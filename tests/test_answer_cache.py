@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, is_context_independent
+
+
+class Clock:
+    """Stands in for time.time so expiry and LRU order are deterministic."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def league_file(tmp_path) -> str:
+    path = tmp_path / "league.db"
+    path.write_bytes(b"week 1")
+    return str(path)
+
+
+def make_cache(tmp_path, league_file: str, **kwargs) -> AnswerCache:
+    return AnswerCache(str(tmp_path / "answers.db"), db_path=league_file, **kwargs)
+
+
+def store(cache: AnswerCache, question: str, **kwargs) -> None:
+    cache.put(question, f"answer to {question}", ["Players_LLM"], "", **kwargs)
+
+
+def test_hit_ignores_case_and_punctuation(tmp_path, league_file, clock):
+    cache = make_cache(tmp_path, league_file)
+    store(cache, "Who won the 2019 championship?")
+
+    cached = cache.get("who won the 2019 championship")
+
+    assert cached.answer == "answer to Who won the 2019 championship?"
+    assert cached.tables == ["Players_LLM"]
+    assert cached.hits == 1
+
+
+def test_entries_expire_after_the_ttl(tmp_path, league_file, clock):
+    cache = make_cache(tmp_path, league_file, ttl_seconds=60)
+    store(cache, "Who won in 2019?")
+    store(cache, "Who won in 2020?", ttl_seconds=600)
+
+    clock.now += 61
+
+    assert cache.get("Who won in 2019?") is None
+    assert cache.get("Who won in 2020?") is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, league_file, clock):
+    cache = make_cache(tmp_path, league_file, max_entries=2)
+    store(cache, "first")
+    clock.now += 1
+    store(cache, "second")
+    clock.now += 1
+    assert cache.get("first") is not None
+    clock.now += 1
+
+    store(cache, "third")
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+
+
+def test_database_change_invalidates_every_entry(tmp_path, league_file, clock):
+    cache = make_cache(tmp_path, league_file)
+    store(cache, "Who won in 2019?")
+
+    with open(league_file, "wb") as f:
+        f.write(b"week 2, refreshed")
+    os.utime(league_file, ns=(1, 2))
+    cache.invalidate_if_stale()
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get("Who won in 2019?") is None
+
+
+def test_invalidate_if_stale_keeps_answers_stored_after_a_refresh(
+    tmp_path, league_file, clock
+):
+    cache = make_cache(tmp_path, league_file)
+    with open(league_file, "wb") as f:
+        f.write(b"week 2, refreshed")
+    # Another process already stored an answer against the new file
+    make_cache(tmp_path, league_file).put("Who won in 2019?", "Jake", [], "")
+
+    cache.invalidate_if_stale()
+
+    assert cache.get("Who won in 2019?").answer == "Jake"
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Who won the 2019 championship?", True),
+        ("What about 2020?", False),
+        ("How many points did he score?", False),
+        ("What is my record?", False),
+        ("", False),
+    ],
+)
+def test_only_self_contained_questions_are_cacheable(question, expected):
+    assert is_context_independent(question) is expected
@@ -0,0 +1,147 @@
+import shlex
+import asyncio
+
+import pytest
+
+import batch
+from benchmarks.replay_llm import ReplayChatModel
+from engine import OracleEngine
+
+
+def parse(command: str):
+    return batch.build_parser().parse_args(shlex.split(command))
+
+
+@pytest.mark.parametrize(
+    "line",
+    [line.strip() for line in batch.__doc__.splitlines() if "python batch.py" in line],
+)
+def test_documented_usage_parses(line):
+    command = line.split("#")[0].replace("python batch.py", "", 1)
+    assert parse(command).command in ("ask", "almanac")
+
+
+def test_shared_options_follow_the_subcommand():
+    args = parse("ask questions.txt --concurrency 8 --output out.jsonl --db x.db")
+
+    assert args.questions == "questions.txt"
+    assert args.concurrency == 8
+    assert args.output == "out.jsonl"
+    assert args.db == "x.db"
+
+
+def test_almanac_defaults():
+    args = parse("almanac --seasons 2023 2024")
+
+    assert args.seasons == [2023, 2024]
+    assert args.concurrency == batch.DEFAULT_CONCURRENCY
+    assert args.db == batch.DB_PATH
+    assert args.output is None
+
+
+def test_a_subcommand_is_required():
+    with pytest.raises(SystemExit):
+        parse("--concurrency 2")
+
+
+def test_read_questions_accepts_text_and_json_lines(tmp_path):
+    path = tmp_path / "questions.txt"
+    path.write_text(
+        "# comment\nWho won in 2019?\n\n"
+        '{"question": "Top 5 running backs in 2020"}\n',
+        encoding="utf-8",
+    )
+
+    assert batch.read_questions(str(path)) == [
+        "Who won in 2019?",
+        "Top 5 running backs in 2020",
+    ]
+
+
+def test_almanac_questions_cover_every_season():
+    questions = batch.almanac_questions([2023, 2024])
+
+    assert len(questions) == len(batch.ALMANAC_ALL_TIME_QUESTIONS) + 2 * len(
+        batch.ALMANAC_SEASON_QUESTIONS
+    )
+    assert "Who won the championship in 2024?" in questions
+
+
+class FakeResult:
+    def __init__(self, rate_limited: bool):
+        self.answer = "busy" if rate_limited else "Jake"
+        self.source = "error" if rate_limited else "agent"
+        self.sql, self.tables, self.reasoning = [], [], ""
+        self.error = "busy" if rate_limited else None
+        self.rate_limited = rate_limited
+        self.request_id = ""
+
+
+class FakeEngine:
+    """Rate-limits the first `limited` calls."""
+
+    def __init__(self, limited: int):
+        self.limited = limited
+        self.calls = 0
+
+    async def aanswer(self, question: str) -> FakeResult:
+        self.calls += 1
+        return FakeResult(self.calls <= self.limited)
+
+
+class CountingBackoff(batch.RateLimitBackoff):
+    def __init__(self):
+        super().__init__(base_seconds=0.0)
+        self.pauses = 0
+
+    def limited(self) -> float:
+        self.pauses += 1
+        return super().limited()
+
+
+def answer(engine: FakeEngine, backoff: CountingBackoff):
+    return asyncio.run(
+        batch.answer_one(engine, 0, "Who won?", asyncio.Semaphore(1), backoff)
+    )
+
+
+def test_rate_limited_questions_are_retried():
+    engine, backoff = FakeEngine(limited=2), CountingBackoff()
+    record = answer(engine, backoff)
+
+    assert record["attempts"] == 3
+    assert record["source"] == "agent"
+    assert backoff.pauses == 2
+
+
+def test_no_pause_after_the_final_attempt():
+    engine, backoff = FakeEngine(limited=batch.MAX_ATTEMPTS), CountingBackoff()
+    record = answer(engine, backoff)
+
+    assert engine.calls == batch.MAX_ATTEMPTS
+    assert record["rate_limited"]
+    assert backoff.pauses == batch.MAX_ATTEMPTS - 1
+
+
+class RateLimitedChatModel(ReplayChatModel):
+    def _respond(self, prompt: str) -> str:
+        raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+
+
+def test_rate_limited_table_selection_is_reported(league_db, tmp_path):
+    engine = OracleEngine(
+        llm=RateLimitedChatModel(recordings={}),
+        db_path=league_db,
+        answer_cache_path=str(tmp_path / "answer_cache.db"),
+        sql_cache_path=str(tmp_path / "sql_cache.db"),
+        telemetry_path=str(tmp_path / "telemetry.jsonl"),
+        verbose=False,
+    )
+    try:
+        result = asyncio.run(engine.aanswer("How lucky has everyone been?"))
+    finally:
+        engine.sqlite_executor.shutdown(wait=True)
+
+    # Not a "clarify" answer or a guess from the local router
+    assert result.source == "error"
+    assert result.rate_limited
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import conversation_memory
+from conversation_memory import ConversationMemory
+
+
+def wait_for_summary(memory: ConversationMemory, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while memory._summarizing:
+        if time.monotonic() > deadline:
+            pytest.fail("summary did not finish")
+        time.sleep(0.01)
+
+
+def save_turns(memory: ConversationMemory, count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        memory.save_turn(f"question {i} " * 5, f"answer {i} " * 5)
+        wait_for_summary(memory)
+
+
+def test_evicted_turns_are_folded_into_the_summary():
+    memory = ConversationMemory(
+        summarize=lambda summary, transcript: "Talked about 2019.", token_budget=40
+    )
+    save_turns(memory, 3)
+
+    assert memory.summary == "Talked about 2019."
+    assert memory.history_text().startswith("Summary of earlier conversation:")
+    assert memory.token_count() <= 40
+
+
+def test_failing_summary_is_not_retried_in_a_loop():
+    calls = []
+
+    def summarize(summary: str, transcript: str) -> str:
+        calls.append(transcript)
+        raise RuntimeError("429 Resource has been exhausted")
+
+    memory = ConversationMemory(summarize=summarize, token_budget=40)
+    save_turns(memory, 3)
+    time.sleep(0.1)
+
+    # One attempt; later turns arrive while it is backing off
+    assert len(calls) == 1
+    assert memory.summary == ""
+
+
+def test_failed_summary_is_retried_on_a_new_turn_after_backoff(monkeypatch):
+    monkeypatch.setattr(conversation_memory, "SUMMARY_RETRY_SECONDS", 0.0)
+    calls = []
+
+    def summarize(summary: str, transcript: str) -> str:
+        calls.append(transcript)
+        raise RuntimeError("network is unreachable")
+
+    memory = ConversationMemory(summarize=summarize, token_budget=40)
+    save_turns(memory, 2)
+    time.sleep(0.1)
+    assert len(calls) == 1
+
+    save_turns(memory, 2, start=2)
+    time.sleep(0.1)
+    assert len(calls) == 3
+
+
+def test_clear_drops_a_late_summary():
+    memory = ConversationMemory(
+        summarize=lambda summary, transcript: "Old chat.", token_budget=40
+    )
+    save_turns(memory, 3)
+    memory.clear()
+
+    assert memory.summary == ""
+    assert memory.history_text() == ""
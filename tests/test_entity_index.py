@@ -0,0 +1,81 @@
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from entity_index import EntityIndex
+
+
+class LeagueNames:
+    """A tiny league database whose names can change, like a weekly refresh."""
+
+    def __init__(self, owners: Dict[int, str]):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            "CREATE TABLE FantasyOwners_LLM (owner_id INTEGER, owner_name TEXT);"
+            "CREATE TABLE FantasyTeams_LLM "
+            "(fantasy_team_id INTEGER, fantasy_team_name TEXT, season_id INTEGER);"
+            "CREATE TABLE Players_LLM (player_id INTEGER, player_name TEXT);"
+        )
+        self.set_owners(owners)
+
+    def set_owners(self, owners: Dict[int, str]) -> None:
+        self.conn.execute("DELETE FROM FantasyOwners_LLM")
+        self.conn.executemany(
+            "INSERT INTO FantasyOwners_LLM VALUES (?, ?)", owners.items()
+        )
+
+    def query(
+        self, sql: str, parameters: Dict[str, Any], max_rows: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        rows = [dict(row) for row in self.conn.execute(sql, parameters)]
+        return rows[:max_rows]
+
+
+def owner_ids(index: EntityIndex, question: str) -> List[int]:
+    return [match.entity.id for match in index.resolve(question)]
+
+
+def test_resolves_exact_and_first_names():
+    index = EntityIndex(LeagueNames({1: "Jake Smith", 2: "Mike Jones"}).query)
+
+    assert owner_ids(index, "What is Jake Smith's record?") == [1]
+    assert owner_ids(index, "How did mike do in 2019?") == [2]
+
+
+def test_reload_serves_the_new_names():
+    league = LeagueNames({1: "Jake Smith"})
+    index = EntityIndex(league.query)
+    assert owner_ids(index, "How did Jake Smith do?") == [1]
+
+    league.set_owners({7: "Jake Smith"})
+    index.reload()
+
+    assert owner_ids(index, "How did Jake Smith do?") == [7]
+
+
+def test_resolution_racing_a_reload_is_not_served_after_it():
+    league = LeagueNames({1: "Jake Smith"})
+    index = EntityIndex(league.query)
+    index.load()
+    resolve = index._resolve
+
+    def resolve_then_refresh(key: str):
+        # Computed against the old index; the refresh lands before it's stored
+        matches = resolve(key)
+        league.set_owners({7: "Jake Smith"})
+        index.reload()
+        return matches
+
+    index._resolve = resolve_then_refresh
+    assert owner_ids(index, "How did Jake Smith do?") == [1]
+    index._resolve = resolve
+
+    assert owner_ids(index, "How did Jake Smith do?") == [7]
+
+
+def test_the_whole_league_is_indexed():
+    league = LeagueNames({i: f"Owner Number{i}" for i in range(1, 201)})
+    index = EntityIndex(league.query)
+    index.load()
+
+    assert index.stats()["owners"] == 200
@@ -0,0 +1,74 @@
+import pytest
+
+from sql_cache import SQLResultCache, normalize_sql
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (
+            "SELECT T2.owner_name FROM FantasyTeams_LLM AS T1 "
+            "JOIN FantasyOwners_LLM AS T2 ON T1.owner_id = T2.owner_id",
+            "select o.owner_name from FantasyTeams_LLM s "
+            "join FantasyOwners_LLM o on s.owner_id = o.owner_id",
+        ),
+        (
+            "```sql\nSELECT  COUNT(*)\n  FROM Players_LLM;\n```",
+            "select count(*) from players_llm",
+        ),
+    ],
+)
+def test_equivalent_queries_share_a_key(first, second):
+    assert normalize_sql(first) == normalize_sql(second)
+
+
+def test_string_literals_keep_their_case():
+    assert normalize_sql("SELECT * FROM t WHERE name = 'Jake'") != normalize_sql(
+        "SELECT * FROM t WHERE name = 'jake'"
+    )
+
+
+def test_alias_is_canonicalized_with_and_without_as():
+    assert (
+        normalize_sql("SELECT p.player_name FROM Players_LLM AS p")
+        == "select t0 . player_name from players_llm t0"
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        # Near the start of the query, no index may wrap around to its end
+        ("x AS a FROM owners a JOIN", "x as a from owners t0 join"),
+        ("AS a FROM owners a JOIN", "as a from owners t0 join"),
+        ("a FROM owners a FROM", "a from owners t0 from"),
+    ],
+)
+def test_alias_lookbehind_does_not_wrap(query, expected):
+    assert normalize_sql(query) == expected
+
+
+def test_cache_is_cleared_when_the_database_changes(tmp_path):
+    db_path = tmp_path / "league.db"
+    db_path.write_bytes(b"v1")
+    cache = SQLResultCache(str(db_path), cache_path=str(tmp_path / "cache.db"))
+    cache.put("select 1", "[(1,)]")
+    assert cache.get("select 1") == "[(1,)]"
+
+    db_path.write_bytes(b"version 2")
+
+    assert cache.get("select 1") is None
+
+
+def test_memory_level_is_bounded(tmp_path):
+    db_path = tmp_path / "league.db"
+    db_path.write_bytes(b"v1")
+    cache = SQLResultCache(
+        str(db_path), cache_path=str(tmp_path / "cache.db"), max_memory_entries=2
+    )
+    for i in range(5):
+        cache.put(f"select {i}", str(i))
+
+    assert cache.stats()["memory_entries"] == 2
+    # Evicted from memory, still served from disk
+    assert cache.get("select 0") == "0"
@@ -0,0 +1,68 @@
+import pytest
+
+from config import DATA_DICTIONARY_PATH, TABLE_DICTIONARY_PATH
+from engine import ROUTER_CONFIDENCE_THRESHOLD
+from table_router import TableRouter, tokenize
+
+
+@pytest.fixture(scope="module")
+def router() -> TableRouter:
+    return TableRouter.from_csv(TABLE_DICTIONARY_PATH, DATA_DICTIONARY_PATH)
+
+
+def test_who_questions_get_owners_and_seasons(router):
+    selection, confidence = router.route("Who won the championship in 2019?")
+
+    assert {"FantasyOwners_LLM", "FantasySeasons_LLM"} <= set(selection.tables)
+    assert confidence >= ROUTER_CONFIDENCE_THRESHOLD
+    assert selection.reasoning.startswith("Local router")
+
+
+def test_draft_questions_find_the_draft_tables(router):
+    selection, _ = router.route("What was the draft order in 2021?")
+
+    assert "FantasyDraftPicks_LLM" in selection.tables
+
+
+def test_player_stat_questions_need_the_player_table(router):
+    selection, _ = router.route(
+        "How many touchdowns did Patrick Mahomes throw in week 3?"
+    )
+
+    assert "Players_LLM" in selection.tables
+    assert "PlayerStats_Weekly_QB_LLM" in selection.tables
+
+
+@pytest.mark.parametrize("question", ["", "?!", "What is the weather?"])
+def test_unrelated_questions_have_no_confidence(router, question):
+    selection, confidence = router.route(question)
+
+    assert selection.tables == []
+    assert confidence == 0.0
+
+
+def test_confidence_is_in_range(router):
+    for question in (
+        "Which owner has the most trades?",
+        "Show me every table",
+        "How did the Chiefs defense do in week 1 of 2022?",
+    ):
+        _, confidence = router.route(question)
+        assert 0.0 <= confidence <= 1.0
+
+
+def test_sprawling_selections_lower_the_confidence():
+    columns = {"points": "Points scored", "season_id": "Season"}
+    router = TableRouter(
+        {f"Points{i}_LLM": "Points scored in a season" for i in range(8)},
+        {f"Points{i}_LLM": columns for i in range(8)},
+    )
+
+    selection, confidence = router.route("Points scored in a season")
+
+    assert len(selection.tables) == 8
+    assert confidence == pytest.approx(0.5)
+
+
+def test_tokenize_splits_table_names():
+    assert tokenize("FantasyOwners_LLM") == tokenize("fantasy owners llm")
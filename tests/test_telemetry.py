@@ -0,0 +1,51 @@
+import json
+import os
+
+from telemetry import RequestTrace, TelemetryStore, percentile
+
+
+def record(store: TelemetryStore, count: int) -> None:
+    for i in range(count):
+        trace = RequestTrace(f"question {i}")
+        trace.duration_ms = float(i)
+        store.record(trace)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 95) == 0.0
+
+
+def test_file_is_rotated_past_max_bytes(tmp_path):
+    path = str(tmp_path / "telemetry.jsonl")
+    store = TelemetryStore(path, max_bytes=2_000)
+
+    record(store, 200)
+
+    assert os.path.getsize(path) < 2_000
+    assert os.path.getsize(path + ".1") < 2_000 + 200
+    assert not os.path.exists(path + ".2")
+
+
+def test_recent_window_is_bounded_and_survives_a_restart(tmp_path):
+    path = str(tmp_path / "telemetry.jsonl")
+    store = TelemetryStore(path, max_recent=50, max_bytes=2_000)
+    record(store, 200)
+    assert store.summary()[0]["count"] == 50
+
+    # The live file alone may hold only a few traces right after a rotation
+    on_disk = [
+        json.loads(line)["duration_ms"]
+        for name in (path + ".1", path)
+        for line in open(name, encoding="utf-8")
+    ]
+    reopened = TelemetryStore(path, max_recent=50, max_bytes=2_000)
+    total = reopened.summary()[0]
+
+    assert total["stage"] == "total"
+    assert total["count"] == len(on_disk[-50:])
+    assert total["p95_ms"] == percentile(on_disk[-50:], 95)
+    assert on_disk[-1] == 199.0